@@ -1,72 +1,114 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from db import User, Project, get_db
+from auth import decode_token
 from pathlib import Path
-import json
+import hashlib
+import os
+import orjson
+from typing import Optional
 
 router = APIRouter(prefix="/admin")
 # Use absolute path based on file location
 BASE_DATA_DIR = Path(__file__).parent / "data" / "projects"
+BASE_DATA_DIR_STR = str(BASE_DATA_DIR)  # os.path joins in hot paths avoid Path allocations
 
-@router.get("/users")
-def get_all_users(admin_username: str, db: Session = Depends(get_db)):
-    admin = db.query(User).filter(User.username == admin_username).first()
-    if not admin or not admin.is_admin:
-        raise HTTPException(status_code=403, detail="Admin only")
+# Admin lists change rarely; let clients reuse them briefly and revalidate cheaply
+LIST_CACHE_CONTROL = "private, max-age=5"
+
+def _conditional_json(request: Request, content) -> Response:
+    """Serialise content once, tag it with an ETag and answer 304 if the client already has it."""
+    body = orjson.dumps(content)
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": LIST_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def require_admin(request: Request, token: Optional[str] = None) -> str:
+    """
+    Dependency that rejects non-admin callers; returns the admin username.
     
-    users = db.query(User).all()
-    return [{"id": u.id, "username": u.username, "is_admin": bool(u.is_admin)} for u in users]
+    Accepts the signed token from /login as a Bearer header or a ?token= query
+    parameter (for plain download links) - no database lookup needed.
+    """
+    auth_header = request.headers.get("authorization", "")
+    if auth_header.lower().startswith("bearer "):
+        token = auth_header[7:]
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    payload = decode_token(token)
+    if not payload.get("adm"):
+        raise HTTPException(status_code=403, detail="Admin only")
+    return payload["sub"]
+
+@router.get("/users")
+def get_all_users(request: Request, admin: str = Depends(require_admin), db: Session = Depends(get_db)):
+    # Plain column rows - no ORM instances to build or lazy-load from
+    rows = db.query(User.id, User.username, User.is_admin).all()
+    return _conditional_json(request, [
+        {"id": uid, "username": username, "is_admin": bool(is_admin)}
+        for uid, username, is_admin in rows
+    ])
 
 @router.get("/projects")
-def get_all_projects(admin_username: str, db: Session = Depends(get_db)):
-    admin = db.query(User).filter(User.username == admin_username).first()
-    if not admin or not admin.is_admin:
-        raise HTTPException(status_code=403, detail="Admin only")
+def get_all_projects(request: Request, admin: str = Depends(require_admin), db: Session = Depends(get_db)):
+    # Single JOIN selecting only the serialised columns
+    rows = (
+        db.query(Project.id, Project.name, Project.user_id, Project.zip_filename, User.username)
+        .join(User, Project.user_id == User.id)
+        .all()
+    )
+    # One directory scan instead of a Path build + stat per project
+    analysis_ids = set()
+    if os.path.isdir(BASE_DATA_DIR_STR):
+        with os.scandir(BASE_DATA_DIR_STR) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False) and os.path.isfile(os.path.join(entry.path, "analysis_result.json")):
+                    analysis_ids.add(entry.name)
     
-    projects = db.query(Project).all()
-    result = []
-    for p in projects:
-        username = db.query(User).filter(User.id == p.user_id).first().username
-        project_dir = BASE_DATA_DIR / str(p.id)
-        analysis_file = project_dir / "analysis_result.json"
-        has_analysis = analysis_file.exists()
-        
-        result.append({
-            "id": p.id, 
-            "name": p.name, 
-            "user_id": p.user_id,
+    return _conditional_json(request, [
+        {
+            "id": pid,
+            "name": name,
+            "user_id": user_id,
             "username": username,
-            "zip_filename": p.zip_filename,
-            "has_analysis": has_analysis
-        })
-    return result
+            "zip_filename": zip_filename,
+            "has_analysis": str(pid) in analysis_ids
+        }
+        for pid, name, user_id, zip_filename, username in rows
+    ])
 
 @router.get("/projects/{project_id}/analysis")
-def get_project_analysis(project_id: str, admin_username: str, db: Session = Depends(get_db)):
-    admin = db.query(User).filter(User.username == admin_username).first()
-    if not admin or not admin.is_admin:
-        raise HTTPException(status_code=403, detail="Admin only")
-    
-    analysis_file = BASE_DATA_DIR / project_id / "analysis_result.json"
-    if not analysis_file.exists():
+def get_project_analysis(project_id: int, request: Request, admin: str = Depends(require_admin)):
+    analysis_file = os.path.join(BASE_DATA_DIR_STR, str(project_id), "analysis_result.json")
+    try:
+        st = os.stat(analysis_file)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="No analysis found")
     
-    with open(analysis_file) as f:
-        return json.load(f)
-
-@router.get("/projects/{project_id}/download")
-def download_project_zip(project_id: str, admin_username: str, db: Session = Depends(get_db)):
-    admin = db.query(User).filter(User.username == admin_username).first()
-    if not admin or not admin.is_admin:
-        raise HTTPException(status_code=403, detail="Admin only")
+    # Weak ETag from mtime + size so repeat requests skip the read entirely
+    etag = f'W/"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
     
-    project = db.query(Project).filter(Project.id == int(project_id)).first()
+    # File is already JSON - send the bytes as-is instead of parsing and re-serialising
+    return FileResponse(analysis_file, media_type="application/json", headers={"ETag": etag}, stat_result=st)
+
+@router.get("/projects/{project_id}/download", response_class=FileResponse)
+def download_project_zip(project_id: int, admin: str = Depends(require_admin), db: Session = Depends(get_db)):
+    project = db.query(Project).filter(Project.id == project_id).first()
     if not project or not project.zip_filename:
         raise HTTPException(status_code=404, detail="ZIP file not found")
     
     zip_path = Path(project.zip_filename)
-    if not zip_path.exists():
+    try:
+        st = zip_path.stat()
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="ZIP file not found on disk")
     
-    return FileResponse(zip_path, filename=zip_path.name)
+    # Passing the stat result and media type lets Starlette skip its own stat/mimetype
+    # lookups; it derives Content-Length, Last-Modified and ETag from it and streams via sendfile
+    return FileResponse(zip_path, filename=zip_path.name, media_type="application/zip", stat_result=st)
@@ -3,28 +3,18 @@ Best Practice Agent
 """
 
 from autogen_agentchat.agents import AssistantAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-import os
+from functools import lru_cache
 
 from app.config.analysis_config import AnalysisConfig, get_depth_parameters, get_verbosity_instructions
+from app.agents.utils import COMPACT_JSON_INSTRUCTION, get_model_client
 
 
-def create_best_practice_agent(config: AnalysisConfig) -> AssistantAgent:
-    """
-    Creates the Best Practice Agent.
-    
-    This agent reviews the codebase against best practices for the detected stack/framework.
-    
-    Args:
-        config: Analysis configuration
-        
-    Returns:
-        Configured AssistantAgent
-    """
-    
-    verbosity_instr = get_verbosity_instructions(config.verbosity)
+@lru_cache(maxsize=16)
+def _build_system_message(verbosity: str) -> str:
+    """Build (once per distinct setting) the agent's system prompt."""
+    verbosity_instr = get_verbosity_instructions(verbosity)
     
-    system_message = f"""You are a Best Practice Review Agent. You analyze codebases for adherence to industry best practices.
+    return f"""You are a Best Practice Review Agent. You analyze codebases for adherence to industry best practices.
 
 **Your Task**:
 1. Review the semantic analysis results (components, APIs, entities)
@@ -46,6 +36,7 @@ def create_best_practice_agent(config: AnalysisConfig) -> AssistantAgent:
 **Output Requirements**:
 - Provide ONLY valid JSON, no markdown, no explanations outside the JSON
 - Include all required fields
+- {COMPACT_JSON_INSTRUCTION}
 - {verbosity_instr}
 - Severity levels: low, medium, high, critical
 - Priority levels: low, medium, high
@@ -82,14 +73,23 @@ def create_best_practice_agent(config: AnalysisConfig) -> AssistantAgent:
 
 CRITICAL: ALL fields shown above are REQUIRED. Output ONLY valid JSON."""
 
-    api_key = os.getenv("OPENAI_API_KEY")
+
+def create_best_practice_agent(config: AnalysisConfig) -> AssistantAgent:
+    """
+    Creates the Best Practice Agent.
     
-    model_client = OpenAIChatCompletionClient(
-        model=config.llm_model,
-        api_key=api_key,
-        temperature=config.temperature,
-        max_tokens=config.max_tokens
-    )
+    This agent reviews the codebase against best practices for the detected stack/framework.
+    
+    Args:
+        config: Analysis configuration
+        
+    Returns:
+        Configured AssistantAgent
+    """
+    
+    system_message = _build_system_message(config.verbosity)
+
+    model_client = get_model_client(config.llm_model, config.temperature, config.max_tokens)
 
     return AssistantAgent(
         name="best_practice_agent",
@@ -3,23 +3,12 @@ Coordinator Agent
 """
 
 from autogen_agentchat.agents import AssistantAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-import os
 
 from app.config.analysis_config import AnalysisConfig, get_depth_parameters, get_verbosity_instructions
+from app.agents.utils import COMPACT_JSON_INSTRUCTION, get_model_client
 
 
-def create_coordinator_agent(config: AnalysisConfig) -> AssistantAgent:
-    """
-    Creates the Coordinator Agent that initiates the analysis pipeline.
-    
-    This agent:
-    - Receives the initial project context
-    - Formulates the analysis strategy
-    - Kicks off the workflow with clear instructions
-    """
-    
-    system_message = f"""You are the Coordinator Agent for codebase analysis.
+SYSTEM_MESSAGE = f"""You are the Coordinator Agent for codebase analysis.
 
 **Your Role**:
 You receive project metadata and initiate a comprehensive analysis by providing clear instructions to downstream agents.
@@ -47,16 +36,22 @@ You receive project metadata and initiate a comprehensive analysis by providing
   ]
 }}
 
-Keep output concise and actionable."""
+Keep output concise and actionable. {COMPACT_JSON_INSTRUCTION}."""
+
 
-    api_key = os.getenv("OPENAI_API_KEY")
+def create_coordinator_agent(config: AnalysisConfig) -> AssistantAgent:
+    """
+    Creates the Coordinator Agent that initiates the analysis pipeline.
     
-    model_client = OpenAIChatCompletionClient(
-        model=config.llm_model,
-        api_key=api_key,
-        temperature=0.2,
-        max_tokens=config.max_tokens
-    )
+    This agent:
+    - Receives the initial project context
+    - Formulates the analysis strategy
+    - Kicks off the workflow with clear instructions
+    """
+    
+    system_message = SYSTEM_MESSAGE
+
+    model_client = get_model_client(config.llm_model, 0.2, config.max_tokens)
 
     return AssistantAgent(
         name="coordinator_agent",
@@ -3,25 +3,12 @@ QA Agent
 """
 
 from autogen_agentchat.agents import AssistantAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-import os
 
 from app.config.analysis_config import AnalysisConfig, get_depth_parameters, get_verbosity_instructions
+from app.agents.utils import COMPACT_JSON_INSTRUCTION, get_model_client
 
 
-def create_qa_agent(config: AnalysisConfig) -> AssistantAgent:
-    """
-    Creates the QA Agent that validates and enhances SDE and PM outputs.
-    
-    This agent:
-    - Reviews SDE technical documentation for completeness and accuracy
-    - Reviews PM product documentation for clarity and user value
-    - Identifies gaps or inconsistencies
-    - Suggests enhancements
-    - Validates that outputs match schemas
-    """
-    
-    system_message = f"""You are the Quality Assurance Agent for codebase analysis outputs.
+SYSTEM_MESSAGE = f"""You are the Quality Assurance Agent for codebase analysis outputs.
 
 **Your Role**:
 You receive the SDE technical report and PM product report, then validate and enhance them.
@@ -70,16 +57,24 @@ For PM Report:
   }}
 }}
 
-Be constructive and specific. Focus on actionable improvements."""
+Be constructive and specific. Focus on actionable improvements. {COMPACT_JSON_INSTRUCTION}."""
+
 
-    api_key = os.getenv("OPENAI_API_KEY")
+def create_qa_agent(config: AnalysisConfig) -> AssistantAgent:
+    """
+    Creates the QA Agent that validates and enhances SDE and PM outputs.
     
-    model_client = OpenAIChatCompletionClient(
-        model=config.llm_model,
-        api_key=api_key,
-        temperature=0.4,  # Moderate temperature for balanced critique
-        max_tokens=config.max_tokens
-    )
+    This agent:
+    - Reviews SDE technical documentation for completeness and accuracy
+    - Reviews PM product documentation for clarity and user value
+    - Identifies gaps or inconsistencies
+    - Suggests enhancements
+    - Validates that outputs match schemas
+    """
+    
+    system_message = SYSTEM_MESSAGE
+
+    model_client = get_model_client(config.llm_model, 0.4, config.max_tokens)  # Moderate temperature for balanced critique
 
     return AssistantAgent(
         name="qa_agent",
@@ -3,18 +3,18 @@ SDE Writer Agent
 """
 
 from autogen_agentchat.agents import AssistantAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-import os
+from functools import lru_cache
 
 from app.config.analysis_config import AnalysisConfig, get_depth_parameters, get_verbosity_instructions
+from app.agents.utils import COMPACT_JSON_INSTRUCTION, get_model_client
 
 
-def create_sde_writer_agent(config: AnalysisConfig) -> AssistantAgent:
-    
-    verbosity_instr = get_verbosity_instructions(config.verbosity)
-    diagrams_enabled = config.diagram_preferences.enabled
+@lru_cache(maxsize=16)
+def _build_system_message(verbosity: str, diagrams_enabled: tuple) -> str:
+    """Build (once per distinct setting) the agent's system prompt."""
+    verbosity_instr = get_verbosity_instructions(verbosity)
     
-    system_message = f"""You are a Technical Documentation Writer Agent for software engineers.
+    return f"""You are a Technical Documentation Writer Agent for software engineers.
 
 **Your Task**:
 1. Review the semantic analysis and best practices results
@@ -37,6 +37,7 @@ Generate Mermaid code for: {', '.join(diagrams_enabled)}
 
 **Output Requirements**:
 - Provide ONLY valid JSON, no markdown, no explanations outside the JSON
+- {COMPACT_JSON_INSTRUCTION}
 - {verbosity_instr}
 - All Mermaid code must be syntactically correct
 
@@ -75,14 +76,12 @@ Generate Mermaid code for: {', '.join(diagrams_enabled)}
 
 CRITICAL: ALL fields shown above are REQUIRED. Output ONLY valid JSON."""
 
-    api_key = os.getenv("OPENAI_API_KEY")
+
+def create_sde_writer_agent(config: AnalysisConfig) -> AssistantAgent:
     
-    model_client = OpenAIChatCompletionClient(
-        model=config.llm_model,
-        api_key=api_key,
-        temperature=config.temperature,
-        max_tokens=config.max_tokens
-    )
+    system_message = _build_system_message(config.verbosity, tuple(config.diagram_preferences.enabled))
+
+    model_client = get_model_client(config.llm_model, config.temperature, config.max_tokens)
 
     return AssistantAgent(
         name="sde_writer_agent",
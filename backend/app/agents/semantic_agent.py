@@ -3,36 +3,21 @@ Semantic Query Agent
 """
 
 from autogen_agentchat.agents import AssistantAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-import os
+from functools import lru_cache
 
 from app.config.analysis_config import AnalysisConfig, get_depth_parameters, get_verbosity_instructions
+from app.agents.utils import COMPACT_JSON_INSTRUCTION, get_model_client
 
 
-def create_semantic_query_agent(config: AnalysisConfig) -> AssistantAgent:
-    """
-    Creates the Semantic Query Agent.
-    
-    This agent analyzes the codebase structure using RAG retrieval to identify:
-    - Components and their relationships
-    - API endpoints
-    - Data entities
-    - Data flows
-    - Key files
+@lru_cache(maxsize=16)
+def _build_system_message(depth: str, verbosity: str) -> str:
+    """Build (once per distinct setting) the agent's system prompt."""
+    depth_params = get_depth_parameters(depth)
+    verbosity_instr = get_verbosity_instructions(verbosity)
     
-    Args:
-        config: Analysis configuration
-        
-    Returns:
-        Configured AssistantAgent
-    """
-    
-    depth_params = get_depth_parameters(config.depth)
-    verbosity_instr = get_verbosity_instructions(config.verbosity)
-    
-    system_message = f"""You are a Semantic Code Analysis Agent. Your job is to analyze a codebase and extract its structural components.
+    return f"""You are a Semantic Code Analysis Agent. Your job is to analyze a codebase and extract its structural components.
 
-**Analysis Depth**: {config.depth}
+**Analysis Depth**: {depth}
 **Retrieval Limit**: Use top {depth_params['retrieval_k']} chunks per query
 **Detail Level**: {depth_params['detail_level']}
 
@@ -44,6 +29,7 @@ def create_semantic_query_agent(config: AnalysisConfig) -> AssistantAgent:
 **Output Requirements**:
 - Provide ONLY valid JSON, no markdown, no explanations outside the JSON
 - Include all required fields
+- {COMPACT_JSON_INSTRUCTION}
 - {verbosity_instr}
 
 **EXACT JSON Schema Required**:
@@ -96,16 +82,28 @@ def create_semantic_query_agent(config: AnalysisConfig) -> AssistantAgent:
 
 CRITICAL: ALL fields shown above are REQUIRED. Output ONLY valid JSON."""
 
-    # Get API key from environment
-    api_key = os.getenv("OPENAI_API_KEY")
+
+def create_semantic_query_agent(config: AnalysisConfig) -> AssistantAgent:
+    """
+    Creates the Semantic Query Agent.
     
-    # Create model client
-    model_client = OpenAIChatCompletionClient(
-        model=config.llm_model,
-        api_key=api_key,
-        temperature=config.temperature,
-        max_tokens=config.max_tokens
-    )
+    This agent analyzes the codebase structure using RAG retrieval to identify:
+    - Components and their relationships
+    - API endpoints
+    - Data entities
+    - Data flows
+    - Key files
+    
+    Args:
+        config: Analysis configuration
+        
+    Returns:
+        Configured AssistantAgent
+    """
+    
+    system_message = _build_system_message(config.depth, config.verbosity)
+
+    model_client = get_model_client(config.llm_model, config.temperature, config.max_tokens)
 
     return AssistantAgent(
         name="semantic_query_agent",
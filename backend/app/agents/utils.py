@@ -3,6 +3,210 @@ Utility functions for agents
 """
 
 from typing import Dict, List, Any, Optional
+from functools import lru_cache
+from pathlib import Path
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import orjson
+from pydantic import BaseModel
+
+from autogen_core import CacheStore
+from autogen_core.models import ChatCompletionClient
+from autogen_ext.models.cache import ChatCompletionCache
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Appended to every agent's output rules: agent replies are replayed to each downstream
+# agent in the GraphFlow thread, so indentation whitespace is paid for again at every hop
+COMPACT_JSON_INSTRUCTION = "Emit the JSON minified on a single line (no indentation or line breaks)"
+
+# LLM response cache settings (LLM_RESPONSE_CACHE=0 sends every request to the API)
+RESPONSE_CACHE_ENABLED = os.getenv("LLM_RESPONSE_CACHE", "1") != "0"
+RESPONSE_CACHE_TTL = 6 * 60 * 60  # seconds
+RESPONSE_CACHE_MAX = 256
+# Persistent tier, so re-running an analysis after a restart still hits the cache
+RESPONSE_CACHE_DB = Path(__file__).parent.parent / "data" / "llm_response_cache.db"
+RESPONSE_CACHE_DISK_TTL = 24 * 60 * 60  # seconds (wall clock)
+RESPONSE_CACHE_DISK_MAX = 4096
+RESPONSE_CACHE_PRUNE_EVERY = 64  # disk writes between sweeps of expired and excess rows
+
+
+class TTLCacheStore(CacheStore):
+    """Bounded in-memory cache store whose entries expire after a TTL."""
+    
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_MAX):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, tuple] = {}
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return default
+        return value
+    
+    def set(self, key: str, value: Any) -> None:
+        if len(self._entries) >= self.max_entries:
+            # Drop the oldest insertion (dicts keep insertion order)
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+
+class PersistentCacheStore(TTLCacheStore):
+    """
+    TTL cache store backed by SQLite so cached responses survive restarts.
+    
+    The in-memory entries stay in front of the database. Values are stored as
+    JSON; ChatCompletionCache rebuilds CreateResult objects from the dicts.
+    set() is called from agents on the event loop, so rows are written by a
+    background thread, which also prunes the table every RESPONSE_CACHE_PRUNE_EVERY
+    writes rather than on each one.
+    """
+    
+    def __init__(self, path: Path, disk_ttl: float = RESPONSE_CACHE_DISK_TTL, disk_max: int = RESPONSE_CACHE_DISK_MAX):
+        super().__init__()
+        self.disk_ttl = disk_ttl
+        self.disk_max = disk_max
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires REAL NOT NULL, value BLOB NOT NULL)"
+        )
+        self._prune()
+        self._writes = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, name="llm-cache-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        value = super().get(key)
+        if value is not None:
+            return value
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT expires, value FROM responses WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            return default
+        if row is None or row[0] < time.time():
+            return default
+        value = orjson.loads(row[1])
+        super().set(key, value)
+        return value
+    
+    def set(self, key: str, value: Any) -> None:
+        super().set(key, value)
+        if isinstance(value, list):
+            data = [item.model_dump(mode="json") if isinstance(item, BaseModel) else item for item in value]
+        elif isinstance(value, BaseModel):
+            data = value.model_dump(mode="json")
+        else:
+            data = value
+        self._writes.put((key, time.time() + self.disk_ttl, orjson.dumps(data)))
+    
+    def close(self) -> None:
+        """Write out queued entries and stop the writer thread."""
+        self._writes.put(None)
+        self._writer.join(timeout=5)
+    
+    def _prune(self) -> None:
+        # Drop expired rows, then the soonest-expiring ones beyond the size cap
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE expires < ?", (time.time(),))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                (self.disk_max,)
+            )
+    
+    def _write_loop(self) -> None:
+        unpruned = 0
+        while True:
+            rows = [self._writes.get()]
+            # Whatever else is already queued goes into the same transaction
+            while not self._writes.empty():
+                rows.append(self._writes.get())
+            stop = None in rows
+            rows = [row for row in rows if row is not None]
+            try:
+                if rows:
+                    with self._lock:
+                        with self._conn:
+                            self._conn.execute("BEGIN")
+                            self._conn.executemany(
+                                "INSERT OR REPLACE INTO responses (key, expires, value) VALUES (?, ?, ?)", rows
+                            )
+                    unpruned += len(rows)
+                if unpruned >= RESPONSE_CACHE_PRUNE_EVERY:
+                    self._prune()
+                    unpruned = 0
+            except sqlite3.Error as e:
+                print(f"⚠️  Failed to persist LLM response cache entries: {e}")
+            if stop:
+                return
+
+
+class ScopedCacheStore(CacheStore):
+    """
+    View of a shared cache store with every key prefixed by a scope.
+    
+    ChatCompletionCache keys only cover the messages, tools and create args, not
+    the client's model, temperature or max_tokens, so each client reads and
+    writes the shared store under its own settings.
+    """
+    
+    def __init__(self, store: CacheStore, scope: str):
+        self.store = store
+        self.scope = scope
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.store.get(f"{self.scope}:{key}", default)
+    
+    def set(self, key: str, value: Any) -> None:
+        self.store.set(f"{self.scope}:{key}", value)
+
+
+# Shared by every cached client through a ScopedCacheStore per client settings; within
+# a scope the prompt in the key separates agents (system message) and projects (task text)
+try:
+    _response_store: TTLCacheStore = PersistentCacheStore(RESPONSE_CACHE_DB)
+except (OSError, sqlite3.Error) as e:
+    print(f"⚠️  LLM response cache is memory-only ({e})")
+    _response_store = TTLCacheStore()
+
+
+@lru_cache(maxsize=16)
+def get_model_client(model: str, temperature: float, max_tokens: int) -> ChatCompletionClient:
+    """
+    Return a shared model client for the given parameters.
+    
+    Agents with identical settings reuse one client (and its HTTP connection pool)
+    instead of each opening their own. Unless RESPONSE_CACHE_ENABLED is off,
+    identical requests with the same settings are answered from the response
+    cache without calling the API.
+    """
+    client = OpenAIChatCompletionClient(
+        model=model,
+        api_key=OPENAI_API_KEY,
+        temperature=temperature,
+        max_tokens=max_tokens
+    )
+    if not RESPONSE_CACHE_ENABLED:
+        return client
+    scope = orjson.dumps([model, temperature, max_tokens]).decode()
+    return ChatCompletionCache(client, store=ScopedCacheStore(_response_store, scope))
 
 
 def search_code(query: str, k: int = 5, vector_store_path: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -31,19 +235,37 @@ def search_code(query: str, k: int = 5, vector_store_path: Optional[str] = None)
         ]
     
     # Real implementation using embeddings module (repo-processing/ is in sys.path)
-    from embeddings import load_vector_store
-    
-    vector_store = load_vector_store(vector_store_path)
-    docs = vector_store.similarity_search(query, k=k)
-    
-    results = []
-    for doc in docs:
-        results.append({
-            "content": doc.page_content,
-            "file_path": doc.metadata.get('file_path', ''),
-            "language": doc.metadata.get('language', ''),
-            "semantic_type": doc.metadata.get('semantic_type', ''),
-            "chunk_index": doc.metadata.get('chunk_index', 0)
-        })
-    
-    return results
+    from embeddings import similarity_search
+    
+    docs = similarity_search(vector_store_path, query, k=k)
+    
+    return [_doc_result(doc) for doc in docs]
+
+
+def search_code_batch(queries: List[str], k: int = 5, vector_store_path: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Run several search_code queries against one vector store.
+    
+    The store is loaded once and all uncached queries are embedded in a single
+    request instead of one request per query.
+    
+    Returns:
+        Dict mapping each query to its search_code results
+    """
+    if vector_store_path is None:
+        return {query: search_code(query, k) for query in queries}
+    
+    from embeddings import similarity_search_batch
+    
+    batches = similarity_search_batch(vector_store_path, list(queries), k=k)
+    return {query: [_doc_result(doc) for doc in docs] for query, docs in zip(queries, batches)}
+
+
+def _doc_result(doc) -> Dict[str, Any]:
+    return {
+        "content": doc.page_content,
+        "file_path": doc.metadata.get('file_path', ''),
+        "language": doc.metadata.get('language', ''),
+        "semantic_type": doc.metadata.get('semantic_type', ''),
+        "chunk_index": doc.metadata.get('chunk_index', 0)
+    }
@@ -1,19 +1,116 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+import base64
 import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
 
 from db import User, get_db
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+PBKDF2_ITERATIONS = 200_000
+
+# At most this many PBKDF2 derivations run at once (they release the GIL and each
+# takes a full core), so a burst of logins can't take every core from other requests
+KDF_CONCURRENCY = int(os.getenv("KDF_CONCURRENCY", max(1, (os.cpu_count() or 2) // 2)))
+_kdf_slots = threading.BoundedSemaphore(KDF_CONCURRENCY)
+
+# Signing key for session tokens. Without AUTH_SECRET_KEY each process signs with its own
+# random key, so tokens only survive until restart and only validate on the worker that
+# issued them - a multi-worker setup (REDIS_URL or WEB_CONCURRENCY > 1) refuses to start
+_auth_secret = os.getenv("AUTH_SECRET_KEY")
+if not _auth_secret:
+    if os.getenv("REDIS_URL") or int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        raise RuntimeError(
+            "AUTH_SECRET_KEY must be set when running several workers (REDIS_URL or "
+            "WEB_CONCURRENCY > 1); otherwise each worker rejects the others' tokens"
+        )
+    logger.warning("AUTH_SECRET_KEY is not set; login tokens are signed with a random "
+                   "per-process key and stop working on restart")
+    _auth_secret = os.urandom(32).hex()
+SECRET_KEY = _auth_secret.encode()
+TOKEN_TTL = 60 * 60  # seconds
+
+# Successful verifications (username, sha256(password), stored hash) -> expiry,
+# so repeat logins skip the deliberately slow KDF
+VERIFY_CACHE_TTL = 60  # seconds
+VERIFY_CACHE_MAX = 1024
+_verify_cache = {}
+
 class UserCreate(BaseModel):
     username: str
     password: str
 
 def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+    salt = os.urandom(16)
+    with _kdf_slots:
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PBKDF2_ITERATIONS)
+    return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${salt.hex()}${digest.hex()}"
+
+def _check_password(password: str, hashed: str) -> bool:
+    if hashed.startswith("pbkdf2_sha256$"):
+        _, iterations, salt, expected = hashed.split("$")
+        with _kdf_slots:
+            digest = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), int(iterations))
+        return hmac.compare_digest(digest.hex(), expected)
+    # Legacy unsalted SHA-256 hashes from before the KDF switch
+    return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), hashed)
+
+def verify_password(username: str, password: str, hashed: str) -> bool:
+    key = (username, hashlib.sha256(password.encode()).digest(), hashed)
+    now = time.monotonic()
+    expires = _verify_cache.get(key)
+    if expires is not None and expires > now:
+        return True
+    
+    if not _check_password(password, hashed):
+        return False
+    
+    if len(_verify_cache) >= VERIFY_CACHE_MAX:
+        _verify_cache.clear()
+    _verify_cache[key] = now + VERIFY_CACHE_TTL
+    return True
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def create_token(username: str, is_admin: bool) -> str:
+    """Issue an HMAC-SHA256 signed token carrying the user's name and admin flag."""
+    payload = _b64encode(json.dumps(
+        {"sub": username, "adm": is_admin, "exp": int(time.time()) + TOKEN_TTL},
+        separators=(",", ":"),
+    ).encode())
+    signature = _b64encode(hmac.new(SECRET_KEY, payload.encode(), hashlib.sha256).digest())
+    return f"{payload}.{signature}"
+
+def decode_token(token: str) -> dict:
+    """Verify a token from create_token and return its payload; raises 401 if invalid or expired."""
+    try:
+        payload, signature = token.split(".")
+        expected = _b64encode(hmac.new(SECRET_KEY, payload.encode(), hashlib.sha256).digest())
+        if not hmac.compare_digest(signature, expected):
+            raise ValueError("bad signature")
+        data = json.loads(_b64decode(payload))
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    if data.get("exp", 0) < time.time():
+        raise HTTPException(status_code=401, detail="Token expired")
+    return data
 
+# signup/login stay sync on purpose: FastAPI runs sync endpoints in its threadpool,
+# so the PBKDF2 work never blocks the event loop (async + to_thread would instead
+# put the blocking SQLAlchemy queries on the loop)
 @router.post("/signup")
 def signup(user: UserCreate, db: Session = Depends(get_db)):
     db_user = db.query(User).filter(User.username == user.username).first()
@@ -30,6 +127,15 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
 @router.post("/login")
 def login(user: UserCreate, db: Session = Depends(get_db)):
     db_user = db.query(User).filter(User.username == user.username).first()
-    if not db_user or db_user.hashed_password != hash_password(user.password):
+    if not db_user or not verify_password(db_user.username, user.password, db_user.hashed_password or ""):
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    return {"is_admin": bool(db_user.is_admin), "username": db_user.username}
\ No newline at end of file
+    
+    # Upgrade legacy SHA-256 hashes now that we know the plaintext
+    if not db_user.hashed_password.startswith("pbkdf2_sha256$"):
+        db_user.hashed_password = hash_password(user.password)
+        db.commit()
+    return {
+        "is_admin": bool(db_user.is_admin),
+        "username": db_user.username,
+        "token": create_token(db_user.username, bool(db_user.is_admin)),
+    }
\ No newline at end of file
@@ -3,14 +3,16 @@ Analysis Configuration Module
 Manages analysis depth, verbosity, features, and templates for AutoGen pipeline
 """
 
-from typing import Dict, List, Optional, Literal
-from pydantic import BaseModel, Field, validator
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Literal, Tuple
+from pydantic import BaseModel, ConfigDict, Field
 from pathlib import Path
-import json
 
 
 class DiagramPreferences(BaseModel):
     """Diagram generation preferences"""
+    model_config = ConfigDict(frozen=True, revalidate_instances="never")
+    
     enabled: List[Literal["architecture", "sequence", "er", "flowchart"]] = Field(
         default=["architecture"],
         description="Which diagram types to generate"
@@ -23,14 +25,23 @@ class DiagramPreferences(BaseModel):
 
 class FeaturesEnabled(BaseModel):
     """Feature toggles for analysis agents"""
+    model_config = ConfigDict(frozen=True, revalidate_instances="never")
+    
     structure: bool = Field(default=True, description="Enable structural analysis (Semantic Query Agent)")
     api_db: bool = Field(default=True, description="Enable API/DB analysis")
     best_practices: bool = Field(default=True, description="Enable best practices review")
     pm_insights: bool = Field(default=True, description="Enable PM insights generation")
+    
+    @property
+    def any_enabled(self) -> bool:
+        """True if at least one feature toggle is on"""
+        return self.structure or self.api_db or self.best_practices or self.pm_insights
 
 
 class AnalysisConfig(BaseModel):
     """Complete analysis configuration"""
+    model_config = ConfigDict(frozen=True, revalidate_instances="never")
+    
     depth: Literal["quick", "standard", "deep"] = Field(
         default="standard",
         description="Analysis depth - affects LLM calls and detail level"
@@ -57,18 +68,15 @@ class AnalysisConfig(BaseModel):
     )
     max_tokens: int = Field(
         default=4000,
+        gt=0,
         description="Max tokens per agent response"
     )
     temperature: float = Field(
         default=0.3,
+        ge=0.0,
+        le=1.0,
         description="LLM temperature (0.0-1.0)"
     )
-    
-    @validator('temperature')
-    def validate_temperature(cls, v):
-        if not 0.0 <= v <= 1.0:
-            raise ValueError("Temperature must be between 0.0 and 1.0")
-        return v
 
 
 # Predefined templates
@@ -146,6 +154,18 @@ TEMPLATES = {
     }
 }
 
+# Validated once at import; configs are frozen, so apply_template can share these
+_TEMPLATE_CACHE: Dict[str, AnalysisConfig] = {
+    tid: AnalysisConfig.model_validate({**data, "template_id": tid}) for tid, data in TEMPLATES.items()
+}
+
+# Shared default for projects without a saved config (no validation per lookup)
+_DEFAULT_CONFIG = AnalysisConfig()
+
+
+# project_id -> (file mtime_ns, parsed config); configs are frozen so sharing is safe
+_CONFIG_CACHE: Dict[str, Tuple[int, AnalysisConfig]] = {}
+
 
 def load_config(project_id: str) -> AnalysisConfig:
     """
@@ -160,13 +180,20 @@ def load_config(project_id: str) -> AnalysisConfig:
     """
     config_path = Path(f"data/projects/{project_id}/analysis_config.json")
     
-    if config_path.exists():
-        with open(config_path, 'r') as f:
-            config_data = json.load(f)
-        return AnalysisConfig(**config_data)
-    else:
+    try:
+        mtime = config_path.stat().st_mtime_ns
+    except FileNotFoundError:
         # Return default config
-        return AnalysisConfig()
+        return _DEFAULT_CONFIG
+    
+    cached = _CONFIG_CACHE.get(project_id)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    # Let pydantic-core parse the JSON directly instead of building an intermediate dict
+    config = AnalysisConfig.model_validate_json(config_path.read_bytes())
+    _CONFIG_CACHE[project_id] = (mtime, config)
+    return config
 
 
 def save_config(project_id: str, config: AnalysisConfig) -> None:
@@ -180,8 +207,9 @@ def save_config(project_id: str, config: AnalysisConfig) -> None:
     config_path = Path(f"data/projects/{project_id}/analysis_config.json")
     config_path.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(config_path, 'w') as f:
-        f.write(config.model_dump_json(indent=2))
+    with open(config_path, 'wb', buffering=1 << 16) as f:
+        f.write(config.model_dump_json(indent=2).encode("utf-8"))
+    _CONFIG_CACHE.pop(project_id, None)
 
 
 def apply_template(template_id: str) -> AnalysisConfig:
@@ -197,14 +225,13 @@ def apply_template(template_id: str) -> AnalysisConfig:
     Raises:
         ValueError: If template_id not found
     """
-    if template_id not in TEMPLATES:
+    if template_id not in _TEMPLATE_CACHE:
         raise ValueError(
             f"Template '{template_id}' not found. "
             f"Available: {list(TEMPLATES.keys())}"
         )
     
-    template_data = TEMPLATES[template_id]
-    return AnalysisConfig(**template_data, template_id=template_id)
+    return _TEMPLATE_CACHE[template_id]
 
 
 def validate_config(config: AnalysisConfig) -> tuple[bool, Optional[str]]:
@@ -221,8 +248,7 @@ def validate_config(config: AnalysisConfig) -> tuple[bool, Optional[str]]:
         # Pydantic already validates on construction, but we can add custom checks
         
         # Check if at least one feature is enabled
-        features = config.features_enabled
-        if not any([features.structure, features.api_db, features.best_practices, features.pm_insights]):
+        if not config.features_enabled.any_enabled:
             return False, "At least one feature must be enabled"
         
         # Check diagram preferences
@@ -239,7 +265,36 @@ def validate_config(config: AnalysisConfig) -> tuple[bool, Optional[str]]:
         return False, f"Validation error: {str(e)}"
 
 
-def get_depth_parameters(depth: str) -> Dict:
+# Read-only lookup tables shared by every caller; copy with dict(...) before mutating
+_DEPTH_PARAMS = MappingProxyType({
+    "quick": MappingProxyType({
+        "chunk_limit": 10,
+        "detail_level": "high-level overview",
+        "retrieval_k": 3,
+        "max_iterations": 2
+    }),
+    "standard": MappingProxyType({
+        "chunk_limit": 25,
+        "detail_level": "detailed analysis",
+        "retrieval_k": 5,
+        "max_iterations": 3
+    }),
+    "deep": MappingProxyType({
+        "chunk_limit": 50,
+        "detail_level": "comprehensive deep-dive",
+        "retrieval_k": 10,
+        "max_iterations": 5
+    })
+})
+
+_VERBOSITY_INSTRUCTIONS = MappingProxyType({
+    "low": "Be concise. Use bullet points. Limit explanations to 1-2 sentences.",
+    "medium": "Provide clear explanations. Balance brevity with completeness.",
+    "high": "Provide detailed explanations, examples, and context. Be thorough."
+})
+
+
+def get_depth_parameters(depth: str) -> Mapping:
     """
     Get LLM parameters based on analysis depth.
     
@@ -247,30 +302,9 @@ def get_depth_parameters(depth: str) -> Dict:
         depth: Analysis depth level
         
     Returns:
-        Dict with chunk_limit, detail_level, retrieval_k
+        Read-only mapping with chunk_limit, detail_level, retrieval_k
     """
-    params = {
-        "quick": {
-            "chunk_limit": 10,
-            "detail_level": "high-level overview",
-            "retrieval_k": 3,
-            "max_iterations": 2
-        },
-        "standard": {
-            "chunk_limit": 25,
-            "detail_level": "detailed analysis",
-            "retrieval_k": 5,
-            "max_iterations": 3
-        },
-        "deep": {
-            "chunk_limit": 50,
-            "detail_level": "comprehensive deep-dive",
-            "retrieval_k": 10,
-            "max_iterations": 5
-        }
-    }
-    
-    return params.get(depth, params["standard"])
+    return _DEPTH_PARAMS.get(depth, _DEPTH_PARAMS["standard"])
 
 
 def get_verbosity_instructions(verbosity: str) -> str:
@@ -283,13 +317,7 @@ def get_verbosity_instructions(verbosity: str) -> str:
     Returns:
         String instructions for LLM prompts
     """
-    instructions = {
-        "low": "Be concise. Use bullet points. Limit explanations to 1-2 sentences.",
-        "medium": "Provide clear explanations. Balance brevity with completeness.",
-        "high": "Provide detailed explanations, examples, and context. Be thorough."
-    }
-    
-    return instructions.get(verbosity, instructions["medium"])
+    return _VERBOSITY_INSTRUCTIONS.get(verbosity, _VERBOSITY_INSTRUCTIONS["medium"])
 
 
 # Example usage
@@ -308,4 +336,4 @@ if __name__ == "__main__":
     
     # Get depth parameters
     params = get_depth_parameters("deep")
-    print(f"\nDeep analysis params: {params}")
+    print(f"\nDeep analysis params: {dict(params)}")
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey
+from sqlalchemy import create_engine, event, Column, Integer, String, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import relationship
@@ -18,6 +18,18 @@ _DB_PATH = str((_DATA_DIR / "app.db").resolve()).replace("\\", "/")
 DATABASE_URL = f"sqlite:///{_DB_PATH}"
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers proceed during writes; mmap/cache keep hot pages out of read() calls
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
@@ -31,7 +43,7 @@ class User(Base):
 class Project(Base):
     __tablename__ = "projects"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"))
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), index=True)
     name = Column(String, index=True)
     github_url = Column(String, nullable=True)
     zip_filename = Column(String, nullable=True)
@@ -41,7 +53,17 @@ class Project(Base):
 
     user = relationship("User", back_populates="projects")
 
+    __table_args__ = (
+        # Covers the admin project list so it can be served from the index alone
+        Index("ix_project_admin_list", "id", "user_id", "name", "zip_filename"),
+        # Per-user project listing: WHERE user_id = ? ORDER BY name
+        Index("ix_project_user_name", "user_id", "name"),
+    )
+
 Base.metadata.create_all(bind=engine)
+# create_all only adds indexes with new tables; make sure existing databases get them too
+for _index in Project.__table__.indexes:
+    _index.create(bind=engine, checkfirst=True)
 
 def get_db():
     db = SessionLocal()
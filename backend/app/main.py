@@ -1,8 +1,24 @@
 from fastapi import FastAPI, HTTPException, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pathlib import Path
 from dotenv import load_dotenv
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+import asyncio
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import re
 import sys
+import threading
+import time
+import traceback
+import orjson
 
 ROOT = Path(__file__).parent
 load_dotenv(ROOT.parent.parent / ".env")  # Load .env from project root
@@ -11,11 +27,34 @@ sys.path.insert(0, str(ROOT))               # backend/app/ — for auth, project
 sys.path.insert(0, str(ROOT / "repo-processing"))  # for pipeline, embeddings
 sys.path.insert(0, str(ROOT.parent))        # backend/ — for app.xxx imports
 
+# Records from app.* loggers are queued and written by a listener thread, so
+# analysis tasks on the event loop never wait on console I/O
+_log_queue = queue.SimpleQueue()
+_log_console = logging.StreamHandler(sys.stdout)
+_log_console.setFormatter(logging.Formatter("%(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_console)
+_log_listener.start()
+atexit.register(_log_listener.stop)  # drain queued records on shutdown
+_app_logger = logging.getLogger("app")
+_app_logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_app_logger.setLevel(logging.INFO)
+_app_logger.propagate = False
+
 import auth
 import projects
 import admin
 
-app = FastAPI(title="RepoResearchAI", description="AI-powered repository analysis")
+# Heavy pipeline/agent modules are imported once at startup rather than inside each job,
+# so concurrent jobs don't contend on the import lock
+from pipeline import process_repository_for_graphflow
+from app.teams.graphflow_team import GraphFlowCoordinator, load_json_file
+from app.config.analysis_config import AnalysisConfig, FeaturesEnabled
+
+app = FastAPI(
+    title="RepoResearchAI",
+    description="AI-powered repository analysis",
+    default_response_class=ORJSONResponse,  # orjson encodes the large report payloads much faster
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,11 +64,285 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+
+class LRUStore(OrderedDict):
+    """
+    Dict with a size cap that evicts the least recently used project.
+    
+    Shared between request handlers, preprocessing threads and analysis tasks,
+    so every access goes through a lock. on_change, if given, is called with the
+    key after every write. Values for which pinned(value) is true are never
+    evicted, so the store may grow past max_entries while they last.
+    """
+    
+    def __init__(self, max_entries: int, on_change: Optional[Callable[[str], None]] = None,
+                 pinned: Optional[Callable[[Any], bool]] = None):
+        super().__init__()
+        self.max_entries = max_entries
+        self.on_change = on_change
+        self.pinned = pinned
+        self._lock = threading.RLock()
+    
+    def __getitem__(self, key):
+        with self._lock:
+            value = super().__getitem__(key)
+            self.move_to_end(key)
+            return value
+    
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+            self.move_to_end(key)
+            if len(self) > self.max_entries:
+                self._evict(keep=key)
+        if self.on_change is not None:
+            self.on_change(key)
+    
+    def _evict(self, keep):
+        """Drop least recently used entries until back at the cap, skipping pinned ones and keep"""
+        excess = len(self) - self.max_entries
+        for old_key in list(self.keys()):
+            if excess <= 0:
+                break
+            if old_key == keep or (self.pinned is not None and self.pinned(super().__getitem__(old_key))):
+                continue
+            super().__delitem__(old_key)
+            excess -= 1
+    
+    def __delitem__(self, key):
+        with self._lock:
+            super().__delitem__(key)
+    
+    def __contains__(self, key):
+        with self._lock:
+            return super().__contains__(key)
+    
+    def get(self, key, default=None):
+        with self._lock:
+            return self[key] if super().__contains__(key) else default
+    
+    def pop(self, key, *default):
+        with self._lock:
+            return super().pop(key, *default)
+    
+    def clear(self):
+        with self._lock:
+            super().clear()
+    
+    # Event-loop variants shared with RedisStatusStore; in memory they need no thread
+    async def aget(self, key, default=None):
+        return self.get(key, default)
+    
+    async def aset(self, key, value):
+        self[key] = value
+    
+    def set_nowait(self, key, value):
+        self[key] = value
+
+
+class RedisStatusStore:
+    """
+    Status store backed by Redis so every uvicorn worker sees the same job state.
+    
+    Same interface as LRUStore; values are JSON dicts stored with a TTL, so
+    abandoned jobs expire instead of accumulating. Reads return a fresh copy,
+    so callers must write a modified status back.
+    
+    The client is synchronous: code on the event loop uses aget/aset/set_nowait,
+    which run the round-trip on the store's own single thread (so writes stay
+    in order), while preprocessing threads use the plain dict interface.
+    """
+    
+    def __init__(self, client, prefix: str, ttl_seconds: int = 3600,
+                 on_change: Optional[Callable[[str], None]] = None):
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.on_change = on_change
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{prefix}-redis")
+    
+    def _key(self, key) -> str:
+        return f"{self.prefix}:{key}"
+    
+    def __getitem__(self, key):
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            raise KeyError(key)
+        return orjson.loads(raw)
+    
+    def __setitem__(self, key, value):
+        self._store(key, orjson.dumps(value))
+    
+    def _store(self, key, raw: bytes):
+        self.client.setex(self._key(key), self.ttl_seconds, raw)
+        if self.on_change is not None:
+            self.on_change(key)
+    
+    def __delitem__(self, key):
+        if not self.client.delete(self._key(key)):
+            raise KeyError(key)
+    
+    def __contains__(self, key):
+        return bool(self.client.exists(self._key(key)))
+    
+    def get(self, key, default=None):
+        raw = self.client.get(self._key(key))
+        return default if raw is None else orjson.loads(raw)
+    
+    def pop(self, key, *default):
+        raw = self.client.getdel(self._key(key))
+        if raw is None:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        return orjson.loads(raw)
+    
+    async def aget(self, key, default=None):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.get, key, default)
+    
+    async def aset(self, key, value):
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._store, key, orjson.dumps(value))
+    
+    def set_nowait(self, key, value):
+        """Queue a write without waiting for Redis; the value is serialized right away"""
+        future = self._executor.submit(self._store, key, orjson.dumps(value))
+        future.add_done_callback(_report_failed_status_write)
+
+
+def _report_failed_status_write(future):
+    if future.exception() is not None:
+        print(f"[status] Failed to write job status to Redis: {future.exception()}")
+
+
+class StatusWatchers:
+    """
+    Wakes /events streams when a project's status is written, so they don't poll.
+    
+    Writes come from preprocessing threads as well as the event loop, so each
+    watcher is woken through its own loop's call_soon_threadsafe.
+    """
+    
+    def __init__(self):
+        self._watchers = {}  # project_id -> set of (loop, asyncio.Event)
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def watch(self, project_id: str):
+        """Register an Event that gets set on every status write for the project"""
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._watchers.setdefault(project_id, set()).add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                watchers = self._watchers.get(project_id)
+                watchers.discard(entry)
+                if not watchers:
+                    del self._watchers[project_id]
+    
+    def notify(self, project_id: str):
+        with self._lock:
+            watchers = list(self._watchers.get(project_id, ()))
+        for loop, changed in watchers:
+            loop.call_soon_threadsafe(changed.set)
+    
+    def notify_all(self):
+        with self._lock:
+            watchers = [entry for entries in self._watchers.values() for entry in entries]
+        for loop, changed in watchers:
+            loop.call_soon_threadsafe(changed.set)
+
+
 # Use absolute path to avoid issues when running from different directories
 BASE_DATA_DIR = ROOT / "data" / "projects"
 BASE_DATA_DIR.mkdir(parents=True, exist_ok=True)
-preprocess_status = {}  # Track preprocessing progress
-analysis_status = {}    # Track analysis progress
+
+# With REDIS_URL set, job status is shared across workers (uvicorn --workers N);
+# otherwise it stays in this process
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_INVALIDATE_CHANNEL = "reporesearch:cache_invalidate"
+STATUS_CHANGED_CHANNEL = "reporesearch:status_changed"
+WORKER_MESSAGES_RETRY_MIN = 1.0   # seconds before resubscribing after a dropped connection,
+WORKER_MESSAGES_RETRY_MAX = 30.0  # doubling up to this
+redis_client = None
+status_watchers = StatusWatchers()
+
+
+def _job_running(status: dict) -> bool:
+    """Status entries of running jobs are pinned: evicting one would drop its progress"""
+    return status.get("status") == "running"
+
+
+def _status_changed(project_id: str):
+    """Wake the project's /events streams; with Redis, on every worker (this one included)"""
+    if redis_client is not None:
+        redis_client.publish(STATUS_CHANGED_CHANNEL, project_id)
+    else:
+        status_watchers.notify(project_id)
+
+
+if REDIS_URL:
+    import redis
+    redis_client = redis.Redis.from_url(REDIS_URL)
+    preprocess_status = RedisStatusStore(redis_client, "preprocess_status", on_change=_status_changed)  # Track preprocessing progress
+    analysis_status = RedisStatusStore(redis_client, "analysis_status", on_change=_status_changed)      # Track analysis progress
+else:
+    preprocess_status = LRUStore(max_entries=128, on_change=_status_changed, pinned=_job_running)  # Track preprocessing progress
+    analysis_status = LRUStore(max_entries=128, on_change=_status_changed, pinned=_job_running)    # Track analysis progress
+
+
+def _drop_local_project_caches(project_id: str) -> bool:
+    """Forget this worker's cached vector store, retriever and context for a project"""
+    retriever_cache.pop(project_id, None)
+    last_context_cache.pop(project_id, None)
+    return vector_store_cache.pop(project_id, None) is not None
+
+
+def invalidate_project_caches(project_id: str) -> bool:
+    """Drop a project's cached vector store here and, with Redis, on every other worker"""
+    dropped = _drop_local_project_caches(project_id)
+    if redis_client is not None:
+        redis_client.publish(CACHE_INVALIDATE_CHANNEL, project_id)
+    return dropped
+
+
+def _listen_for_worker_messages():
+    """Apply other workers' cache invalidations and status wake-ups; resubscribes if Redis drops"""
+    delay = WORKER_MESSAGES_RETRY_MIN
+    reconnecting = False
+    while True:
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CACHE_INVALIDATE_CHANNEL, STATUS_CHANGED_CHANNEL)
+            if reconnecting:
+                # Messages sent while disconnected are lost: drop every local project cache
+                # and wake every /events stream so nothing stays stale
+                for cache in (retriever_cache, last_context_cache, vector_store_cache):
+                    cache.clear()
+                status_watchers.notify_all()
+            delay = WORKER_MESSAGES_RETRY_MIN
+            for message in pubsub.listen():
+                project_id = message["data"].decode()
+                if message["channel"].decode() == STATUS_CHANGED_CHANNEL:
+                    status_watchers.notify(project_id)
+                else:
+                    _drop_local_project_caches(project_id)
+        except Exception as e:
+            print(f"[redis] Worker message listener failed ({type(e).__name__}: {e}); resubscribing in {delay:.0f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, WORKER_MESSAGES_RETRY_MAX)
+            reconnecting = True
+
+
+if redis_client is not None:
+    threading.Thread(target=_listen_for_worker_messages, name="worker-messages", daemon=True).start()
+
+# Bounded worker pool for clone/extract/embed so a burst of preprocess requests queues
+# instead of spawning one thread each. Threads (not processes) keep preprocess_status shared.
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", max(2, (os.cpu_count() or 2) - 1)))
+preprocess_pool = ThreadPoolExecutor(max_workers=PREPROCESS_WORKERS, thread_name_prefix="preprocess")
 
 app.include_router(auth.router)
 app.include_router(projects.router)
@@ -37,7 +350,6 @@ app.include_router(admin.router)
 
 
 def run_preprocessing(project_id: str, file_path: str):
-    from pipeline import process_repository_for_graphflow
     preprocess_status[project_id] = {"status": "running", "current_step": "Starting preprocessing..."}
     try:
         def update_step(msg):
@@ -50,13 +362,12 @@ def run_preprocessing(project_id: str, file_path: str):
             update_step("Extracting ZIP file...")
         
         process_repository_for_graphflow(file_path, project_id=project_id, status_callback=update_step)
-        preprocess_status[project_id] = {"status": "completed", "current_step": "Preprocessing complete"}
         
-        # Clear vector store cache to force reload with new data
-        if project_id in vector_store_cache:
-            del vector_store_cache[project_id]
+        # Clear vector store cache (on every worker) to force reload with new data,
+        # before "completed" lets clients query the project again
+        invalidate_project_caches(project_id)
+        preprocess_status[project_id] = {"status": "completed", "current_step": "Preprocessing complete"}
     except Exception as e:
-        import traceback
         error_msg = f"{str(e)}\n{traceback.format_exc()}"
         # User-friendly error messages
         if "Failed to clone repository" in str(e):
@@ -75,7 +386,6 @@ def run_preprocessing(project_id: str, file_path: str):
 @app.post("/projects/{project_id}/preprocess")
 async def preprocess_project(project_id: str):
     from db import SessionLocal, Project
-    from threading import Thread
     
     with SessionLocal() as db:
         project = db.query(Project).filter(Project.id == int(project_id)).first()
@@ -97,40 +407,36 @@ async def preprocess_project(project_id: str):
                     detail=f"Uploaded file not found at: {file_path}. Please re-upload the project."
                 )
     
-    Thread(target=run_preprocessing, args=(project_id, file_path), daemon=True).start()
+    await preprocess_status.aset(project_id, {"status": "running", "current_step": "Queued for preprocessing..."})
+    preprocess_pool.submit(run_preprocessing, project_id, file_path)
     return {"status": "started"}
 
 @app.get("/projects/{project_id}/preprocess/status")
 async def get_preprocess_status(project_id: str):
     # Return not_started instead of 404 to avoid errors in frontend
-    if project_id not in preprocess_status:
+    status = await preprocess_status.aget(project_id)
+    if status is None:
         return {"status": "not_started", "current_step": "Not started"}
-    return preprocess_status[project_id]
+    return status
 
 
 async def run_graphflow_analysis(project_id: str, personas: str = "SDE,PM", depth: str = "standard", verbosity: str = "medium"):
-    import json
-    import traceback
-
+    # This task is the only writer while the analysis runs, so progress goes into the
+    # status start_analysis created, read once, instead of a store read per update
+    status = await analysis_status.aget(project_id)
+    
     def _update(activity: str, progress: int, insight: str = None):
-        if project_id in analysis_status:
-            analysis_status[project_id]["current_activity"] = activity
-            analysis_status[project_id]["progress"] = progress
-            analysis_status[project_id]["logs"].append(f"[{progress}%] {activity}")
+        if status is not None:
+            status["current_activity"] = activity
+            status["progress"] = progress
+            status["logs"].append(f"[{progress}%] {activity}")
             if insight:
-                analysis_status[project_id]["agent_insights"][activity] = insight
+                status["agent_insights"][activity] = insight
+            # Write back so a shared (Redis) store sees the change; the status callback
+            # is synchronous, so the write is queued rather than awaited
+            analysis_status.set_nowait(project_id, status)
 
     print(f"[analysis] Starting for project {project_id} | personas={personas} depth={depth} verbosity={verbosity}")
-    _update("Importing modules...", 2)
-
-    try:
-        from app.teams.graphflow_team import GraphFlowCoordinator
-        from app.config.analysis_config import AnalysisConfig, FeaturesEnabled
-    except Exception as e:
-        msg = f"Import error: {e}\n{traceback.format_exc()}"
-        print(f"[analysis] {msg}")
-        analysis_status[project_id] = {"status": "failed", "error": msg}
-        return
 
     try:
         personas_list = [p.strip() for p in personas.split(",")]
@@ -160,33 +466,34 @@ async def run_graphflow_analysis(project_id: str, personas: str = "SDE,PM", dept
         if not result.success:
             error_detail = "; ".join(result.errors) if result.errors else "Unknown agent error"
             print(f"[analysis] Pipeline returned success=False: {error_detail}")
-            analysis_status[project_id] = {"status": "failed", "error": error_detail}
+            await analysis_status.aset(project_id, {"status": "failed", "error": error_detail})
             return
 
         result_data = {
             "config": {"personas": personas, "depth": depth, "verbosity": verbosity},
-            "sde_report": result.sde_report.model_dump() if result.sde_report and "SDE" in personas_list else None,
-            "pm_report": result.pm_report.model_dump() if result.pm_report and "PM" in personas_list else None,
+            # agent_results already holds each report dumped once when it was validated
+            "sde_report": result.agent_results.get("sde") if "SDE" in personas_list else None,
+            "pm_report": result.agent_results.get("pm") if "PM" in personas_list else None,
             "time": result.execution_time_seconds,
         }
 
         # Save to file
         project_dir = BASE_DATA_DIR / project_id
         project_dir.mkdir(parents=True, exist_ok=True)
-        with open(project_dir / "analysis_result.json", "w") as f:
-            json.dump(result_data, f, indent=2)
+        with open(project_dir / "analysis_result.json", "wb", buffering=1 << 16) as f:
+            f.write(orjson.dumps(result_data, option=orjson.OPT_INDENT_2))
 
-        analysis_status[project_id] = {
+        await analysis_status.aset(project_id, {
             "status": "completed",
             "result": result_data,
-        }
+        })
         print(f"[analysis] Saved results for {project_id}")
 
     except Exception as e:
         msg = f"{type(e).__name__}: {e}"
         print(f"[analysis] FAILED: {msg}")
         traceback.print_exc()
-        analysis_status[project_id] = {"status": "failed", "error": msg}
+        await analysis_status.aset(project_id, {"status": "failed", "error": msg})
 
 
 @app.post("/projects/{project_id}/analyze/graphflow")
@@ -203,17 +510,16 @@ async def start_analysis(
         raise HTTPException(status_code=400, detail="vector_store not found - run preprocessing first")
     
     # Initialize status IMMEDIATELY to prevent race condition with status polling
-    analysis_status[project_id] = {
+    await analysis_status.aset(project_id, {
         "status": "running",
         "progress": 0,
         "current_activity": "Starting analysis...",
         "logs": ["Analysis queued"],
         "agent_insights": {},
         "paused": False
-    }
+    })
     
     # Start analysis task
-    import asyncio
     asyncio.create_task(run_graphflow_analysis(project_id, personas, depth, verbosity))
     
     return {"status": "started", "config": {"personas": personas, "depth": depth, "verbosity": verbosity}}
@@ -226,17 +532,16 @@ async def health():
 
 @app.get("/projects/{project_id}/status")
 async def get_status(project_id: str):
-    import json
     # Return in-memory status if available
-    if project_id in analysis_status:
-        return analysis_status[project_id]
+    status = await analysis_status.aget(project_id)
+    if status is not None:
+        return status
 
     # Fallback: check if result file exists on disk (e.g. after server restart)
     result_file = BASE_DATA_DIR / project_id / "analysis_result.json"
     if result_file.exists():
         try:
-            with open(result_file, "r") as f:
-                result_data = json.load(f)
+            result_data = load_json_file(result_file)
             return {"status": "completed", "result": result_data}
         except Exception:
             pass
@@ -244,18 +549,143 @@ async def get_status(project_id: str):
     return {"status": "not_started"}
 
 
+@app.get("/projects/{project_id}/full_status")
+async def get_full_status(project_id: str):
+    """Preprocessing and analysis status in one response (the frontend polls both)"""
+    return {
+        "preprocess": await get_preprocess_status(project_id),
+        "analysis": await get_status(project_id),
+    }
+
+
+# /events: longest wait for a status change before sending a keepalive comment line,
+# so clients and proxies keep an idle stream open (changes themselves wake it at once)
+STATUS_EVENTS_KEEPALIVE_SECONDS = 5.0
+
+# Server-sent event responses must reach the client unbuffered and uncached
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def _status_event(project_id: str) -> dict:
+    """The preprocess/analysis status fields the frontend displays (no logs or results)"""
+    preprocess = await preprocess_status.aget(project_id) or {"status": "not_started"}
+    analysis = await analysis_status.aget(project_id)
+    if analysis is None:
+        # Same fallback as /status: a result on disk means a finished analysis
+        done = (BASE_DATA_DIR / project_id / "analysis_result.json").exists()
+        analysis = {"status": "completed" if done else "not_started"}
+    return {
+        "preprocess": {key: preprocess.get(key) for key in ("status", "current_step", "error")},
+        "analysis": {key: analysis.get(key) for key in ("status", "progress", "current_activity", "error")},
+    }
+
+
+@app.get("/projects/{project_id}/events")
+async def status_events(project_id: str):
+    """
+    Server-sent events with the project's status, sent only when it changes.
+    
+    Pushed as the status stores are written (see StatusWatchers) rather than
+    polled. The stream ends once neither preprocessing nor analysis is running,
+    after sending that final state.
+    """
+    async def event_stream():
+        last_event = None
+        with status_watchers.watch(project_id) as changed:
+            while True:
+                # Cleared before reading, so a write from here on wakes the wait below
+                changed.clear()
+                event = await _status_event(project_id)
+                if event != last_event:
+                    yield b"data: " + orjson.dumps(event) + b"\n\n"
+                    last_event = event
+                if event["preprocess"]["status"] != "running" and event["analysis"]["status"] != "running":
+                    return
+                try:
+                    await asyncio.wait_for(changed.wait(), STATUS_EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
 
 # LangChain imports for conversational AI (v1.0.x)
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage
 
 # Performance optimization: Cache vector stores and LLM instances
-project_chat_histories = {}  # Store per-project chat history (list of messages)
-vector_store_cache = {}  # Cache loaded vector stores (key: project_id)
+project_chat_histories = LRUStore(max_entries=64)  # Per-project chat history as prompt-ready (role, truncated text) tuples
+HISTORY_SNIPPET_CHARS = 150  # How much of each past message is replayed into the prompt
+vector_store_cache = LRUStore(max_entries=16)  # Cache loaded vector stores (key: project_id); indexes are large
+retriever_cache = LRUStore(max_entries=16)  # Retriever wrapping each cached vector store
+last_context_cache = LRUStore(max_entries=64)  # Code context of each project's previous question
+# Short chit-chat follow-ups that don't need a fresh vector search
+TRIVIAL_QUESTION_RE = re.compile(r"^\s*(thanks?|thank you|thx|ok|okay|got it|cool|nice|hi|hello|rephrase|repeat|shorter|longer)\W*$", re.I)
+analysis_context_cache = LRUStore(max_entries=64)  # project_id -> (analysis_result.json mtime_ns, prompt summary)
 llm_instance = None  # Reuse single LLM instance across requests
 
+def _load_analysis_context(project_id: str, analysis_file: Path) -> str:
+    """Build the chat prompt's analysis summary, reusing it while analysis_result.json is unchanged."""
+    try:
+        mtime = analysis_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        return ""
+    
+    cached = analysis_context_cache.get(project_id)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    analysis_context = ""
+    try:
+        analysis_data = load_json_file(analysis_file)
+        
+        # Extract relevant parts of analysis
+        sde_report = analysis_data.get('sde_report', {})
+        if sde_report:
+            arch_summary = sde_report.get('architecture_summary', '')
+            components = sde_report.get('components', [])
+            apis = sde_report.get('apis', [])
+            db_model = sde_report.get('database_model', '')
+            
+            analysis_context = f"""
+Analysis Summary:
+Architecture: {arch_summary[:300]}
+
+Components: {', '.join([c.get('name', '') for c in components[:5]])}
+
+APIs: {', '.join([f"{a.get('method', '')} {a.get('endpoint', '')}" for a in apis[:5]])}
+
+Database: {db_model[:200]}
+"""
+    except:
+        pass
+    
+    analysis_context_cache[project_id] = (mtime, analysis_context)
+    return analysis_context
+
+
+def _doc_source(metadata: dict) -> str:
+    """Source path of a retrieved chunk, falling back to 'file' only when 'source' is missing"""
+    source = metadata.get('source')
+    if source is not None:
+        return source
+    return metadata.get('file', 'unknown')
+
+
+def _remember_exchange(project_id: str, question: str, answer: str):
+    """Append a Q/A pair to the project's chat history (keep last 12 messages), truncated once here rather than per prompt"""
+    history = project_chat_histories[project_id]
+    history.append(("human", question[:HISTORY_SNIPPET_CHARS]))
+    history.append(("ai", answer[:HISTORY_SNIPPET_CHARS]))
+    if len(history) > 12:
+        project_chat_histories[project_id] = history[-12:]
+
+
 @app.post("/projects/{project_id}/ask")
-async def ask(project_id: str, question: str = Form(...)):
+async def ask(project_id: str, question: str = Form(...), stream: bool = False):
     from embeddings import load_vector_store
     import os
     import time
@@ -282,55 +712,39 @@ async def ask(project_id: str, question: str = Form(...)):
             from langchain_openai import ChatOpenAI as LLM
             llm_instance = LLM(model="gpt-4o-mini", temperature=0.3)
         
-        # Retrieve relevant documents (top 3 for better context)
-        retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
-        docs = retriever.invoke(question)
-        
-        # Build context from documents with better formatting
-        context_parts = []
-        for i, doc in enumerate(docs, 1):
-            source = doc.metadata.get('source', 'unknown')
-            content = doc.page_content[:1500]  # Increased from 1200
-            context_parts.append(f"[Source {i}: {source}]\n{content}")
-        
-        context = "\n\n".join(context_parts)
+        # Trivial follow-ups ("thanks", "shorter") reuse the previous context instead of searching again
+        previous_context = last_context_cache.get(project_id)
+        if previous_context is not None and len(question) < 20 and TRIVIAL_QUESTION_RE.match(question):
+            docs = []
+            context = previous_context
+        else:
+            # Retrieve relevant documents (top 3 for better context)
+            retriever = retriever_cache.get(project_id)
+            if retriever is None:
+                retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
+                retriever_cache[project_id] = retriever
+            docs = await retriever.ainvoke(question)
+            
+            # Build context from documents with better formatting
+            context_parts = []
+            for i, doc in enumerate(docs, 1):
+                source = doc.metadata.get('source', 'unknown')
+                content = doc.page_content[:1500]  # Increased from 1200
+                context_parts.append(f"[Source {i}: {source}]\n{content}")
+            
+            context = "\n\n".join(context_parts)
+            last_context_cache[project_id] = context
         
         # Load analysis results if available to enrich context
-        analysis_context = ""
         analysis_file = project_dir / "analysis_result.json"
         using_partial = False
         
-        # First check for completed analysis
-        if analysis_file.exists():
-            try:
-                import json
-                with open(analysis_file, 'r', encoding='utf-8') as f:
-                    analysis_data = json.load(f)
-                    
-                # Extract relevant parts of analysis
-                sde_report = analysis_data.get('sde_report', {})
-                if sde_report:
-                    arch_summary = sde_report.get('architecture_summary', '')
-                    components = sde_report.get('components', [])
-                    apis = sde_report.get('apis', [])
-                    db_model = sde_report.get('database_model', '')
-                    
-                    analysis_context = f"""
-Analysis Summary:
-Architecture: {arch_summary[:300]}
-
-Components: {', '.join([c.get('name', '') for c in components[:5]])}
-
-APIs: {', '.join([f"{a.get('method', '')} {a.get('endpoint', '')}" for a in apis[:5]])}
-
-Database: {db_model[:200]}
-"""
-            except:
-                pass
+        # First check for completed analysis (parsed summary cached until the file changes)
+        analysis_context = _load_analysis_context(project_id, analysis_file)
         
         # If no complete analysis, check for partial agent insights (during analysis)
-        if not analysis_context and project_id in analysis_status:
-            status_data = analysis_status[project_id]
+        status_data = None if analysis_context else await analysis_status.aget(project_id)
+        if status_data is not None:
             if status_data.get("status") == "running":
                 agent_insights = status_data.get("agent_insights", {})
                 if agent_insights:
@@ -358,37 +772,54 @@ Partial Analysis (In Progress):
 
 Keep answers brief and specific."""
         
-        messages = [("system", system_prompt)]
+        # Recent chat history is stored pre-truncated, so the prompt is built in one list display
+        messages = [("system", system_prompt), *chat_history, ("human", question)]
         
-        # Add recent chat history (truncated)
-        for msg in chat_history:
-            if isinstance(msg, HumanMessage):
-                messages.append(("human", str(msg.content)[:150]))
-            elif isinstance(msg, AIMessage):
-                messages.append(("ai", str(msg.content)[:150]))
+        # Chunks of the same file collapse into one citation, keeping retrieval order
+        sources = list(dict.fromkeys(_doc_source(doc.metadata) for doc in docs))
         
-        messages.append(("human", question))
+        # ?stream=true sends server-sent events: {"token": ...} per chunk as it arrives, then
+        # {"done": true, ...} with the JSON response's metadata; default stays the JSON response
+        if stream:
+            async def token_stream():
+                parts = []
+                try:
+                    async for chunk in llm_instance.astream(messages):
+                        text = chunk.content
+                        if text:
+                            parts.append(text)
+                            yield b"data: " + orjson.dumps({"token": text}) + b"\n\n"
+                except Exception as e:
+                    # Headers are already sent, so the failure travels as an event
+                    print(f"❌ Error: {str(e)}")
+                    yield b"data: " + orjson.dumps({"error": str(e)}) + b"\n\n"
+                    return
+                _remember_exchange(project_id, question, "".join(parts))
+                yield b"data: " + orjson.dumps({
+                    "done": True,
+                    "sources": sources,
+                    "time": round(time.time()-start, 2),
+                    "has_analysis": bool(analysis_context),
+                    "using_partial": using_partial
+                }) + b"\n\n"
+            
+            return StreamingResponse(token_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
         
-        # Generate response
-        response = llm_instance.invoke(messages)
+        # Generate response without blocking the event loop
+        response = await llm_instance.ainvoke(messages)
         answer = response.content
         
-        # Update chat history (keep last 12 messages)
-        project_chat_histories[project_id].append(HumanMessage(content=question))
-        project_chat_histories[project_id].append(AIMessage(content=answer))
-        if len(project_chat_histories[project_id]) > 12:
-            project_chat_histories[project_id] = project_chat_histories[project_id][-12:]
+        _remember_exchange(project_id, question, str(answer))
         
         return {
             "answer": answer,
-            "sources": [doc.metadata.get('source', doc.metadata.get('file', 'unknown')) for doc in docs],
+            "sources": sources,
             "time": round(time.time()-start, 2),
             "has_analysis": bool(analysis_context),
             "using_partial": using_partial
         }
         
     except Exception as e:
-        import traceback
         print(f"❌ Error: {str(e)}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
@@ -404,7 +835,7 @@ async def clear_chat_memory(project_id: str):
 @app.post("/projects/{project_id}/cache/clear")
 async def clear_cache(project_id: str):
     """Clear vector store cache for a project (use after reprocessing)"""
-    if project_id in vector_store_cache:
-        del vector_store_cache[project_id]
+    # With Redis the invalidation is also published, a blocking round-trip
+    if await asyncio.to_thread(invalidate_project_caches, project_id):
         return {"status": "cache_cleared"}
     return {"status": "no_cache"}
\ No newline at end of file
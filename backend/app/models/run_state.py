@@ -3,12 +3,15 @@ Analysis Run State Management
 Similar to ChatGPT Research - long-running sessions with pause/resume
 """
 
-from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Set, Tuple
 from datetime import datetime
 from enum import Enum
+import sys
 import uuid
 
+import orjson
+
 
 class RunStatus(str, Enum):
     """Analysis run status."""
@@ -18,7 +21,31 @@ class RunStatus(str, Enum):
     FAILED = "FAILED"
 
 
-class AgentStep(BaseModel):
+_now = datetime.now  # bound once; every timestamp in a run goes through it
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _format_datetime(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+# Agent pipeline as a DAG: agent -> agents whose output it consumes.
+# SDE and PM writers only need best practices, so they run side by side.
+AGENT_DEPENDENCIES: Dict[str, List[str]] = {
+    "coordinator_agent": [],
+    "semantic_query_agent": ["coordinator_agent"],
+    "best_practice_agent": ["semantic_query_agent"],
+    "sde_writer_agent": ["best_practice_agent"],
+    "pm_writer_agent": ["best_practice_agent"],
+    "qa_agent": ["sde_writer_agent", "pm_writer_agent"],
+}
+
+
+@dataclass(slots=True)
+class AgentStep:
     """Individual agent execution step."""
     agent_name: str
     status: str  # "pending", "running", "completed", "failed"
@@ -26,9 +53,43 @@ class AgentStep(BaseModel):
     completed_at: Optional[datetime] = None
     output: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    dependencies: List[str] = field(default_factory=list)  # agent_names that must complete first
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "agent_name": self.agent_name,
+            "status": self.status,
+            "dependencies": self.dependencies,
+            "started_at": _format_datetime(self.started_at),
+            "completed_at": _format_datetime(self.completed_at),
+            "output": self.output,
+            "error": self.error,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AgentStep":
+        # Interned: loaded runs would otherwise hold a fresh copy of each name/status
+        return cls(
+            agent_name=sys.intern(data["agent_name"]),
+            status=sys.intern(data["status"]),
+            started_at=_parse_datetime(data.get("started_at")),
+            completed_at=_parse_datetime(data.get("completed_at")),
+            output=data.get("output"),
+            error=data.get("error"),
+            dependencies=data.get("dependencies", AGENT_DEPENDENCIES.get(data["agent_name"], [])),
+        )
+
+
+# (agent_name, dependencies) pairs for a fresh run, flattened once at import
+_DEFAULT_STEP_TEMPLATES = tuple((name, tuple(deps)) for name, deps in AGENT_DEPENDENCIES.items())
 
 
-class AnalysisRun(BaseModel):
+def _default_steps() -> List[AgentStep]:
+    return [AgentStep(name, "pending", dependencies=list(deps)) for name, deps in _DEFAULT_STEP_TEMPLATES]
+
+
+@dataclass(slots=True, kw_only=True)
+class AnalysisRun:
     """
     Represents a single analysis run session.
     
@@ -37,10 +98,14 @@ class AnalysisRun(BaseModel):
     - Current progress
     - Intermediate outputs
     - User instructions/context
+    
+    Plain slotted dataclass: it is internal state mutated on every agent
+    transition, so it skips pydantic validation; to_dict/from_dict handle
+    the checkpoint file.
     """
     
     # Run identification
-    run_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    run_id: str = field(default_factory=lambda: str(uuid.uuid4()))
     project_id: str
     
     # Status tracking
@@ -50,104 +115,240 @@ class AnalysisRun(BaseModel):
     progress_percent: float = 0.0
     
     # Timestamps
-    started_at: datetime = Field(default_factory=datetime.now)
+    started_at: datetime = field(default_factory=_now)
     paused_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     
     # Agent pipeline
-    steps: List[AgentStep] = Field(default_factory=lambda: [
-        AgentStep(agent_name="coordinator_agent", status="pending"),
-        AgentStep(agent_name="semantic_query_agent", status="pending"),
-        AgentStep(agent_name="best_practice_agent", status="pending"),
-        AgentStep(agent_name="sde_writer_agent", status="pending"),
-        AgentStep(agent_name="pm_writer_agent", status="pending"),
-        AgentStep(agent_name="qa_agent", status="pending"),
-    ])
+    steps: List[AgentStep] = field(default_factory=_default_steps)
     
     # Intermediate outputs
-    intermediate_outputs: Dict[str, Any] = Field(default_factory=dict)
+    intermediate_outputs: Dict[str, Any] = field(default_factory=dict)
     
     # User interaction
-    user_instructions: List[str] = Field(default_factory=list)
-    user_questions: List[Dict[str, str]] = Field(default_factory=list)  # {question, answer, timestamp}
+    user_instructions: List[str] = field(default_factory=list)
+    user_questions: List[Dict[str, str]] = field(default_factory=list)  # {question, answer, timestamp}
     
     # Team state (for save/load)
     team_state: Optional[Dict[str, Any]] = None
-    message_thread: List[Dict[str, Any]] = Field(default_factory=list)
+    message_thread: List[Dict[str, Any]] = field(default_factory=list)
     
     # Configuration
-    config: Dict[str, Any] = Field(default_factory=dict)
+    config: Dict[str, Any] = field(default_factory=dict)
+    
+    # Derived state maintained by the mutators below, so polling get_summary is cheap
+    _completed_count: int = field(default=0, init=False, repr=False, compare=False)
+    _summary_cache: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    # Pretty-printed intermediate outputs, rendered on first use and dropped when a step's output changes
+    _rendered_outputs: Dict[str, str] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Step indices changed since the last checkpoint (every step starts unsaved)
+    _dirty_steps: Set[int] = field(default_factory=set, init=False, repr=False, compare=False)
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
+    def __post_init__(self):
+        self._completed_count = sum(1 for step in self.steps if step.status == "completed")
+        self._dirty_steps = set(range(len(self.steps)))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready dict (datetimes as ISO strings, status as its value)."""
+        data = self.header_dict()
+        data["steps"] = [step.to_dict() for step in self.steps]
+        data["intermediate_outputs"] = self.intermediate_outputs
+        return data
+    
+    def header_dict(self) -> Dict[str, Any]:
+        """to_dict() without the steps and their outputs (the per-run checkpoint row)."""
+        return {
+            "run_id": self.run_id,
+            "project_id": self.project_id,
+            "status": self.status.value,
+            "current_step": self.current_step,
+            "total_steps": self.total_steps,
+            "progress_percent": self.progress_percent,
+            "started_at": _format_datetime(self.started_at),
+            "paused_at": _format_datetime(self.paused_at),
+            "completed_at": _format_datetime(self.completed_at),
+            "user_instructions": self.user_instructions,
+            "user_questions": self.user_questions,
+            "team_state": self.team_state,
+            "message_thread": self.message_thread,
+            "config": self.config,
         }
     
+    def to_json(self) -> bytes:
+        """Serialize for the checkpoint file."""
+        return orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2, default=str)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AnalysisRun":
+        """Rebuild a run from a checkpoint written by to_dict/to_json."""
+        return cls(
+            run_id=data["run_id"],
+            project_id=data["project_id"],
+            status=RunStatus(data.get("status", RunStatus.RUNNING)),
+            current_step=data.get("current_step", 0),
+            total_steps=data.get("total_steps", 6),
+            progress_percent=data.get("progress_percent", 0.0),
+            started_at=_parse_datetime(data.get("started_at")) or _now(),
+            paused_at=_parse_datetime(data.get("paused_at")),
+            completed_at=_parse_datetime(data.get("completed_at")),
+            steps=[AgentStep.from_dict(step) for step in data["steps"]] if "steps" in data else _default_steps(),
+            intermediate_outputs=data.get("intermediate_outputs", {}),
+            user_instructions=data.get("user_instructions", []),
+            user_questions=data.get("user_questions", []),
+            team_state=data.get("team_state"),
+            message_thread=data.get("message_thread", []),
+            config=data.get("config", {}),
+        )
+    
+    def take_dirty_steps(self) -> List[int]:
+        """Indices of steps changed since the last call, clearing the set."""
+        dirty = sorted(self._dirty_steps)
+        self._dirty_steps.clear()
+        return dirty
+    
+    def mark_steps_dirty(self, indices: List[int]):
+        """Flag steps for the next checkpoint again (e.g. after a failed write)."""
+        self._dirty_steps.update(indices)
+    
     def get_current_agent(self) -> Optional[str]:
         """Get the name of the currently executing agent."""
         if self.current_step < len(self.steps):
             return self.steps[self.current_step].agent_name
         return None
     
+    def ready_steps(self) -> List[AgentStep]:
+        """Incomplete steps whose dependencies have all completed (can run concurrently)."""
+        completed = {step.agent_name for step in self.steps if step.status == "completed"}
+        return [
+            step for step in self.steps
+            if step.status != "completed" and all(dep in completed for dep in step.dependencies)
+        ]
+    
+    def _set_step_status(self, step_index: int, status: str):
+        # Keep the completed counter exact even when a step is reported twice or re-run
+        step = self.steps[step_index]
+        if step.status == "completed" and status != "completed":
+            self._completed_count -= 1
+        elif step.status != "completed" and status == "completed":
+            self._completed_count += 1
+        step.status = status
+        self._dirty_steps.add(step_index)
+        # Steps can finish out of index order, so progress counts completions
+        self.progress_percent = (self._completed_count / self.total_steps) * 100
+        self._summary_cache = None
+    
     def mark_step_running(self, step_index: int):
         """Mark a step as currently running."""
-        self.steps[step_index].status = "running"
-        self.steps[step_index].started_at = datetime.now()
+        self._set_step_status(step_index, "running")
+        self.steps[step_index].started_at = _now()
         self.current_step = step_index
-        self.progress_percent = (step_index / self.total_steps) * 100
     
     def mark_step_completed(self, step_index: int, output: Dict[str, Any]):
-        """Mark a step as completed."""
-        self.steps[step_index].status = "completed"
-        self.steps[step_index].completed_at = datetime.now()
+        """Mark a step as completed (no-op if it already completed with this output)."""
+        step = self.steps[step_index]
+        if step.status == "completed" and step.output == output:
+            return
+        self._set_step_status(step_index, "completed")
+        self.steps[step_index].completed_at = _now()
         self.steps[step_index].output = output
         self.intermediate_outputs[self.steps[step_index].agent_name] = output
-        self.progress_percent = ((step_index + 1) / self.total_steps) * 100
+        self._rendered_outputs.pop(self.steps[step_index].agent_name, None)
+    
+    def advance_step(self, step_index: int, output: Dict[str, Any]) -> bool:
+        """
+        Complete a step and start every step it unblocks, stamping both with one timestamp.
+        
+        Returns False, changing nothing, when the step already completed with this output.
+        """
+        step = self.steps[step_index]
+        if step.status == "completed" and step.output == output:
+            return False
+        now = _now()
+        newly_completed = step.status != "completed"
+        self._set_step_status(step_index, "completed")
+        step.completed_at = now
+        step.output = output
+        self.intermediate_outputs[step.agent_name] = output
+        self._rendered_outputs.pop(step.agent_name, None)
+        if not newly_completed:
+            return True
+        
+        completed = {s.agent_name for s in self.steps if s.status == "completed"}
+        for index, candidate in enumerate(self.steps):
+            if (candidate.status == "pending" and step.agent_name in candidate.dependencies
+                    and all(dep in completed for dep in candidate.dependencies)):
+                self._set_step_status(index, "running")
+                candidate.started_at = now
+                self.current_step = index
+        return True
+    
+    def rendered_outputs(self) -> List[Tuple[str, str]]:
+        """(agent_name, indented JSON) for each intermediate output, rendered once per output."""
+        rendered = []
+        for agent_name, output in self.intermediate_outputs.items():
+            text = self._rendered_outputs.get(agent_name)
+            if text is None:
+                text = orjson.dumps(output, option=orjson.OPT_INDENT_2, default=str).decode()
+                self._rendered_outputs[agent_name] = text
+            rendered.append((agent_name, text))
+        return rendered
     
     def mark_step_failed(self, step_index: int, error: str):
         """Mark a step as failed."""
-        self.steps[step_index].status = "failed"
-        self.steps[step_index].completed_at = datetime.now()
+        self._set_step_status(step_index, "failed")
+        self.steps[step_index].completed_at = _now()
         self.steps[step_index].error = error
     
     def pause(self):
         """Pause the run."""
         self.status = RunStatus.PAUSED
-        self.paused_at = datetime.now()
+        self.paused_at = _now()
+        self._summary_cache = None
     
     def resume(self):
         """Resume the run."""
         self.status = RunStatus.RUNNING
         self.paused_at = None
+        self._summary_cache = None
     
     def complete(self):
         """Mark run as completed."""
         self.status = RunStatus.COMPLETED
-        self.completed_at = datetime.now()
+        self.completed_at = _now()
         self.progress_percent = 100.0
+        self._summary_cache = None
+    
+    def fail(self):
+        """Mark run as failed."""
+        self.status = RunStatus.FAILED
+        self._summary_cache = None
     
     def add_user_instruction(self, instruction: str):
         """Add user instruction/context."""
         self.user_instructions.append(instruction)
+        self._summary_cache = None
     
     def add_user_question(self, question: str, answer: str):
         """Log a user question and answer."""
         self.user_questions.append({
             "question": question,
             "answer": answer,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now().isoformat()
         })
     
     def get_summary(self) -> Dict[str, Any]:
-        """Get a summary of the run state."""
-        completed_steps = sum(1 for step in self.steps if step.status == "completed")
-        
+        """Get a summary of the run state (rebuilt only after the run changes)."""
+        if self._summary_cache is None:
+            self._summary_cache = self._build_summary()
+        return dict(self._summary_cache)
+    
+    def _build_summary(self) -> Dict[str, Any]:
         return {
             "run_id": self.run_id,
             "project_id": self.project_id,
             "status": self.status.value,
             "current_agent": self.get_current_agent(),
-            "progress": f"{completed_steps}/{self.total_steps} steps",
+            "progress": f"{self._completed_count}/{self.total_steps} steps",
             "progress_percent": round(self.progress_percent, 1),
             "user_instructions_count": len(self.user_instructions),
             "started_at": self.started_at.isoformat(),
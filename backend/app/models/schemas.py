@@ -4,8 +4,18 @@ Defines flexible JSON structures for each AutoGen agent's output
 Designed to handle variable LLM responses gracefully
 """
 
-from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Dict, Any, Union
+import sys
+from pydantic import BaseModel, BeforeValidator, Field, field_validator
+from typing import Annotated, List, Optional, Dict, Any
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+# Strings drawn from a small closed vocabulary (types, severities, priorities...).
+# Interned so the many repeated values in a large agent output share one object.
+VocabStr = Annotated[str, BeforeValidator(_intern)]
 
 
 # ============================================================================
@@ -15,7 +25,7 @@ from typing import List, Optional, Dict, Any, Union
 class Component(BaseModel):
     """A structural component in the codebase"""
     name: str = Field(default="Unknown", description="Component name")
-    type: str = Field(default="module", description="Type: module, service, controller, model, util, etc.")
+    type: VocabStr = Field(default="module", description="Type: module, service, controller, model, util, etc.")
     file_paths: List[str] = Field(default_factory=list, description="Files that comprise this component")
     description: str = Field(default="N/A", description="What this component does")
     dependencies: List[str] = Field(default_factory=list, description="Other components it depends on")
@@ -23,7 +33,7 @@ class Component(BaseModel):
 
 class APIEndpoint(BaseModel):
     """An API endpoint discovered in the codebase"""
-    method: str = Field(default="GET", description="HTTP method: GET, POST, PUT, DELETE, etc.")
+    method: VocabStr = Field(default="GET", description="HTTP method: GET, POST, PUT, DELETE, etc.")
     path: str = Field(default="/", description="Endpoint path")
     handler: str = Field(default="N/A", description="Function/method that handles this endpoint")
     file_path: str = Field(default="N/A", description="File containing the handler")
@@ -34,7 +44,7 @@ class APIEndpoint(BaseModel):
 class Entity(BaseModel):
     """A data entity/model in the codebase"""
     name: str = Field(default="Unknown", description="Entity name")
-    type: str = Field(default="model", description="Type: model, schema, table, collection, etc.")
+    type: VocabStr = Field(default="model", description="Type: model, schema, table, collection, etc.")
     file_path: str = Field(default="N/A", description="File where entity is defined")
     fields: List[str] = Field(default_factory=list, description="Entity fields/columns")
     relationships: List[str] = Field(default_factory=list, description="Related entities")
@@ -51,7 +61,7 @@ class DataFlow(BaseModel):
 class KeyFile(BaseModel):
     """An important file in the codebase"""
     path: str = Field(default="N/A", description="File path")
-    role: str = Field(default="N/A", description="Role: entrypoint, config, router, etc.")
+    role: VocabStr = Field(default="N/A", description="Role: entrypoint, config, router, etc.")
     importance: str = Field(default="N/A", description="Why this file is important")
 
 
@@ -71,15 +81,15 @@ class SemanticQueryOutput(BaseModel):
 
 class Strength(BaseModel):
     """A strength found in the codebase"""
-    category: str = Field(default="general", description="Category: architecture, security, testing, etc.")
+    category: VocabStr = Field(default="general", description="Category: architecture, security, testing, etc.")
     description: str = Field(default="N/A", description="What is done well")
     evidence: str = Field(default="N/A", description="Where/how this was observed")
 
 
 class Risk(BaseModel):
     """A risk or issue found in the codebase"""
-    severity: str = Field(default="medium", description="Severity: low, medium, high, critical")
-    category: str = Field(default="general", description="Category: security, performance, maintainability, etc.")
+    severity: VocabStr = Field(default="medium", description="Severity: low, medium, high, critical")
+    category: VocabStr = Field(default="general", description="Category: security, performance, maintainability, etc.")
     description: str = Field(default="N/A", description="Description of the risk")
     location: str = Field(default="N/A", description="Where the risk was found")
     impact: str = Field(default="N/A", description="Potential impact if not addressed")
@@ -87,11 +97,11 @@ class Risk(BaseModel):
 
 class Recommendation(BaseModel):
     """A recommendation for improvement"""
-    priority: str = Field(default="medium", description="Priority: low, medium, high")
-    category: str = Field(default="general", description="Category: architecture, security, testing, etc.")
+    priority: VocabStr = Field(default="medium", description="Priority: low, medium, high")
+    category: VocabStr = Field(default="general", description="Category: architecture, security, testing, etc.")
     recommendation: str = Field(default="N/A", description="What should be done")
     rationale: str = Field(default="N/A", description="Why this is recommended")
-    effort: str = Field(default="medium", description="Estimated effort: small, medium, large")
+    effort: VocabStr = Field(default="medium", description="Estimated effort: small, medium, large")
 
 
 class BestPracticeOutput(BaseModel):
@@ -163,17 +173,17 @@ class UserJourney(BaseModel):
 
 class Constraint(BaseModel):
     """A constraint or limitation"""
-    type: str = Field(default="general", description="Type: technical, business, resource, etc.")
+    type: VocabStr = Field(default="general", description="Type: technical, business, resource, etc.")
     description: str = Field(default="N/A", description="Description of the constraint")
     impact: str = Field(default="N/A", description="How this affects the product")
 
 
 class RoadmapIdea(BaseModel):
     """A roadmap idea for future development"""
-    category: str = Field(default="feature", description="Category: feature, improvement, tech debt, etc.")
+    category: VocabStr = Field(default="feature", description="Category: feature, improvement, tech debt, etc.")
     idea: str = Field(default="N/A", description="The idea")
     rationale: str = Field(default="N/A", description="Why this would be valuable")
-    estimated_effort: str = Field(default="medium", description="Rough effort estimate")
+    estimated_effort: VocabStr = Field(default="medium", description="Rough effort estimate")
 
 
 class PMOutput(BaseModel):
@@ -202,21 +212,41 @@ class CoordinatorOutput(BaseModel):
 # AGENT F: Quality Assurance Agent Schemas
 # ============================================================================
 
+def _clamp_score(value: Any) -> float:
+    """Coerce an LLM-provided score to float and clamp it into 0-100."""
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        # ValueError is what pydantic turns into a validation error for the field
+        raise ValueError(f"score must be a number, got {value!r}") from None
+    return max(0.0, min(100.0, score))
+
+
 class ValidationResult(BaseModel):
     """Validation result for a report"""
-    completeness_score: Union[int, float] = Field(default=50, description="Score 0-100 for completeness", ge=0, le=100)
+    completeness_score: float = Field(default=50.0, description="Score 0-100 for completeness")
     strengths: List[str] = Field(default_factory=list, description="What was done well")
     gaps: List[str] = Field(default_factory=list, description="What is missing or incomplete")
     enhancement_suggestions: List[str] = Field(default_factory=list, description="Specific suggestions for improvement")
 
+    @field_validator("completeness_score", mode="before")
+    @classmethod
+    def _clamp_completeness(cls, value: Any) -> float:
+        return _clamp_score(value)
+
 
 class OverallAssessment(BaseModel):
     """Overall quality assessment"""
-    overall_score: Union[int, float] = Field(default=50.0, description="Overall quality score 0-100", ge=0, le=100)
+    overall_score: float = Field(default=50.0, description="Overall quality score 0-100")
     summary: str = Field(default="N/A", description="Summary of the assessment")
     critical_issues: List[str] = Field(default_factory=list, description="Critical issues that must be addressed")
     recommended_next_steps: List[str] = Field(default_factory=list, description="Recommended next steps")
 
+    @field_validator("overall_score", mode="before")
+    @classmethod
+    def _clamp_overall(cls, value: Any) -> float:
+        return _clamp_score(value)
+
 
 class QAOutput(BaseModel):
     """Complete output from QA Agent"""
@@ -1,23 +1,19 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
 from sqlalchemy.orm import Session
 from db import get_db, Project, User
 import shutil
 import requests
 import os
-import sys
-from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent / "repo-processing"))
-from pipeline import process_repository_for_graphflow
 
 router = APIRouter()
 
-def bg_task(project_id: str, zip_filename: str = None, github_url: str = None):
-    try:
-        file_path = zip_filename if zip_filename else github_url
-        process_repository_for_graphflow(file_path, project_id=project_id)
-        print(f"✅ Preprocessing complete for project {project_id}")
-    except Exception as e:
-        print(f"❌ Preprocessing failed for project {project_id}: {str(e)}")
+UPLOAD_DIR = os.path.abspath("uploads")
+# Absolute analysis output dir, as a string so per-project checks skip Path allocations
+_PROJECTS_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "projects")
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_COPY_CHUNK = 1 << 20  # 1 MiB copy buffer for uploaded ZIPs
+# Preprocessing is started by POST /projects/{id}/preprocess in main.py, which queues it on
+# the bounded preprocess worker pool; uploads only store the project.
 
 
 @router.post("/projects/upload")
@@ -40,10 +36,10 @@ def upload_project(
     project_name = name
     
     if file:
-        os.makedirs("uploads", exist_ok=True)
-        zip_filename = os.path.abspath(f"uploads/{db_user.username}_{file.filename}")
-        with open(zip_filename, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        zip_filename = os.path.join(UPLOAD_DIR, f"{db_user.username}_{file.filename}")
+        # Sync endpoint, so this copy runs on the threadpool rather than the event loop
+        with open(zip_filename, "wb", buffering=UPLOAD_COPY_CHUNK) as buffer:
+            shutil.copyfileobj(file.file, buffer, UPLOAD_COPY_CHUNK)
         if not project_name:
             project_name = file.filename
     elif github_url:
@@ -69,16 +65,14 @@ def list_projects(username: str, db: Session = Depends(get_db)):
     if not db_user:
         raise HTTPException(status_code=403, detail="User not found")
     
-    # Use absolute path
-    base_dir = Path(__file__).parent / "data" / "projects"
     result = []
     for p in db_user.projects:
-        analysis_file = base_dir / str(p.id) / "analysis_result.json"
+        analysis_file = os.path.join(_PROJECTS_BASE, str(p.id), "analysis_result.json")
         result.append({
             "id": p.id, 
             "name": p.name, 
             "github_url": p.github_url, 
             "zip_filename": p.zip_filename,
-            "has_analysis": analysis_file.exists()
+            "has_analysis": os.path.isfile(analysis_file)
         })
     return result
\ No newline at end of file
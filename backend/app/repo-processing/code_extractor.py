@@ -2,7 +2,12 @@ from langchain_text_splitters import (RecursiveCharacterTextSplitter,
                                      Language,)
 # from models import CodeSectionModel, Document
 from langchain_core.documents import Document
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable
+import multiprocessing
+import os
+import threading
 
 
 # Map file extensions to Language enum
@@ -23,24 +28,72 @@ EXTENSION_TO_LANGUAGE = {
     ".swift": Language.SWIFT,
 }
 
+# Same map keyed without the dot, for the rpartition lookup below
+_EXT_MAP: dict[str, Language] = {ext.lstrip("."): language for ext, language in EXTENSION_TO_LANGUAGE.items()}
+
+
+@lru_cache(maxsize=64)
+def _get_splitter(language_key: str, chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Build (once) the splitter for a language group; splitters hold no per-call state."""
+    if language_key == "unknown":
+        return RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+    return RecursiveCharacterTextSplitter.from_language(
+        language=Language(language_key),
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+
+# Language groups with less text than this are split inline: a worker process has to
+# import langchain and unpickle the group, which outweighs splitting a few files
+PARALLEL_SPLIT_MIN_CHARS = 4 * 1024 * 1024
+SPLIT_WORKERS = min(4, os.cpu_count() or 1)
+
+_split_pool = None
+_split_pool_lock = threading.Lock()
+
+
+def _get_split_pool() -> ProcessPoolExecutor:
+    """One worker pool for every split, created on first use and kept for the process."""
+    global _split_pool
+    with _split_pool_lock:
+        if _split_pool is None:
+            # spawn, not fork: preprocessing runs on a thread inside the API server
+            _split_pool = ProcessPoolExecutor(
+                max_workers=SPLIT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _split_pool
+
+
+def _split_language_group(language_key: str, docs: list[Document], chunk_size: int, chunk_overlap: int) -> list[Document]:
+    """Split one language group. Module-level so the process pool can pickle it."""
+    return _get_splitter(language_key, chunk_size, chunk_overlap).split_documents(docs)
 
 
 class CodeExtractor:
 
+    @staticmethod
     def detect_language_from_document(doc: Document) -> Language | None:
         """Extract language from document's source metadata."""
         source = doc.metadata.get("source", "")
-        extension = Path(source).suffix.lower()
-        return EXTENSION_TO_LANGUAGE.get(extension)
+        _, dot, extension = source.rpartition(".")
+        if not dot:
+            return None
+        return _EXT_MAP.get(extension.lower())
     
+    @staticmethod
     def split_documents_by_language(
-        documents: list[Document],
+        documents: Iterable[Document],
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
     ) -> list[Document]:
         """
         Split documents based on their programming language detected from source.
         Groups documents by language and applies language-specific splitting.
+        Accepts any iterable, e.g. RepoLoader.iter_documents, consumed in a single pass.
         """
         # Group documents by detected language
         docs_by_language = {}
@@ -56,30 +109,37 @@ class CodeExtractor:
                 docs_by_language[language_key] = []
             docs_by_language[language_key].append(doc)
         
-        # Split each language group with appropriate splitter
+        # Language groups are independent and splitting is CPU-bound, so when a repo has
+        # several groups with megabytes of text they are split in the shared worker pool
+        large_groups = [
+            key for key, docs in docs_by_language.items()
+            if sum(len(doc.page_content) for doc in docs) >= PARALLEL_SPLIT_MIN_CHARS
+        ]
+        futures = {}
+        if len(large_groups) > 1:
+            pool = _get_split_pool()
+            futures = {
+                key: pool.submit(_split_language_group, key, docs_by_language[key], chunk_size, chunk_overlap)
+                for key in large_groups
+            }
+        
+        # Split each language group with appropriate splitter (small groups inline while workers run)
         all_splits = []
         
-        for language_key, docs in docs_by_language.items():
-            print(f"Processing {len(docs)} documents with language: {language_key}")
-            
-            # Convert back to Language enum if not 'unknown'
-            if language_key == "unknown":
-                splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=chunk_size,
-                    chunk_overlap=chunk_overlap,
-                )
-            else:
-                language = Language(language_key)
-                splitter = RecursiveCharacterTextSplitter.from_language(
-                    language=language,
-                    chunk_size=chunk_size,
-                    chunk_overlap=chunk_overlap,
-                )
-            
-            # Split the documents in this language group
-            splits = splitter.split_documents(docs)
-            all_splits.extend(splits)
-            print(f"  → Created {len(splits)} chunks")
+        try:
+            for language_key, docs in docs_by_language.items():
+                print(f"Processing {len(docs)} documents with language: {language_key}")
+                
+                if language_key in futures:
+                    splits = futures[language_key].result()
+                else:
+                    splits = _split_language_group(language_key, docs, chunk_size, chunk_overlap)
+                all_splits.extend(splits)
+                print(f"  → Created {len(splits)} chunks")
+        finally:
+            # On error, don't leave this call's remaining groups queued in the shared pool
+            for future in futures.values():
+                future.cancel()
         
         return all_splits
 
@@ -1,11 +1,99 @@
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+from collections import OrderedDict
+import asyncio
+import shutil
+import tempfile
+import uuid
+import faiss
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
+# Texts per embeddings request. Small enough that a typical repo splits into several
+# requests that run concurrently, large enough to amortize each request's round trip.
+EMBED_BATCH_SIZE = 128
+# Embedding requests in flight at once; each is dominated by the round trip to OpenAI
+EMBED_CONCURRENCY = 8
+
+# Smaller repos get a flat index over 8-bit scalar-quantized vectors (a quarter of the FP32
+# size on disk and in memory, negligible recall loss). Repos with at least this many sections
+# get an IVF-PQ index (clustered, product-quantized codes): much faster queries, smaller still
+IVF_PQ_MIN_VECTORS = 10_000  # also what 8-bit PQ training needs (~39 points x 256 codes)
+IVF_PQ_SUBQUANTIZERS = 64  # bytes per stored vector (8-bit codes); must divide the dimension
+IVF_PQ_NPROBE = 16  # clusters visited per query
+IVF_PQ_TRAIN_SAMPLE = 100_000
+
+# Saved indexes are opened memory-mapped and read-only: the OS pages vectors in on demand
+# instead of reading the whole file up front (loaded stores are only searched, never added to)
+_MMAP_IO_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+# Loaded indexes shared by /ask and the agents' search_code, least recently used evicted.
+# abs path -> (index.faiss mtime_ns, FAISS); the mtime check drops an index once it is rewritten.
+INDEX_POOL_SIZE = 8
+_INDEX_POOL = OrderedDict()
+_INDEX_POOL_LOCK = threading.Lock()
+
+
+def _index_mtime(path: str):
+    try:
+        return os.stat(os.path.join(path, "index.faiss")).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _pooled_index(path: str):
+    key = os.path.abspath(path)
+    mtime = _index_mtime(key)
+    with _INDEX_POOL_LOCK:
+        entry = _INDEX_POOL.get(key)
+        if entry is None or entry[0] != mtime:
+            return None
+        _INDEX_POOL.move_to_end(key)
+        return entry[1]
+
+
+def _pool_index(path: str, store):
+    key = os.path.abspath(path)
+    mtime = _index_mtime(key)
+    with _INDEX_POOL_LOCK:
+        _INDEX_POOL[key] = (mtime, store)
+        _INDEX_POOL.move_to_end(key)
+        while len(_INDEX_POOL) > INDEX_POOL_SIZE:
+            _INDEX_POOL.popitem(last=False)
+
+
+def evict(path: str):
+    """Drop a pooled index (e.g. after it has been rebuilt)."""
+    with _INDEX_POOL_LOCK:
+        _INDEX_POOL.pop(os.path.abspath(path), None)
+
+
+def save_store(store, path: str):
+    """
+    Persist a FAISS store to path. Files are written to a temp dir and moved into place
+    with os.replace, so an index that is still memory-mapped by a reader keeps its old
+    file instead of being truncated underneath it.
+    """
+    os.makedirs(path, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=path)
+    try:
+        store.save_local(tmp_dir)
+        for name in ("index.pkl", "index.faiss"):
+            os.replace(os.path.join(tmp_dir, name), os.path.join(path, name))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    evict(path)
+
+
 class EmbeddingStoreFAISS:
     def __init__(self):
         # Initialize OpenAI embeddings
@@ -16,27 +104,161 @@ class EmbeddingStoreFAISS:
         """
         Add a list of code sections (LangChain Documents or CodeSectionModels) to the FAISS vector store.
         """
-        texts = [sec.page_content for sec in sections]
-        # Handle both LangChain Document (has .metadata dict) and CodeSectionModel (has .file attr)
+        texts, metadatas = self._texts_and_metadatas(sections)
+        if not texts:
+            return
+        unique_texts, slots = self._dedupe(texts)
+        unique_vectors = self._embed_texts(unique_texts)
+        self._add_embeddings(texts, unique_vectors[slots], metadatas)
+
+    async def aadd_sections(self, sections):
+        """
+        Async add_sections: embedding batches go out through aembed_documents, at most
+        EMBED_CONCURRENCY requests in flight, instead of occupying a thread each.
+        """
+        texts, metadatas = self._texts_and_metadatas(sections)
+        if not texts:
+            return
+        unique_texts, slots = self._dedupe(texts)
+        unique_vectors = await self._aembed_texts(unique_texts)
+        self._add_embeddings(texts, unique_vectors[slots], metadatas)
+
+    @staticmethod
+    def _texts_and_metadatas(sections):
+        # Single pass over sections, building texts and metadata together
+        texts = []
         metadatas = []
+        texts_append = texts.append
+        metadatas_append = metadatas.append
         for sec in sections:
-            if hasattr(sec, 'metadata') and isinstance(sec.metadata, dict):
-                metadatas.append({
-                    "source": sec.metadata.get("source", "unknown"),
-                    "language": sec.metadata.get("language", "unknown")
+            texts_append(sec.page_content)
+            # Handle both LangChain Document (has .metadata dict) and CodeSectionModel (has .file attr)
+            metadata = getattr(sec, 'metadata', None)
+            if isinstance(metadata, dict):
+                metadatas_append({
+                    "source": metadata.get("source", "unknown"),
+                    "language": metadata.get("language", "unknown")
                 })
             else:
-                metadatas.append({
+                metadatas_append({
                     "source": getattr(sec, 'file', 'unknown'),
                     "language": "unknown"
                 })
+        return texts, metadatas
 
+    def _add_embeddings(self, texts, vectors, metadatas):
+        """
+        Add a float32 (n, dim) matrix to the index in one call; texts and metadata go to the
+        docstore, keyed by row position, so no per-vector Python objects reach FAISS.
+        """
         if self.store is None:
             # Create a new FAISS store with metadata
-            self.store = FAISS.from_texts(texts=texts, embedding=self.embeddings, metadatas=metadatas)
+            self.store = FAISS(
+                embedding_function=self.embeddings,
+                index=self._new_index(vectors),
+                docstore=InMemoryDocstore(),
+                index_to_docstore_id={},
+            )
+
+        start = self.store.index.ntotal
+        ids = [str(uuid.uuid4()) for _ in texts]
+        self.store.index.add(vectors)
+        self.store.docstore.add({
+            doc_id: Document(page_content=text, metadata=metadata)
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        })
+        self.store.index_to_docstore_id.update(enumerate(ids, start))
+
+    @staticmethod
+    def _new_index(vectors):
+        """
+        Flat int8 scalar-quantized L2 for ordinary repos, IVF-PQ for large ones; both are
+        trained on these first vectors, later sections are added to the trained index.
+        """
+        count, dim = vectors.shape
+        if count < IVF_PQ_MIN_VECTORS:
+            index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+            index.train(vectors)
+            return index
+
+        m = IVF_PQ_SUBQUANTIZERS
+        while dim % m:
+            m //= 2
+        # ~4*sqrt(N) lists, but keep >= 39 training points per list
+        nlist = max(1, min(int(4 * count ** 0.5), count // 39))
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, nlist, m, 8)
+        if count > IVF_PQ_TRAIN_SAMPLE:
+            sample = vectors[np.random.default_rng(0).choice(count, IVF_PQ_TRAIN_SAMPLE, replace=False)]
         else:
-            # Add more sections to existing store with metadata
-            self.store.add_texts(texts=texts, metadatas=metadatas)
+            sample = vectors
+        print(f"   ↺ Training IVF-PQ index (nlist={nlist}, m={m}) on {len(sample)} vectors")
+        index.train(sample)
+        index.nprobe = IVF_PQ_NPROBE
+        return index
+
+    @staticmethod
+    def _dedupe(texts):
+        """
+        Embed each distinct text once (license headers, boilerplate and generated code repeat
+        a lot): returns the distinct texts plus, per input text, its row among them so the
+        vectors can be fanned back out (one take on the matrix) and every section keeps its
+        own index entry.
+        """
+        slot_by_text = {}
+        unique_texts = []
+        slots = []
+        for text in texts:
+            slot = slot_by_text.get(text)
+            if slot is None:
+                slot = slot_by_text[text] = len(unique_texts)
+                unique_texts.append(text)
+            slots.append(slot)
+
+        if len(unique_texts) < len(texts):
+            print(f"   ↺ Embedding {len(unique_texts)} unique of {len(texts)} sections")
+        return unique_texts, np.asarray(slots, dtype=np.intp)
+
+    @staticmethod
+    def _batches(texts):
+        return [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+
+    @staticmethod
+    def _fill_matrix(count, batch_results):
+        """
+        Copy per-batch vector lists, in order, into one preallocated float32 (count, dim) matrix.
+        """
+        matrix = None
+        row = 0
+        for batch_vectors in batch_results:
+            if matrix is None:
+                matrix = np.empty((count, len(batch_vectors[0])), dtype=np.float32)
+            matrix[row:row + len(batch_vectors)] = batch_vectors
+            row += len(batch_vectors)
+        return matrix
+
+    def _embed_texts(self, texts):
+        """
+        Embed texts in fixed-size batches, several requests at a time, preserving order.
+        """
+        batches = self._batches(texts)
+        if len(batches) <= 1:
+            return self._fill_matrix(len(texts), [self.embeddings.embed_documents(texts)])
+
+        with ThreadPoolExecutor(max_workers=min(EMBED_CONCURRENCY, len(batches))) as pool:
+            return self._fill_matrix(len(texts), pool.map(self.embeddings.embed_documents, batches))
+
+    async def _aembed_texts(self, texts):
+        """
+        Async counterpart of _embed_texts; gather keeps batch order.
+        """
+        semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
+
+        async def embed_batch(batch):
+            async with semaphore:
+                return await self.embeddings.aembed_documents(batch)
+
+        batch_results = await asyncio.gather(*(embed_batch(batch) for batch in self._batches(texts)))
+        return self._fill_matrix(len(texts), batch_results)
 
     def save(self, path="faiss_index"):
         """
@@ -44,17 +266,86 @@ class EmbeddingStoreFAISS:
         """
         if self.store:
             print("SAVING FAISS AT:", path)
-            self.store.save_local(path)
+            save_store(self.store, path)
 
     def load(self, path="faiss_index"):
         """
-        Load an existing FAISS index
+        Load an existing FAISS index (reused from the pool while unchanged on disk)
         """
-        self.store = FAISS.load_local(path, self.embeddings, allow_dangerous_deserialization=True)
+        store = _pooled_index(path)
+        if store is None:
+            store = FAISS.load_local(
+                path, self.embeddings, allow_dangerous_deserialization=True, io_flags=_MMAP_IO_FLAGS
+            )
+            _pool_index(path, store)
+        self.store = store
         return self.store
 
 
 def load_vector_store(path: str):
     """Load a saved FAISS vector store from disk."""
+    pooled = _pooled_index(path)
+    if pooled is not None:
+        return pooled
     store = EmbeddingStoreFAISS()
-    return store.load(path)
\ No newline at end of file
+    return store.load(path)
+
+
+# Search caches. Query embeddings depend only on the text (the agents' bootstrap queries are
+# the same for every project), results on (index, its mtime_ns, query, k); a rebuilt index
+# has a new mtime, so its old results are never served.
+QUERY_CACHE_SIZE = 1024
+SEARCH_CACHE_SIZE = 512
+_QUERY_VECTORS = OrderedDict()
+_SEARCH_RESULTS = OrderedDict()
+_SEARCH_CACHE_LOCK = threading.Lock()
+
+
+def _cache_get(cache, key):
+    with _SEARCH_CACHE_LOCK:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache, key, value, size):
+    with _SEARCH_CACHE_LOCK:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > size:
+            cache.popitem(last=False)
+
+
+def similarity_search(path: str, query: str, k: int = 5):
+    """
+    load_vector_store(path).similarity_search(query, k), skipping the embedding request
+    for a query seen before and the FAISS search for a (index, query, k) seen before.
+    """
+    return similarity_search_batch(path, [query], k=k)[0]
+
+
+def similarity_search_batch(path: str, queries: List[str], k: int = 5):
+    """
+    similarity_search for several queries against one index, returning one doc list
+    per query. Queries without a cached vector are embedded in a single request.
+    """
+    index_key = (os.path.abspath(path), _index_mtime(path))
+    results = [_cache_get(_SEARCH_RESULTS, index_key + (query, k)) for query in queries]
+    missing = [query for query, docs in zip(queries, results) if docs is None]
+    if not missing:
+        return [list(docs) for docs in results]
+
+    store = load_vector_store(path)
+    vectors = {query: _cache_get(_QUERY_VECTORS, query) for query in missing}
+    to_embed = [query for query, vector in vectors.items() if vector is None]
+    if to_embed:
+        for query, vector in zip(to_embed, store.embedding_function.embed_documents(to_embed)):
+            vectors[query] = vector
+            _cache_put(_QUERY_VECTORS, query, vector, QUERY_CACHE_SIZE)
+
+    for i, query in enumerate(queries):
+        if results[i] is None:
+            results[i] = tuple(store.similarity_search_by_vector(vectors[query], k=k))
+            _cache_put(_SEARCH_RESULTS, index_key + (query, k), results[i], SEARCH_CACHE_SIZE)
+    return [list(docs) for docs in results]
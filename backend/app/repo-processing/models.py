@@ -19,6 +19,8 @@ class Document:
         self.metadata = metadata
 
 class CodeSectionModel:
+    __slots__ = ("content", "page_content", "file", "type", "start_line", "end_line")
+
     def __init__(self, content: str, file: str, type: str, start_line: int, end_line: int):
         self.content = content
         self.page_content = content  # For compatibility with embeddings
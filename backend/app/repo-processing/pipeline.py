@@ -1,3 +1,4 @@
+import asyncio
 import os
 import uuid
 from repo_loader import RepoLoader
@@ -44,7 +45,7 @@ def process_repository(file_path: str):
 
     # 5️⃣ Initialize FAISS search
     emb_model.save()
-    faiss_store = emb_model.load()
+    faiss_store = emb_model.store  # already in memory; no need to read back what was just saved
     print("----------------", faiss_store)
     search_index = CodeSearchFAISS(faiss_store=faiss_store)
     # search_index.build_index(vectors, metadata)
@@ -100,8 +101,7 @@ def process_repository_for_graphflow(file_path: str, project_id: str = None, sta
         # 1️⃣ Load repo and documents
         if status_callback: status_callback("Loading repository files...")
         print("1️⃣ Loading repository...")
-        repo_path = RepoLoader.load_repo(file_path)
-        docs = RepoLoader.load_documents(repo_path)
+        docs = list(RepoLoader.iter_repo_documents(file_path))
         print(f"   ✓ Loaded {len(docs)} documents\n")
         
         if not docs:
@@ -112,6 +112,8 @@ def process_repository_for_graphflow(file_path: str, project_id: str = None, sta
         print("2️⃣ Extracting code sections...")
         sections = CodeExtractor.split_documents_by_language(docs)
         print(f"   ✓ Extracted {len(sections)} code sections\n")
+        # Whole-file contents are not needed past splitting; free them before embedding
+        del docs
         
         if not sections:
             raise ValueError("No code sections extracted")
@@ -138,7 +140,8 @@ def process_repository_for_graphflow(file_path: str, project_id: str = None, sta
         if status_callback: status_callback("Generating embeddings...")
         print("4️⃣ Generating embeddings...")
         emb_model = EmbeddingStoreFAISS()
-        emb_model.add_sections(sections)
+        # Runs on a preprocess worker thread, so there is no event loop to reuse here
+        asyncio.run(emb_model.aadd_sections(sections))
         print(f"   ✓ Created embeddings for {len(sections)} sections\n")
 
         # 5️⃣ Save in GraphFlow format
@@ -2,33 +2,95 @@ from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from models import RepoIntelModel
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
 import json
+import orjson
 import os
+import tiktoken
 from dotenv import load_dotenv
 
 
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-class RepoIntel:
-    _llm = None
-    
-    @classmethod
-    def get_llm(cls):
-        if cls._llm is None:
-            cls._llm = ChatOpenAI(
-                model="gpt-4o-mini", 
-                temperature=0.4
-            )
-        return cls._llm
-    
-    @staticmethod
-    def generate_report_from_documents(docs) -> RepoIntelModel:
-        """
-        Uses LangChain LLM to summarize repo info
-        """
-        prompt = ChatPromptTemplate.from_template(
-            """You are an expert software engineer. 
+REPO_INTEL_MODEL = "gpt-4o-mini"
+# Prompt input cap: the first REPO_INTEL_MAX_DOCS sections, each cut to its first
+# REPO_INTEL_DOC_TOKENS tokens (imports and entry points sit at the top of a file)
+REPO_INTEL_MAX_DOCS = 10
+REPO_INTEL_DOC_TOKENS = 800
+_encoding = None
+
+
+def _get_encoding():
+    """Tokenizer for REPO_INTEL_MODEL, or False if it cannot be loaded (e.g. offline)."""
+    global _encoding
+    if _encoding is None:
+        try:
+            try:
+                _encoding = tiktoken.encoding_for_model(REPO_INTEL_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            print(f"⚠️  RepoIntel tokenizer unavailable, truncating by characters: {e}")
+            _encoding = False
+    return _encoding
+
+
+def _head_tokens(text: str, limit: int = REPO_INTEL_DOC_TOKENS) -> str:
+    # Any text of at most `limit` chars is at most `limit` tokens; skip encoding it
+    if len(text) <= limit:
+        return text
+    encoding = _get_encoding()
+    if not encoding:
+        return text[:limit * 4]  # ~4 chars per token
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= limit else encoding.decode(tokens[:limit])
+
+
+# Parsed reports keyed by sha256 of the exact prompt input, so reprocessing an unchanged
+# repo skips the LLM call. Kept in memory (bounded) and on disk across restarts.
+REPO_INTEL_CACHE_DIR = Path(__file__).parent.parent / "data" / "repo_intel_cache"
+REPO_INTEL_CACHE_SIZE = 256
+_report_cache = OrderedDict()
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _cache_key(combined_text: str) -> str:
+    return hashlib.sha256(f"{REPO_INTEL_MODEL}\n{combined_text}".encode("utf-8")).hexdigest()
+
+
+def _remember(key: str, report: dict):
+    _report_cache[key] = report
+    _report_cache.move_to_end(key)
+    while len(_report_cache) > REPO_INTEL_CACHE_SIZE:
+        _report_cache.popitem(last=False)
+
+
+def _cached_report(key: str):
+    report = _report_cache.get(key)
+    if report is None:
+        try:
+            report = orjson.loads((REPO_INTEL_CACHE_DIR / f"{key}.json").read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+    _remember(key, report)
+    return dict(report)  # callers may mutate the report
+
+
+def _store_report(key: str, report: dict):
+    _remember(key, dict(report))
+    try:
+        REPO_INTEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        (REPO_INTEL_CACHE_DIR / f"{key}.json").write_bytes(orjson.dumps(report))
+    except OSError as e:
+        print(f"⚠️  RepoIntel cache write failed: {e}")
+
+
+# Static instructions come before {docs}, so the provider can cache the prompt prefix
+_PROMPT = ChatPromptTemplate.from_template(
+    """You are an expert software engineer. 
             Analyze the following code files and provide:
             1. Stack / language
             2. Framework (if any)
@@ -47,12 +109,40 @@ class RepoIntel:
             Code files:
             {docs}
             """
-        )
-        output_parser = StrOutputParser()
-        # chain = LLMChain(llm=RepoIntel.llm, prompt=prompt)
-        chain = prompt | RepoIntel.get_llm() | output_parser
-        # print("CHAIN: ", chain)
-        combined_text = "\n\n".join([doc.page_content for doc in docs[:10]]) # first 10 files to save tokens
+)
+
+
+class RepoIntel:
+    _llm = None
+    _chain = None
+    
+    @classmethod
+    def get_llm(cls):
+        if cls._llm is None:
+            cls._llm = ChatOpenAI(
+                model=REPO_INTEL_MODEL, 
+                temperature=0.4
+            )
+        return cls._llm
+    
+    @classmethod
+    def get_chain(cls):
+        if cls._chain is None:
+            cls._chain = _PROMPT | cls.get_llm() | StrOutputParser()
+        return cls._chain
+    
+    @staticmethod
+    def generate_report_from_documents(docs) -> RepoIntelModel:
+        """
+        Uses LangChain LLM to summarize repo info
+        """
+        chain = RepoIntel.get_chain()
+        combined_text = "\n\n".join([_head_tokens(doc.page_content) for doc in docs[:REPO_INTEL_MAX_DOCS]])
+        cache_key = _cache_key(combined_text)
+        cached = _cached_report(cache_key)
+        if cached is not None:
+            print("   ↺ RepoIntel report reused from cache")
+            return cached
         result = chain.invoke({"docs": combined_text})
         
         # Strip markdown code blocks and handle multiple JSON objects
@@ -67,22 +157,19 @@ class RepoIntel:
         
         # Extract first JSON object if multiple exist
         try:
-            # Find first complete JSON object
-            brace_count = 0
             start_idx = result.find('{')
             if start_idx == -1:
                 raise ValueError("No JSON object found")
             
-            for i in range(start_idx, len(result)):
-                if result[i] == '{':
-                    brace_count += 1
-                elif result[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        result = result[start_idx:i+1]
-                        break
-            
-            return json.loads(result)
+            try:
+                # Usual case: the rest of the output is exactly one object
+                report = orjson.loads(result[start_idx:])
+            except orjson.JSONDecodeError:
+                # Trailing text or further objects: decode the first one and stop there
+                # (the C scanner handles braces inside strings)
+                report, _ = _JSON_DECODER.raw_decode(result, start_idx)
+            _store_report(cache_key, report)
+            return report
         except Exception as e:
             print(f"⚠️  RepoIntel JSON parse failed: {e}")
             print(f"Raw output: {result[:200]}...")
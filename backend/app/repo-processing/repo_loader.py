@@ -1,56 +1,144 @@
 import os
+import shutil
+import subprocess
 import tempfile
-from langchain_community.document_loaders import GitLoader, DirectoryLoader
 # from langchain.docstore.document import Document
 from models import Document
-from langchain_community.document_loaders import UnstructuredFileLoader
 import zipfile
-import nbformat
-from pathlib import Path
+import orjson
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterator
+import multiprocessing
+
+SKIP_DIRS = frozenset({"node_modules", "__pycache__", ".git", ".venv", "venv", ".tox", "dist", "build"})
+SKIP_EXTENSIONS = frozenset({".pyc", ".pyo", ".exe", ".dll", ".so", ".o", ".a",
+                             ".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg",
+                             ".woff", ".woff2", ".ttf", ".eot",
+                             ".zip", ".tar", ".gz", ".lock"})
+
+GIT_CLONE_TIMEOUT = 600  # seconds
+ZIP_COPY_BUFFER = 128 * 1024  # read/write chunk when extracting uploaded archives
+# Largest archive member read into memory as a document; bigger ones are skipped so a
+# compression bomb in an upload can't exhaust the server's memory
+MAX_MEMBER_BYTES = 10 * 1024 * 1024
+# Archives at least this large are decompressed by several worker processes
+PARALLEL_EXTRACT_MIN_BYTES = 5 * 1024 * 1024
+# Threads for notebook parsing (file I/O plus JSON parse)
+NOTEBOOK_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+NOTEBOOK_READ_BUFFER = 128 * 1024
+
+
+def _extract_entries(zip_file_path: str, entries):
+    """
+    Extract (member name, target path) pairs from the archive with large buffered copies.
+    Module-level so worker processes can run it; each worker opens its own ZipFile.
+    """
+    with zipfile.ZipFile(zip_file_path, "r") as z:
+        for name, target in entries:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with z.open(name) as src, open(target, "wb", buffering=ZIP_COPY_BUFFER) as dst:
+                shutil.copyfileobj(src, dst, ZIP_COPY_BUFFER)
+
+
+def _notebook_code(raw: bytes) -> str:
+    """
+    Code cell sources of a notebook, joined. Plain JSON parse: only the sources are needed,
+    so nbformat's schema validation and version upgrade are skipped.
+    """
+    nb = orjson.loads(raw)
+    # nbformat 4 keeps cells at the top level, 3 under worksheets with "input"
+    cells = nb.get("cells")
+    if cells is None:
+        cells = [cell for ws in nb.get("worksheets", []) for cell in ws.get("cells", [])]
+    code_cells = []
+    for cell in cells:
+        if cell.get("cell_type") == "code":
+            source = cell.get("source", cell.get("input", ""))
+            code_cells.append(source if isinstance(source, str) else "".join(source))
+    return "\n\n".join(code_cells)
+
+
+def _is_loadable_member(name: str) -> bool:
+    """Archive member counterpart of _iter_files' filtering, applied to its whole path."""
+    *dirs, filename = name.split("/")
+    if any(part.startswith(".") or part in SKIP_DIRS for part in dirs):
+        return False
+    return (bool(filename) and not filename.startswith(".")
+            and os.path.splitext(filename)[1].lower() not in SKIP_EXTENSIONS)
+
+
+def _iter_files(root: str):
+    """
+    Yield loadable file paths under root. scandir's DirEntry carries the file type from
+    the directory listing, so no extra stat() is needed per entry; skipped directories
+    (SKIP_DIRS, hidden) are never listed.
+    """
+    with os.scandir(root) as it:
+        entries = list(it)  # listed up front so the handle is closed before recursing
+    for entry in entries:
+        name = entry.name
+        # Hidden entries, which includes .git/ and .env* files
+        if name.startswith("."):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            if name not in SKIP_DIRS:
+                yield from _iter_files(entry.path)
+        elif entry.is_file() and os.path.splitext(name)[1].lower() not in SKIP_EXTENSIONS:
+            yield entry.path
+
 
 class RepoLoader:
     @staticmethod
     def load_zip(zip_file_path: str):
         temp_dir = tempfile.mkdtemp()
+        root = os.path.realpath(temp_dir)
+        file_entries = []
         with zipfile.ZipFile(zip_file_path, "r") as z:
-            z.extractall(temp_dir)
+            for info in z.infolist():
+                target = os.path.realpath(os.path.join(root, info.filename))
+                if not target.startswith(root + os.sep):
+                    print(f"Skipping unsafe zip entry: {info.filename}")
+                    continue
+                if info.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                else:
+                    file_entries.append((info.file_size, info.filename, target))
+
+        # Entries are independent and DEFLATE is CPU-bound, so big archives are spread over
+        # worker processes (largest entries dealt round-robin to balance the slices)
+        workers = min(os.cpu_count() or 1, len(file_entries))
+        if workers > 1 and os.path.getsize(zip_file_path) >= PARALLEL_EXTRACT_MIN_BYTES:
+            file_entries.sort(reverse=True)
+            slices = [[(name, target) for _, name, target in file_entries[i::workers]] for i in range(workers)]
+            # spawn, not fork: preprocessing runs on a thread inside the API server
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                for future in [pool.submit(_extract_entries, zip_file_path, entries) for entries in slices]:
+                    future.result()
+        else:
+            _extract_entries(zip_file_path, [(name, target) for _, name, target in file_entries])
         return temp_dir
     
     @staticmethod
     def load_github(url: str) -> str:
         """
-        Clones GitHub repo using LangChain GitLoader
-        Tries 'main' branch first, falls back to 'master' if that fails
+        Shallow-clones a GitHub repo's default branch (whatever the remote HEAD points to,
+        so no main/master guessing) in a single git call
         """
         temp_dir = tempfile.mkdtemp()
-        
-        # Try main branch first
         try:
-            loader = GitLoader(repo_path=temp_dir, clone_url=url, branch="main")
-            loader.load()  # Actually clones the repo
-            return temp_dir
-        except Exception as e:
-            print(f"Failed to clone 'main' branch: {e}")
-            # Try master branch as fallback
-            try:
-                import shutil
-                shutil.rmtree(temp_dir)  # Clean up failed clone
-                temp_dir = tempfile.mkdtemp()
-                loader = GitLoader(repo_path=temp_dir, clone_url=url, branch="master")
-                loader.load()
-                return temp_dir
-            except Exception as e2:
-                print(f"Failed to clone 'master' branch: {e2}")
-                # Last resort: try without specifying branch
-                try:
-                    import shutil
-                    shutil.rmtree(temp_dir)
-                    temp_dir = tempfile.mkdtemp()
-                    loader = GitLoader(repo_path=temp_dir, clone_url=url)
-                    loader.load()
-                    return temp_dir
-                except Exception as e3:
-                    raise ValueError(f"Failed to clone repository: {e3}")
+            subprocess.run(
+                ["git", "clone", "--depth", "1", "--single-branch", "--quiet", url, temp_dir],
+                check=True,
+                capture_output=True,
+                text=True,
+                timeout=GIT_CLONE_TIMEOUT,
+                env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},  # fail instead of prompting for credentials
+            )
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            detail = e.stderr.strip() if isinstance(e, subprocess.CalledProcessError) and e.stderr else str(e)
+            raise ValueError(f"Failed to clone repository: {detail}")
+        return temp_dir
     
     @staticmethod
     def load_repo(input_value: str) -> str:
@@ -61,33 +149,73 @@ class RepoLoader:
         else:
             raise ValueError("Invalid input type or file path does not exist")
         
+    @staticmethod
+    def iter_repo_documents(input_value: str) -> Iterator[Document]:
+        """
+        Documents for a ZIP path or GitHub URL. ZIP archives are read in memory, entry by
+        entry, without the extract-to-disk-and-read-back round trip.
+        """
+        if input_value.endswith(".zip") and os.path.exists(input_value):
+            return RepoLoader.iter_zip_documents(input_value)
+        return RepoLoader.iter_documents(RepoLoader.load_repo(input_value))
+
+    @staticmethod
+    def iter_zip_documents(zip_file_path: str) -> Iterator[Document]:
+        """
+        Yield documents straight from the archive; sources are the member paths.
+        Applies the same skip rules as a directory walk.
+        """
+        with zipfile.ZipFile(zip_file_path, "r") as z:
+            for info in z.infolist():
+                name = info.filename
+                if info.is_dir() or not _is_loadable_member(name):
+                    continue
+                if info.file_size > MAX_MEMBER_BYTES:
+                    print(f"Skipping {name}: {info.file_size} bytes exceeds the {MAX_MEMBER_BYTES}-byte limit")
+                    continue
+                # Bounded read: the size in the header is not trusted (a member that
+                # disagrees with its header fails the CRC check and is skipped)
+                try:
+                    with z.open(info) as member:
+                        raw = member.read(MAX_MEMBER_BYTES + 1)
+                except (zipfile.BadZipFile, OSError) as e:
+                    print(f"Skipping {name}: {e}")
+                    continue
+                if len(raw) > MAX_MEMBER_BYTES:
+                    print(f"Skipping {name}: decompresses past the {MAX_MEMBER_BYTES}-byte limit")
+                    continue
+                if name.lower().endswith(".ipynb"):
+                    try:
+                        content = _notebook_code(raw)
+                    except Exception as e:
+                        print(f"Failed to read notebook {name}: {e}")
+                        continue
+                else:
+                    try:
+                        content = raw.decode("utf-8")
+                    except UnicodeDecodeError:
+                        content = raw.decode("latin-1")
+                    # Same newlines a text-mode read of the extracted file would give
+                    content = content.replace("\r\n", "\n").replace("\r", "\n")
+                if content.strip():
+                    yield Document(page_content=content, metadata={"source": name})
+
     @staticmethod
     def load_documents(repo_path: str) -> list[Document]:
-        SKIP_DIRS = {"node_modules", "__pycache__", ".git", ".venv", "venv", ".tox", "dist", "build"}
-        SKIP_EXTENSIONS = {".pyc", ".pyo", ".exe", ".dll", ".so", ".o", ".a",
-                           ".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg",
-                           ".woff", ".woff2", ".ttf", ".eot",
-                           ".zip", ".tar", ".gz", ".lock"}
-
-        def is_valid_file(file_path):
-            parts = file_path.replace("\\", "/").split("/")
-            for part in parts:
-                if part.startswith(".") or part in SKIP_DIRS:
-                    return False
-            filename = os.path.basename(file_path)
-            if filename.startswith(".env"):
-                return False
-            ext = Path(file_path).suffix.lower()
-            if ext in SKIP_EXTENSIONS:
-                return False
-            return os.path.isfile(file_path)
+        documents = list(RepoLoader.iter_documents(repo_path))
+        print(f"Loaded {len(documents)} documents from {repo_path}")
+        return documents
 
+    @staticmethod
+    def iter_documents(repo_path: str) -> Iterator[Document]:
+        """
+        Yield the repository's documents one file at a time, so a consumer that groups or
+        splits as it goes never needs a separate list of every file's contents.
+        """
         def notebook_to_code(file_path: str):
             try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    nb = nbformat.read(f, as_version=4)
-                code_cells = [cell.source for cell in nb.cells if cell.cell_type == "code"]
-                return "\n\n".join(code_cells)
+                with open(file_path, "rb", buffering=NOTEBOOK_READ_BUFFER) as f:
+                    return _notebook_code(f.read())
             except Exception as e:
                 print(f"Failed to read notebook {file_path}: {e}")
                 return ""
@@ -102,28 +230,25 @@ class RepoLoader:
                     continue
             return ""
 
-        documents = []
-        for root, dirs, files in os.walk(repo_path):
-            # Skip hidden/unwanted directories in-place for efficiency
-            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
-            for file in files:
-                file_path = os.path.join(root, file)
+        # Pass 1: a single walk collects the files to load (each file is visited once)
+        file_paths = list(_iter_files(repo_path))
 
-                if not is_valid_file(file_path):
-                    continue
+        # Notebooks are parsed concurrently; plain files are read inline below
+        notebook_paths = [path for path in file_paths if path.lower().endswith(".ipynb")]
+        notebook_code = {}
+        if len(notebook_paths) > 1:
+            with ThreadPoolExecutor(max_workers=min(NOTEBOOK_WORKERS, len(notebook_paths))) as pool:
+                notebook_code = dict(zip(notebook_paths, pool.map(notebook_to_code, notebook_paths)))
 
-                ext = Path(file_path).suffix.lower()
-
-                if ext == ".ipynb":
+        # Pass 2: read each collected file, in walk order
+        for file_path in file_paths:
+            if file_path.lower().endswith(".ipynb"):
+                content = notebook_code.get(file_path)
+                if content is None:
                     content = notebook_to_code(file_path)
-                    if content.strip():
-                        documents.append(Document(page_content=content, metadata={"source": file_path}))
-                else:
-                    content = read_file_safe(file_path)
-                    if content.strip():
-                        documents.append(Document(page_content=content, metadata={"source": file_path}))
-
-        print(f"Loaded {len(documents)} documents from {repo_path}")
-        return documents
+            else:
+                content = read_file_safe(file_path)
+            if content.strip():
+                yield Document(page_content=content, metadata={"source": file_path})
     
 
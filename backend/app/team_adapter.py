@@ -1,10 +1,13 @@
 """
 Adapter to convert preprocessor output to GraphFlow format
 """
-import json
+import hashlib
 from pathlib import Path
 from typing import Dict, Any
 
+import orjson
+from embeddings import save_store  # repo-processing is on sys.path wherever this module is used
+
 # Absolute base path for project data
 _BASE_DATA_DIR = Path(__file__).parent / "data" / "projects"
 
@@ -55,6 +58,26 @@ def create_graphflow_context(
     return context
 
 
+def _content_hash(context: Dict[str, Any], faiss_store) -> str:
+    """
+    Fingerprint of what save_for_graphflow writes: the context plus the indexed sections
+    (text and source, in index order), so a re-preprocessed repo with changed code never
+    matches a stale vector store.
+    """
+    digest = hashlib.sha256(orjson.dumps(context, option=orjson.OPT_SORT_KEYS))
+    docstore = getattr(faiss_store, "docstore", None)
+    index_to_id = getattr(faiss_store, "index_to_docstore_id", None)
+    if docstore is None or index_to_id is None:
+        return ""  # unknown store type: never treat as unchanged
+    for position in range(len(index_to_id)):
+        doc = docstore.search(index_to_id[position])
+        digest.update(b"\0")
+        digest.update(doc.page_content.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+        digest.update(str(doc.metadata.get("source", "")).encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
 def save_for_graphflow(
     project_id: str,
     repo_analysis: Dict[str, Any],
@@ -104,17 +127,33 @@ def save_for_graphflow(
     )
     
     context_path = project_dir / "context.json"
+    vector_store_path = project_dir / "vector_store"
+    hash_path = project_dir / ".context_hash"
+    content_hash = _content_hash(context, faiss_store)
+    
+    # Unchanged since the last save (e.g. reprocessing the same repo): keep the files on disk
+    try:
+        unchanged = bool(content_hash) and hash_path.read_text(encoding="utf-8") == content_hash
+    except OSError:
+        unchanged = False
+    if (unchanged and context_path.exists()
+            and (vector_store_path / "index.faiss").exists() and (vector_store_path / "index.pkl").exists()):
+        print(f"✅ context.json and FAISS index unchanged, skipped saving ({project_dir})")
+        return str(project_dir)
+    
+    # Drop the old hash first so an interrupted save can't leave a matching hash behind
+    hash_path.unlink(missing_ok=True)
+    
     try:
-        with open(context_path, 'w', encoding='utf-8') as f:
-            json.dump(context, f, indent=2)
+        with open(context_path, 'wb') as f:
+            f.write(orjson.dumps(context, option=orjson.OPT_INDENT_2))
         print(f"✅ Saved context.json to {context_path}")
     except IOError as e:
         raise IOError(f"Failed to save context.json: {str(e)}")
     
     # 2. Save FAISS vector store
-    vector_store_path = project_dir / "vector_store"
     try:
-        faiss_store.save_local(str(vector_store_path))
+        save_store(faiss_store, str(vector_store_path))
         print(f"✅ Saved FAISS index to {vector_store_path}")
     except Exception as e:
         raise IOError(f"Failed to save FAISS store: {str(e)}")
@@ -129,6 +168,9 @@ def save_for_graphflow(
     if not faiss_index.exists() or not faiss_pkl.exists():
         raise IOError("FAISS index files missing (index.faiss or index.pkl)")
     
+    if content_hash:
+        hash_path.write_text(content_hash, encoding="utf-8")
+    
     print(f"\n✅ GraphFlow integration ready!")
     print(f"   Project ID: {project_id}")
     print(f"   Location: {project_dir.absolute()}")
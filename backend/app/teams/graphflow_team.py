@@ -7,17 +7,21 @@ from autogen_agentchat.teams import DiGraphBuilder, GraphFlow
 from autogen_agentchat.messages import TextMessage
 from autogen_core import CancellationToken
 from typing import Dict, Any, Optional, List
+import asyncio
+import hashlib
 import json
+import logging
+import mmap
+import orjson
+import os
+import re
+import threading
 import time
+import weakref
+from collections import OrderedDict
 from pathlib import Path
 
-from app.agents.coordinator_agent import create_coordinator_agent
-from app.agents.semantic_agent import create_semantic_query_agent
-from app.agents.best_practice_agent import create_best_practice_agent
-from app.agents.sde_writer_agent import create_sde_writer_agent
-from app.agents.pm_writer_agent import create_pm_writer_agent
-from app.agents.qa_agent import create_qa_agent
-from app.agents.utils import search_code
+from app.agents.utils import search_code_batch
 from app.models.schemas import (
     CoordinatorOutput,
     SemanticQueryOutput,
@@ -29,6 +33,155 @@ from app.models.schemas import (
 )
 from app.config.analysis_config import AnalysisConfig, load_config
 
+# Progress output goes through logging; main.py routes it through a queue listener
+# thread so writing to the console never blocks the event loop mid-stream
+logger = logging.getLogger(__name__)
+
+_FENCED_JSON_RE = re.compile(r"```(?:json|JSON)?\s*(\{.*?\})\s*```", re.DOTALL)
+_JSON_DECODER = json.JSONDecoder()
+
+# Searches run up front so the coordinator starts with concrete code context
+_INITIAL_SEARCH_QUERIES = (
+    "main entrypoint application startup",
+    "API routes endpoints handlers",
+    "database models schemas entities",
+    "configuration settings environment"
+)
+
+_INITIAL_TASK_TEMPLATE = """Analyze this codebase project:
+
+**Project ID**: {project_id}
+
+**Analysis Configuration**:
+- Selected Reports: {personas}
+- Analysis Depth: {depth}
+- Verbosity: {verbosity}
+- Features Enabled: {features}
+
+**Project Metadata**:
+- Primary Language: {primary_language}
+- Total Files: {total_files}
+- Frameworks: {frameworks}
+
+**Initial Code Search Results**:
+{search_results}
+
+Coordinate a comprehensive codebase analysis through the pipeline."""
+
+# Below this size a plain read is cheaper than setting up a mapping
+MMAP_MIN_BYTES = 64 * 1024
+
+
+def load_json_file(path: Path) -> Any:
+    """
+    Parse a JSON file with orjson.
+    
+    Large files are parsed straight from a read-only memory map, so the pages
+    are demand-loaded and no intermediate bytes copy of the file is made.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        try:
+            if size < MMAP_MIN_BYTES:
+                return orjson.loads(f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {path}: {e}") from e
+
+# Parsed context.json per project, reused while the file is unchanged
+CONTEXT_CACHE_SIZE = 32
+_context_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_context_cache_lock = threading.Lock()
+
+
+def load_project_context(path: Path) -> Dict[str, Any]:
+    """
+    Load a project's context.json, reusing the parsed dict while the file's
+    mtime and size are unchanged. The returned dict is shared; don't mutate it.
+    """
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _context_cache_lock:
+        entry = _context_cache.get(key)
+        if entry is not None and entry[0] == stamp:
+            _context_cache.move_to_end(key)
+            return entry[1]
+    
+    context = load_json_file(path)
+    with _context_cache_lock:
+        _context_cache[key] = (stamp, context)
+        _context_cache.move_to_end(key)
+        while len(_context_cache) > CONTEXT_CACHE_SIZE:
+            _context_cache.popitem(last=False)
+    return context
+
+# Agent source -> (display name, frontend status message, progress percent)
+_SOURCE_META = {
+    'coordinator_agent': ("Coordinator Agent", "Planning analysis strategy...", 10),
+    'semantic_query_agent': ("Semantic Query Agent", "Analyzing code structure...", 25),
+    'best_practice_agent': ("Best Practice Agent", "Searching for best practices...", 40),
+    'sde_writer_agent': ("SDE Writer Agent", "Generating technical documentation...", 60),
+    'pm_writer_agent': ("PM Writer Agent", "Creating product documentation...", 60),
+    'qa_agent': ("QA Agent", "Validating analysis quality...", 85),
+}
+
+# Agent source -> (output schema, results key)
+_OUTPUT_SCHEMAS = {
+    'coordinator_agent': (CoordinatorOutput, 'coordinator'),
+    'semantic_query_agent': (SemanticQueryOutput, 'semantic'),
+    'best_practice_agent': (BestPracticeOutput, 'best_practices'),
+    'sde_writer_agent': (SDEOutput, 'sde'),
+    'pm_writer_agent': (PMOutput, 'pm'),
+    'qa_agent': (QAOutput, 'qa'),
+}
+
+# AnalysisResult report field -> agent_results key holding its dumped dict
+_REPORT_FIELDS = {
+    'coordinator_output': 'coordinator',
+    'semantic_analysis': 'semantic',
+    'best_practices': 'best_practices',
+    'sde_report': 'sde',
+    'pm_report': 'pm',
+    'qa_report': 'qa',
+}
+
+# Built teams are reused by later runs with the same config and personas.
+# GraphFlow's internal queues bind to the event loop they first ran on, so pools
+# are kept per loop, and a team is checked out for the length of a run so
+# concurrent analyses never share one.
+TEAM_POOL_SIZE = 8
+_team_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, OrderedDict]" = weakref.WeakKeyDictionary()
+
+
+def _team_key(config_dict: Dict[str, Any], personas: List[str]) -> tuple:
+    config_hash = hashlib.blake2b(
+        orjson.dumps(config_dict, option=orjson.OPT_SORT_KEYS), digest_size=16
+    ).hexdigest()
+    return config_hash, tuple(sorted(set(personas)))
+
+
+def _checkout_team(key: tuple) -> Optional[GraphFlow]:
+    pool = _team_pools.get(asyncio.get_running_loop())
+    if not pool or not pool.get(key):
+        return None
+    pool.move_to_end(key)
+    return pool[key].pop()
+
+
+async def _release_team(key: tuple, team: GraphFlow) -> None:
+    try:
+        await team.reset()
+    except Exception as e:
+        logger.warning("   ⚠️  Discarding team after failed reset: %s", e)
+        return
+    pool = _team_pools.setdefault(asyncio.get_running_loop(), OrderedDict())
+    pool.setdefault(key, []).append(team)
+    pool.move_to_end(key)
+    while len(pool) > TEAM_POOL_SIZE:
+        pool.popitem(last=False)
+
 
 class GraphFlowCoordinator:
     
@@ -47,6 +200,10 @@ class GraphFlowCoordinator:
         
         # Load or use provided config
         self.config = config if config else load_config(project_id)
+        # AnalysisConfig is frozen, so its dump is taken once and reused for the
+        # task prompt, logs, team-pool key and both result paths
+        self._config_dict = self.config.model_dump()
+        self._features_dict = self._config_dict['features_enabled']
         
         # Load project context
         self.project_context = self._load_project_context()
@@ -74,8 +231,7 @@ class GraphFlowCoordinator:
                 f"Run preprocessing first for project {self.project_id}"
             )
         
-        with open(context_file, 'r') as f:
-            return json.load(f)
+        return load_project_context(context_file)
     
     def _build_graph(self):
         """
@@ -83,13 +239,19 @@ class GraphFlowCoordinator:
         
         Flow:
         Coordinator → Semantic → Best Practice → (SDE + PM) → QA
-        (Conditionally includes SDE and/or PM based on selected_personas)
+        (Conditionally includes SDE and/or PM based on selected_personas;
+        QA is left out when neither writer is selected)
         """
-        # Create all agents
+        # Agent factories are imported here (writers and QA only when needed) so importing
+        # this module for its schemas/helpers doesn't load every agent definition
+        from app.agents.coordinator_agent import create_coordinator_agent
+        from app.agents.semantic_agent import create_semantic_query_agent
+        from app.agents.best_practice_agent import create_best_practice_agent
+        
+        # Create the core agents
         coordinator = create_coordinator_agent(self.config)
         semantic_agent = create_semantic_query_agent(self.config)
         best_practice_agent = create_best_practice_agent(self.config)
-        qa_agent = create_qa_agent(self.config)
         
         # Build the directed graph
         builder = DiGraphBuilder()
@@ -98,36 +260,41 @@ class GraphFlowCoordinator:
         builder.add_node(coordinator)
         builder.add_node(semantic_agent)
         builder.add_node(best_practice_agent)
-        builder.add_node(qa_agent)
         
         # Sequential flow: Coordinator → Semantic → Best Practice
         builder.add_edge(coordinator, semantic_agent)
         builder.add_edge(semantic_agent, best_practice_agent)
         
         # Conditionally add writer agents based on selected personas
-        writer_agents = []
-        sde_writer = None
-        pm_writer = None
+        writers = []
         
         if "SDE" in self.selected_personas:
-            sde_writer = create_sde_writer_agent(self.config)
-            builder.add_node(sde_writer)
-            builder.add_edge(best_practice_agent, sde_writer)
-            builder.add_edge(sde_writer, qa_agent)
-            writer_agents.append("SDE")
+            from app.agents.sde_writer_agent import create_sde_writer_agent
+            writers.append(("SDE", create_sde_writer_agent(self.config)))
         
         if "PM" in self.selected_personas:
-            pm_writer = create_pm_writer_agent(self.config)
-            builder.add_node(pm_writer)
-            builder.add_edge(best_practice_agent, pm_writer)
-            builder.add_edge(pm_writer, qa_agent)
-            writer_agents.append("PM")
+            from app.agents.pm_writer_agent import create_pm_writer_agent
+            writers.append(("PM", create_pm_writer_agent(self.config)))
         
-        # If no writers selected, connect Best Practice directly to QA
-        if not writer_agents:
-            builder.add_edge(best_practice_agent, qa_agent)
+        for _, writer in writers:
+            builder.add_node(writer)
+            builder.add_edge(best_practice_agent, writer)
         
-        print(f"   Building graph with writers: {', '.join(writer_agents) if writer_agents else 'None'}")
+        all_agents = [coordinator, semantic_agent, best_practice_agent]
+        all_agents.extend(writer for _, writer in writers)
+        
+        if writers:
+            logger.info("   Building graph with writers: %s", ', '.join(name for name, _ in writers))
+            
+            # QA validates the writer reports, so it only runs when there are some
+            from app.agents.qa_agent import create_qa_agent
+            qa_agent = create_qa_agent(self.config)
+            builder.add_node(qa_agent)
+            for _, writer in writers:
+                builder.add_edge(writer, qa_agent)
+            all_agents.append(qa_agent)
+        else:
+            logger.warning("   ⚠️  No writers selected, skipping QA (graph ends at Best Practice)")
         
         # Set entry point
         builder.set_entry_point(coordinator)
@@ -135,14 +302,6 @@ class GraphFlowCoordinator:
         # Build and validate
         graph = builder.build()
         
-        # Build list of all agents that were actually added
-        all_agents = [coordinator, semantic_agent, best_practice_agent]
-        if "SDE" in self.selected_personas and sde_writer is not None:
-            all_agents.append(sde_writer)
-        if "PM" in self.selected_personas and pm_writer is not None:
-            all_agents.append(pm_writer)
-        all_agents.append(qa_agent)
-        
         # Create GraphFlow team with only the agents we added
         team = GraphFlow(
             all_agents,  # type: ignore
@@ -151,49 +310,27 @@ class GraphFlowCoordinator:
         
         return team
     
-    def _build_initial_task(self) -> str:
+    async def _build_initial_task(self) -> str:
         """Build the initial task prompt for the coordinator agent"""
         
-        # Perform initial vector searches
-        search_queries = [
-            "main entrypoint application startup",
-            "API routes endpoints handlers",
-            "database models schemas entities",
-            "configuration settings environment"
-        ]
-        
-        search_results = {}
-        for query in search_queries:
-            results = search_code(
-                query,
-                k=5,
-                vector_store_path=self.vector_store_path
-            )
-            search_results[query] = results
+        # One batched embedding request + FAISS searches, on the default executor
+        loop = asyncio.get_running_loop()
+        search_results = await loop.run_in_executor(
+            None, search_code_batch, _INITIAL_SEARCH_QUERIES, 5, self.vector_store_path
+        )
         
-        task = f"""Analyze this codebase project:
-
-**Project ID**: {self.project_id}
-
-**Analysis Configuration**:
-- Selected Reports: {', '.join(self.selected_personas)}
-- Analysis Depth: {self.config.depth}
-- Verbosity: {self.config.verbosity}
-
-**Project Metadata**:
-- Primary Language: {self.project_context.get('metadata', {}).get('primary_language', 'Unknown')}
-- Total Files: {len(self.project_context.get('files', []))}
-- Frameworks: {', '.join(self.project_context.get('metadata', {}).get('frameworks', []))}
-
-**Initial Code Search Results**:
-{json.dumps(search_results, indent=2)}
-
-**Analysis Configuration**:
-- Depth: {self.config.depth}
-- Verbosity: {self.config.verbosity}
-- Features Enabled: {self.config.features_enabled.model_dump()}
-
-Coordinate a comprehensive codebase analysis through the pipeline."""
+        metadata = self.project_context.get('metadata', {})
+        task = _INITIAL_TASK_TEMPLATE.format_map({
+            'project_id': self.project_id,
+            'personas': ', '.join(self.selected_personas),
+            'depth': self.config.depth,
+            'verbosity': self.config.verbosity,
+            'primary_language': metadata.get('primary_language', 'Unknown'),
+            'total_files': len(self.project_context.get('files', [])),
+            'frameworks': ', '.join(metadata.get('frameworks', [])),
+            'search_results': orjson.dumps(search_results, option=orjson.OPT_INDENT_2).decode(),
+            'features': self._features_dict,
+        })
         
         return task
     
@@ -206,107 +343,50 @@ Coordinate a comprehensive codebase analysis through the pipeline."""
         """
         start_time = time.time()
         
-        print(f"🚀 Starting GraphFlow analysis for project {self.project_id}")
-        print(f"   Config: {self.config.depth} depth, {self.config.verbosity} verbosity")
-        print(f"   Features: {self.config.features_enabled.model_dump()}")
+        logger.info("🚀 Starting GraphFlow analysis for project %s", self.project_id)
+        logger.info("   Config: %s depth, %s verbosity", self.config.depth, self.config.verbosity)
+        logger.info("   Features: %s", self._features_dict)
         
         try:
-            # Build the graph
-            team = self._build_graph()
+            # Reuse an idle team built for this config, or build the graph
+            team_key = _team_key(self._config_dict, self.selected_personas)
+            team = _checkout_team(team_key) or self._build_graph()
             
             # Build initial task
-            task = self._build_initial_task()
+            task = await self._build_initial_task()
             
-            print("\n📊 Executing GraphFlow pipeline...")
-            print("   Coordinator → Semantic → Best Practice → (SDE + PM) → QA")
+            logger.info("\n📊 Executing GraphFlow pipeline...")
+            logger.info("   Coordinator → Semantic → Best Practice → (SDE + PM) → QA")
             
-            # Run the workflow
-            result_messages = []
+            # Run the workflow; each agent's output is parsed as soon as its
+            # message arrives rather than buffering the whole stream
+            outputs: Dict[str, Any] = {}
             last_source = None
             
             async for message in team.run_stream(task=task):
-                # Collect all messages from the workflow
-                result_messages.append(message)
+                # The final TaskResult carries no source and only repeats the messages
+                if not hasattr(message, 'source'):
+                    continue
                 
                 # Log when each agent starts (detect source change)
-                if hasattr(message, 'source'):
-                    current_source = message.source
-                    if current_source != last_source and current_source not in ['user', 'unknown']:
-                        agent_name = current_source.replace('_', ' ').title()
-                        print(f"   🔄 {agent_name} started...")
+                current_source = message.source
+                if current_source != last_source and current_source not in ['user', 'unknown']:
+                    meta = _SOURCE_META.get(current_source)
+                    if meta:
+                        logger.info("   🔄 %s started...", meta[0])
                         
                         # Update status for frontend
                         if self.status_callback:
-                            if current_source == 'coordinator_agent':
-                                self.status_callback("Planning analysis strategy...", 10)
-                            elif current_source == 'semantic_query_agent':
-                                self.status_callback("Analyzing code structure...", 25)
-                            elif current_source == 'best_practice_agent':
-                                self.status_callback("Searching for best practices...", 40)
-                            elif current_source == 'sde_writer_agent':
-                                self.status_callback("Generating technical documentation...", 60)
-                            elif current_source == 'pm_writer_agent':
-                                self.status_callback("Creating product documentation...", 60)
-                            elif current_source == 'qa_agent':
-                                self.status_callback("Validating analysis quality...", 85)
-                        
-                        last_source = current_source
-            
-            # Extract outputs from messages
-            coordinator_output = None
-            semantic_output = None
-            best_practice_output = None
-            sde_output = None
-            pm_output = None
-            qa_output = None
-            
-            for msg in result_messages:
-                content = msg.content if hasattr(msg, 'content') else str(msg)
-                source = msg.source if hasattr(msg, 'source') else 'unknown'
-                
-                # Skip user messages and non-agent sources
-                if source in ['user', 'unknown']:
-                    continue
-                
-                # Skip empty messages
-                if not content or not content.strip():
-                    continue
-                
-                try:
-                    # Try to parse JSON from message
-                    json_data = self._extract_json(content)
-                    
-                    if source == 'coordinator_agent':
-                        print(f"   ✅ Coordinator Agent completed")
-                        coordinator_output = CoordinatorOutput(**json_data)
-                        self.results['coordinator'] = coordinator_output.model_dump()
-                    elif source == 'semantic_query_agent':
-                        print(f"   ✅ Semantic Query Agent completed")
-                        semantic_output = SemanticQueryOutput(**json_data)
-                        self.results['semantic'] = semantic_output.model_dump()
-                    elif source == 'best_practice_agent':
-                        print(f"   ✅ Best Practice Agent completed")
-                        best_practice_output = BestPracticeOutput(**json_data)
-                        self.results['best_practices'] = best_practice_output.model_dump()
-                    elif source == 'sde_writer_agent':
-                        print(f"   ✅ SDE Writer Agent completed")
-                        sde_output = SDEOutput(**json_data)
-                        self.results['sde'] = sde_output.model_dump()
-                    elif source == 'pm_writer_agent':
-                        print(f"   ✅ PM Writer Agent completed")
-                        pm_output = PMOutput(**json_data)
-                        self.results['pm'] = pm_output.model_dump()
-                    elif source == 'qa_agent':
-                        print(f"   ✅ QA Agent completed")
-                        qa_output = QAOutput(**json_data)
-                        self.results['qa'] = qa_output.model_dump()
+                            self.status_callback(meta[1], meta[2])
                     else:
-                        print(f"   ⚠️  Unknown agent source: {source}")
-                        
-                except Exception as e:
-                    error_detail = f"Failed to parse {source} output: {str(e)}"
-                    self.errors.append(error_detail)
-                    print(f"   ⚠️  {error_detail}")
+                        logger.info("   🔄 %s started...", current_source.replace('_', ' ').title())
+                    
+                    last_source = current_source
+                
+                self._dispatch_output(message, outputs)
+            
+            # Only a team that finished its run cleanly goes back to the pool
+            await _release_team(team_key, team)
             
             # Calculate execution time
             execution_time = time.time() - start_time
@@ -314,13 +394,13 @@ Coordinate a comprehensive codebase analysis through the pipeline."""
             # Build final result
             result = AnalysisResult(
                 project_id=self.project_id,
-                config_used=self.config.model_dump(),
-                coordinator_output=coordinator_output,
-                semantic_analysis=semantic_output,
-                best_practices=best_practice_output,
-                sde_report=sde_output,
-                pm_report=pm_output,
-                qa_report=qa_output,
+                config_used=self._config_dict,
+                coordinator_output=outputs.get('coordinator'),
+                semantic_analysis=outputs.get('semantic'),
+                best_practices=outputs.get('best_practices'),
+                sde_report=outputs.get('sde'),
+                pm_report=outputs.get('pm'),
+                qa_report=outputs.get('qa'),
                 agent_results=self.results,
                 execution_time_seconds=round(execution_time, 2),
                 success=len(self.errors) == 0,
@@ -328,11 +408,11 @@ Coordinate a comprehensive codebase analysis through the pipeline."""
             )
             
             # Save result
-            self._save_result(result)
+            await self._save_result(result)
             
-            print(f"\n✅ GraphFlow analysis complete in {execution_time:.2f}s")
+            logger.info("\n✅ GraphFlow analysis complete in %.2fs", execution_time)
             if self.errors:
-                print(f"⚠️  {len(self.errors)} errors occurred")
+                logger.warning("⚠️  %d errors occurred", len(self.errors))
             
             return result
             
@@ -341,17 +421,46 @@ Coordinate a comprehensive codebase analysis through the pipeline."""
             error_msg = f"GraphFlow analysis failed: {str(e)}"
             self.errors.append(error_msg)
             
-            print(f"\n❌ {error_msg}")
+            logger.error("\n❌ %s", error_msg)
             
             return AnalysisResult(
                 project_id=self.project_id,
-                config_used=self.config.model_dump(),
+                config_used=self._config_dict,
                 agent_results=self.results,
                 execution_time_seconds=round(execution_time, 2),
                 success=False,
                 errors=self.errors
             )
     
+    def _dispatch_output(self, message: Any, outputs: Dict[str, Any]):
+        """Parse one streamed agent message into its output schema."""
+        content = getattr(message, 'content', None)
+        source = message.source
+        
+        # Skip user messages, non-agent sources and empty/non-text messages
+        if source in ['user', 'unknown']:
+            return
+        if not isinstance(content, str) or not content.strip():
+            return
+        
+        target = _OUTPUT_SCHEMAS.get(source)
+        if target is None:
+            logger.warning("   ⚠️  Unknown agent source: %s", source)
+            return
+        schema_cls, key = target
+        
+        try:
+            output = schema_cls.model_validate(self._extract_json(content))
+        except Exception as e:
+            error_detail = f"Failed to parse {source} output: {str(e)}"
+            self.errors.append(error_detail)
+            logger.warning("   ⚠️  %s", error_detail)
+            return
+        
+        logger.info("   ✅ %s completed", _SOURCE_META[source][0])
+        outputs[key] = output
+        self.results[key] = output.model_dump()
+    
     def _extract_json(self, content: str) -> Dict[str, Any]:
         """
         Extract JSON from agent response.
@@ -365,64 +474,61 @@ Coordinate a comprehensive codebase analysis through the pipeline."""
         
         # Try direct parse first
         try:
-            return json.loads(content)
-        except json.JSONDecodeError:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
             pass
         
-        # Look for JSON in code blocks
-        if "```json" in content:
-            start = content.find("```json") + 7
-            end = content.find("```", start)
-            if end > start:
-                json_str = content[start:end].strip()
-                try:
-                    return json.loads(json_str)
-                except json.JSONDecodeError:
-                    pass
-        
-        if "```" in content:
-            start = content.find("```") + 3
-            end = content.find("```", start)
-            if end > start:
-                json_str = content[start:end].strip()
-                # Remove language identifier if present (e.g., "json\n{...}")
-                if json_str.startswith(('json', 'JSON')):
-                    json_str = json_str[4:].strip()
-                try:
-                    return json.loads(json_str)
-                except json.JSONDecodeError:
-                    pass
-        
-        # Try to find JSON object (look for balanced braces)
+        # Fenced block (```json ... ``` or bare ```), captured in one regex pass
+        match = _FENCED_JSON_RE.search(content)
+        if match:
+            try:
+                return orjson.loads(match.group(1))
+            except orjson.JSONDecodeError:
+                pass
+        
+        # Bare object inside surrounding prose; raw_decode stops at the matching
+        # closing brace, including braces that appear inside string values
         start = content.find("{")
         if start != -1:
-            # Find matching closing brace
-            brace_count = 0
-            end = start
-            for i in range(start, len(content)):
-                if content[i] == '{':
-                    brace_count += 1
-                elif content[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end = i + 1
-                        break
-            
-            if end > start:
-                json_str = content[start:end]
-                try:
-                    return json.loads(json_str)
-                except json.JSONDecodeError:
-                    pass
+            try:
+                return _JSON_DECODER.raw_decode(content, start)[0]
+            except json.JSONDecodeError:
+                pass
         
         raise ValueError(f"No valid JSON found in content (first 200 chars): {content[:200]}")
     
-    def _save_result(self, result: AnalysisResult):
+    def _result_payload(self, result: AnalysisResult) -> Dict[str, Any]:
+        """
+        Dump the result for saving.
+        
+        Each report was already dumped into agent_results when it was parsed,
+        so those dicts are reused instead of walking the nested models again.
+        """
+        dumped = result.model_dump(mode="json", exclude=set(_REPORT_FIELDS) | {"agent_results"})
+        payload: Dict[str, Any] = {}
+        for name in AnalysisResult.model_fields:
+            if name in _REPORT_FIELDS:
+                present = getattr(result, name) is not None
+                payload[name] = result.agent_results.get(_REPORT_FIELDS[name]) if present else None
+            elif name == "agent_results":
+                payload[name] = result.agent_results
+            else:
+                payload[name] = dumped[name]
+        return payload
+    
+    async def _save_result(self, result: AnalysisResult):
         """Save analysis result to file"""
         output_file = self.project_dir / "analysis_result.json"
-        with open(output_file, 'w') as f:
-            json.dump(result.model_dump(), f, indent=2)
-        print(f"\n💾 Results saved to {output_file}")
+        # Dump + write on the default executor so a large report doesn't stall the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write_result, output_file, result)
+        logger.info("\n💾 Results saved to %s", output_file)
+    
+    def _write_result(self, output_file: Path, result: AnalysisResult):
+        # orjson over model_dump_json: measurably faster on the large nested report models
+        payload = orjson.dumps(self._result_payload(result), option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        with open(output_file, 'wb', buffering=1 << 16) as f:
+            f.write(payload)
 
 
 # ============================================================================
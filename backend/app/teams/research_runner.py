@@ -3,23 +3,244 @@ Research-Style Analysis Runner
 ChatGPT Research mode for codebase analysis
 """
 
-from typing import Dict, Any, Optional, List
+from autogen_agentchat.teams import DiGraphBuilder, GraphFlow
+from autogen_core import CancellationToken
+from typing import Dict, Any, Optional, List, Set
 import json
 import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import orjson
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 from app.models.schemas import AnalysisResult
-from app.models.run_state import AnalysisRun, RunStatus, AgentStep
+from app.models.run_state import AnalysisRun, RunStatus, AgentStep, AGENT_DEPENDENCIES
 from app.config.analysis_config import AnalysisConfig
-from app.teams.graphflow_team import GraphFlowCoordinator
-from app.agents.utils import search_code
+from app.teams.graphflow_team import GraphFlowCoordinator, load_project_context
+from app.agents.utils import search_code, search_code_batch
+
+logger = logging.getLogger(__name__)
+
+# Agent name -> step index, in pipeline order (matches the run's default steps)
+AGENT_TO_STEP: Dict[str, int] = {name: index for index, name in enumerate(AGENT_DEPENDENCIES)}
+
+# Checkpoint database in each project's runs/ directory
+RUNS_DB_NAME = "runs.db"
+
+# Checkpoint rows are zstd-compressed JSON when zstandard is installed; rows
+# starting with the zstd frame magic are decompressed on load, others are plain JSON
+CHECKPOINT_ZSTD_LEVEL = 3
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _encode_checkpoint(data: Dict[str, Any]) -> bytes:
+    blob = orjson.dumps(data, default=str)
+    if zstandard is None:
+        return blob
+    # A fresh compressor per call: ZstdCompressor instances are not thread-safe
+    return zstandard.ZstdCompressor(level=CHECKPOINT_ZSTD_LEVEL).compress(blob)
+
+
+def _decode_checkpoint(blob: bytes) -> Dict[str, Any]:
+    if blob[:4] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError(
+                "This checkpoint is zstd-compressed; install zstandard to read it "
+                "(runs.db was written by an install that had it)"
+            )
+        blob = zstandard.ZstdDecompressor().decompress(blob)
+    return orjson.loads(blob)
+
+# ask_question keywords, one named group per route
+_QUESTION_ROUTER = re.compile(
+    r"(?P<current>analyzing|working on)|(?P<progress>progress|status)|(?P<results>results|found)",
+    re.IGNORECASE,
+)
+
+# Strong refs to running pipeline tasks so they aren't garbage collected mid-run
+_TASK_REGISTRY: Set[asyncio.Task] = set()
+
+# Store pause events globally so different ResearchRunner instances can communicate
+_pause_events: Dict[str, asyncio.Event] = {}
+
+# Checkpoint writes during pipeline execution run here, off the event loop;
+# one worker so a later checkpoint can never land before an earlier one
+_checkpoint_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+
+
+def _report_checkpoint_error(future: Future):
+    error = future.exception()
+    if error is not None:
+        logger.warning("⚠️  Failed to write run checkpoint: %s", error)
+
+
+def _dump_truncated(output: Any, limit: int) -> str:
+    """
+    Indented JSON of output, cut to limit characters.
+    
+    Dict outputs are serialized one top-level key at a time and stop once the
+    budget is spent, so a large report isn't dumped in full only to be cut.
+    """
+    if isinstance(output, dict) and output:
+        text = "{\n"
+        for key, value in output.items():
+            if len(text) > limit:
+                break
+            # Nested lines sit one level deeper than the top-level keys
+            value_text = orjson.dumps(value, option=orjson.OPT_INDENT_2, default=str).decode().replace("\n", "\n  ")
+            text += f"  {orjson.dumps(str(key)).decode()}: {value_text},\n"
+        else:
+            text = text[:-2] + "\n}"
+    else:
+        text = orjson.dumps(output, option=orjson.OPT_INDENT_2, default=str).decode()
+    
+    if len(text) > limit:
+        text = text[:limit] + "...\n(truncated)"
+    return text
 
-# Store running tasks globally to prevent cancellation
-_running_tasks: Dict[str, asyncio.Task] = {}
 
-# Store pause flags globally so different ResearchRunner instances can communicate
-_pause_flags: Dict[str, bool] = {}
+class RunStore:
+    """
+    SQLite checkpoint store for one project's runs.
+    
+    A run is one row in `runs` (everything except its steps) plus one row per
+    step in `steps`, so a checkpoint rewrites the small run row and only the
+    steps that changed since the previous one instead of the whole document.
+    WAL journal with synchronous=NORMAL: each checkpoint is a short append.
+    """
+    
+    def __init__(self, path: Path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, project_id TEXT NOT NULL, "
+            "status TEXT NOT NULL, started_at TEXT, updated_at REAL NOT NULL, data BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS steps (run_id TEXT NOT NULL, step_index INTEGER NOT NULL, "
+            "status TEXT NOT NULL, updated_at REAL NOT NULL, data BLOB NOT NULL, "
+            "PRIMARY KEY (run_id, step_index))"
+        )
+    
+    @staticmethod
+    def snapshot(run: AnalysisRun):
+        """Serialize the run row and its changed steps; call on the thread that mutates the run."""
+        now = time.time()
+        header = run.header_dict()
+        run_row = (run.run_id, run.project_id, header["status"], header["started_at"], now,
+                   _encode_checkpoint(header))
+        step_rows = [
+            (run.run_id, index, run.steps[index].status, now, _encode_checkpoint(run.steps[index].to_dict()))
+            for index in run.take_dirty_steps()
+        ]
+        return run_row, step_rows
+    
+    def write(self, snapshot):
+        run_row, step_rows = snapshot
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, project_id, status, started_at, updated_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)", run_row
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO steps (run_id, step_index, status, updated_at, data) "
+                "VALUES (?, ?, ?, ?, ?)", step_rows
+            )
+    
+    def load(self, run_id: str) -> Optional[AnalysisRun]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            step_rows = self._conn.execute(
+                "SELECT data FROM steps WHERE run_id = ? ORDER BY step_index", (run_id,)
+            ).fetchall()
+        data = _decode_checkpoint(row[0])
+        if step_rows:
+            data["steps"] = [_decode_checkpoint(step_row[0]) for step_row in step_rows]
+            # Intermediate outputs are the completed steps' outputs; not stored twice
+            data["intermediate_outputs"] = {
+                step["agent_name"]: step["output"]
+                for step in data["steps"] if step["status"] == "completed" and step.get("output") is not None
+            }
+        run = AnalysisRun.from_dict(data)
+        run.take_dirty_steps()  # everything loaded is already on disk
+        return run
+    
+    def latest_run_id(self) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT run_id FROM runs ORDER BY updated_at DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+
+# One store (and connection) per runs/ directory, shared by every runner for that project
+_run_stores: Dict[str, RunStore] = {}
+_run_stores_lock = threading.Lock()
+
+
+def _get_run_store(runs_dir: Path) -> RunStore:
+    key = str(runs_dir.resolve())
+    with _run_stores_lock:
+        store = _run_stores.get(key)
+        if store is None:
+            store = _run_stores[key] = RunStore(runs_dir / RUNS_DB_NAME)
+        return store
+
+
+class CheckpointFlusher:
+    """
+    Coalesces run checkpoint writes during pipeline execution.
+    
+    The first few transitions are written immediately (fast feedback), later ones
+    at most every `interval` seconds or every `max_pending` transitions, whichever
+    comes first. pause/complete/fail paths call flush() to write right away.
+    """
+    
+    def __init__(self, save, run: AnalysisRun, immediate: int = 2, interval: float = 0.5, max_pending: int = 10):
+        self._save = save
+        self._run = run
+        self.immediate = immediate
+        self.interval = interval
+        self.max_pending = max_pending
+        self._transitions = 0
+        self._pending = 0
+        self._last_flush = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+    
+    def notify(self):
+        """Record a state transition; write now or schedule a deferred write."""
+        self._transitions += 1
+        self._pending += 1
+        if (self._transitions <= self.immediate
+                or self._pending >= self.max_pending
+                or time.monotonic() - self._last_flush >= self.interval):
+            self.flush()
+        elif self._timer is None:
+            delay = self.interval - (time.monotonic() - self._last_flush)
+            self._timer = asyncio.get_running_loop().call_later(delay, self.flush)
+    
+    def flush(self):
+        """Write the run state now, cancelling any scheduled write."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._save(self._run)
+        self._pending = 0
+        self._last_flush = time.monotonic()
 
 
 class ResearchRunner:
@@ -42,6 +263,7 @@ class ResearchRunner:
         # Run state storage
         self.runs_dir = self.project_dir / "runs"
         self.runs_dir.mkdir(exist_ok=True)
+        self.run_store = _get_run_store(self.runs_dir)
         
         # Current run
         self.current_run: Optional[AnalysisRun] = None
@@ -49,6 +271,10 @@ class ResearchRunner:
         # GraphFlow coordinator
         self.coordinator: Optional[GraphFlowCoordinator] = None
         
+        # Agents built for this config, kept across pause/resume cycles
+        self._agents: Dict[str, Any] = {}
+        self._agents_config: Optional[AnalysisConfig] = None
+        
         # Pause control
         self._pause_requested = False
     
@@ -66,25 +292,31 @@ class ResearchRunner:
         self.current_run = run
         self._save_run(run)
         
-        print(f"🔬 Research Analysis Started: {run.run_id}")
-        print(f"   Project: {self.project_id}")
-        print(f"   Pipeline: {len(run.steps)} agents")
+        logger.info("🔬 Research Analysis Started: %s", run.run_id)
+        logger.info("   Project: %s", self.project_id)
+        logger.info("   Pipeline: %d agents", len(run.steps))
         
-        # Initialize pause flag
-        _pause_flags[run.run_id] = False
+        # Initialize pause event
+        _pause_events[run.run_id] = asyncio.Event()
         
-        # Start execution in background - store task to prevent cancellation
-        task = asyncio.create_task(self._execute_pipeline())
-        _running_tasks[run.run_id] = task
-        
-        # Clean up task when done
-        def cleanup_task(t):
-            _running_tasks.pop(run.run_id, None)
-            _pause_flags.pop(run.run_id, None)
-        task.add_done_callback(cleanup_task)
+        # Start execution in background
+        self._start_pipeline_task(run.run_id)
         
         return run
     
+    def _start_pipeline_task(self, run_id: str):
+        """Run the pipeline as a background task, registered until it finishes."""
+        task = asyncio.create_task(self._execute_pipeline())
+        _TASK_REGISTRY.add(task)
+        task.add_done_callback(_TASK_REGISTRY.discard)
+        
+        # Drop this cycle's pause event only; a resume may already have installed the next one
+        pause_event = _pause_events.get(run_id)
+        def cleanup_pause_event(t):
+            if _pause_events.get(run_id) is pause_event:
+                _pause_events.pop(run_id, None)
+        task.add_done_callback(cleanup_pause_event)
+    
     async def _execute_pipeline(self):
         """
         Execute the agent pipeline using GraphFlowCoordinator.
@@ -96,121 +328,100 @@ class ResearchRunner:
             return
         
         run_id = self.current_run.run_id
+        flusher = CheckpointFlusher(self._save_run_in_background, self.current_run)
+        pause_event = _pause_events.setdefault(run_id, asyncio.Event())
         
         try:
-            # Create GraphFlow coordinator
-            print(f"🔬 Initializing GraphFlow coordinator...")
-            self.coordinator = GraphFlowCoordinator(self.project_id, self.config)
+            # Create GraphFlow coordinator (kept across resumes while the config is unchanged)
+            if self.coordinator is None or self.coordinator.config != self.config:
+                logger.info("🔬 Initializing GraphFlow coordinator...")
+                self.coordinator = GraphFlowCoordinator(self.project_id, self.config)
             
             # Determine which agents need to run
             completed_steps = [step.agent_name for step in self.current_run.steps if step.status == "completed"]
             
             if completed_steps:
-                print(f"📋 Resume mode: {len(completed_steps)} agents already completed")
-                print(f"   Completed: {', '.join(completed_steps)}")
+                logger.info("📋 Resume mode: %d agents already completed", len(completed_steps))
+                logger.info("   Completed: %s", ', '.join(completed_steps))
             
-            print(f"▶️  Starting analysis pipeline...")
+            logger.info("▶️  Starting analysis pipeline...")
             
             # Build graph and task
             team = self._build_partial_graph(completed_steps)
             task = self._build_resume_task(completed_steps)
             
-            # Map agent names to step indices
-            agent_to_step = {
-                'coordinator_agent': 0,
-                'semantic_query_agent': 1,
-                'best_practice_agent': 2,
-                'sde_writer_agent': 3,
-                'pm_writer_agent': 4,
-                'qa_agent': 5
-            }
-            
-            # Collect all messages
-            result_messages = []
+            # Agents may carry conversation state from a previous cycle; start them clean
+            await team.reset()
             
             # Run pipeline and save progress after each agent completes
-            async for message in team.run_stream(task=task):
-                # Check for pause request using global flag
-                if _pause_flags.get(run_id, False):
-                    print("⏸️  Pause request detected, stopping pipeline...")
-                    self.current_run.pause()
-                    self._save_run(self.current_run)
-                    _pause_flags[run_id] = False
-                    return
-                
-                result_messages.append(message)
-                
-                # Update progress when an agent completes
-                if hasattr(message, 'source'):
+            # On pause the stream is abandoned mid-run; cancelling and closing it stops the
+            # team's runtime before returning, so it can't keep driving the cached agents
+            # that the resumed team reuses
+            cancellation = CancellationToken()
+            stream = team.run_stream(task=task, cancellation_token=cancellation)
+            try:
+                async for message in stream:
+                    # Check for pause request using global event
+                    if pause_event.is_set():
+                        logger.info("⏸️  Pause request detected, stopping pipeline...")
+                        self.current_run.pause()
+                        flusher.flush()
+                        pause_event.clear()
+                        return
+                    
+                    # Update progress when an agent completes
                     agent_name = getattr(message, 'source', None)
                     content = getattr(message, 'content', None)
                     
-                    if agent_name in agent_to_step and content:
-                        step_index = agent_to_step[agent_name]
+                    if agent_name in AGENT_TO_STEP and content:
+                        step_index = AGENT_TO_STEP[agent_name]
                         
-                        # Extract basic output info
-                        output_preview = {
-                            "agent": agent_name,
-                            "completed": True,
-                            "content_preview": str(content)[:200] if content else "No content"
-                        }
+                        # Parse the agent's JSON once, as it arrives, using the coordinator's
+                        # parsing logic; outputs stay plain dicts, nothing downstream re-wraps
+                        # them in schema models. Unparseable output keeps a short preview.
+                        try:
+                            output = self.coordinator._extract_json(content)
+                        except Exception as e:
+                            logger.warning("   ⚠️  Failed to parse %s output: %s", agent_name, e)
+                            output = {
+                                "agent": agent_name,
+                                "completed": True,
+                                "content_preview": str(content)[:200]
+                            }
                         
-                        # Mark step as completed
-                        self.current_run.mark_step_completed(step_index, output_preview)
-                        self._save_run(self.current_run)
-                        print(f"   ✅ {agent_name} completed (progress saved)")
+                        # Mark step as completed and start the agents it unblocks;
+                        # a repeated identical output has nothing new to checkpoint
+                        if self.current_run.advance_step(step_index, output):
+                            flusher.notify()
+                        logger.debug("   ✅ %s completed (progress saved)", agent_name)
                         
-                        # Check for pause after each agent completes using global flag
-                        if _pause_flags.get(run_id, False):
-                            print(f"⏸️  Pausing after {agent_name}...")
+                        # Check for pause after each agent completes using global event
+                        if pause_event.is_set():
+                            logger.info("⏸️  Pausing after %s...", agent_name)
                             self.current_run.pause()
-                            self._save_run(self.current_run)
-                            _pause_flags[run_id] = False
+                            flusher.flush()
+                            pause_event.clear()
                             return
+            finally:
+                cancellation.cancel()
+                await stream.aclose()
             
-            # Now parse all outputs using coordinator's parsing logic (from run_analysis)
-            from app.models.schemas import CoordinatorOutput, SemanticQueryOutput, BestPracticeOutput, SDEOutput, PMOutput, QAOutput
-            
-            for msg in result_messages:
-                content = msg.content if hasattr(msg, 'content') else str(msg)
-                source = msg.source if hasattr(msg, 'source') else 'unknown'
-                
-                # Skip user messages and non-agent sources
-                if source in ['user', 'unknown'] or not content or not content.strip():
-                    continue
-                
-                try:
-                    # Try to parse JSON from message
-                    json_data = self.coordinator._extract_json(content)
-                    step_index = agent_to_step.get(source)
-                    
-                    if step_index is not None:
-                        # Update with fully parsed output
-                        self.current_run.mark_step_completed(step_index, json_data)
-                        
-                except Exception as e:
-                    print(f"   ⚠️  Failed to parse {source} output: {e}")
-            
-            # Save final state with all parsed outputs
-            self._save_run(self.current_run)
-            
-            # Mark as completed
+            # Mark as completed and save final state with all parsed outputs (one write)
             self.current_run.complete()
-            self._save_run(self.current_run)
-            print(f"✅ Analysis COMPLETED: {self.current_run.run_id}")
+            flusher.flush()
+            logger.info("✅ Analysis COMPLETED: %s", self.current_run.run_id)
         
         except Exception as e:
-            print(f"❌ Pipeline failed: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Pipeline failed: %s", e)
             if self.current_run:
-                self.current_run.status = RunStatus.FAILED
-                self._save_run(self.current_run)
+                self.current_run.fail()
+                flusher.flush()
+    
+    def _build_initial_task(self) -> str:
         """Build initial task with RAG context."""
         # Load project context
         context_file = self.project_dir / "context.json"
-        with open(context_file, 'r') as f:
-            context = json.load(f)
+        context = load_project_context(context_file)
         
         # RAG search
         vector_store_path = str(self.project_dir / "vector_store")
@@ -220,13 +431,10 @@ class ResearchRunner:
             "database models schemas",
         ]
         
-        search_results = {}
-        for query in search_queries:
-            results = search_code(query, k=5, vector_store_path=vector_store_path)
-            search_results[query] = results
+        search_results = search_code_batch(search_queries, k=5, vector_store_path=vector_store_path)
         
-        # Build task
-        task = f"""🔬 **Research-Style Codebase Analysis**
+        # Build task (collected as parts and joined once)
+        parts = [f"""🔬 **Research-Style Codebase Analysis**
 
 **Project ID**: {self.project_id}
 
@@ -241,15 +449,15 @@ class ResearchRunner:
 **Analysis Configuration**:
 - Depth: {self.config.depth}
 - Verbosity: {self.config.verbosity}
-"""
+"""]
         
         # Add user instructions if any
         if self.current_run and self.current_run.user_instructions:
-            task += f"\n\n**User Instructions & Context**:\n"
+            parts.append("\n\n**User Instructions & Context**:\n")
             for i, instruction in enumerate(self.current_run.user_instructions, 1):
-                task += f"{i}. {instruction}\n"
+                parts.append(f"{i}. {instruction}\n")
         
-        return task
+        return "".join(parts)
     
     def _build_partial_graph(self, completed_agents: List[str]):
         """
@@ -257,7 +465,6 @@ class ResearchRunner:
         
         This allows resuming from a paused state without re-running completed agents.
         """
-        from autogen_agentchat.teams import DiGraphBuilder, GraphFlow
         from app.agents.coordinator_agent import create_coordinator_agent
         from app.agents.semantic_agent import create_semantic_query_agent
         from app.agents.best_practice_agent import create_best_practice_agent
@@ -265,90 +472,62 @@ class ResearchRunner:
         from app.agents.pm_writer_agent import create_pm_writer_agent
         from app.agents.qa_agent import create_qa_agent
         
-        # Create all agents
+        # Determine which agents to include in the graph (pipeline order)
+        completed = set(completed_agents)
+        agents_to_run = [agent_name for agent_name in AGENT_DEPENDENCIES if agent_name not in completed]
+        pending = set(agents_to_run)
+        
+        # Create only the agents that still have to run (all of them for the fallback below),
+        # reusing ones built for this config on an earlier cycle
+        factories = {
+            'coordinator_agent': create_coordinator_agent,
+            'semantic_query_agent': create_semantic_query_agent,
+            'best_practice_agent': create_best_practice_agent,
+            'sde_writer_agent': create_sde_writer_agent,
+            'pm_writer_agent': create_pm_writer_agent,
+            'qa_agent': create_qa_agent
+        }
+        if self._agents_config != self.config:
+            self._agents = {}
+            self._agents_config = self.config
+        for agent_name in (agents_to_run or AGENT_DEPENDENCIES):
+            if agent_name not in self._agents:
+                self._agents[agent_name] = factories[agent_name](self.config)
         agents_map = {
-            'coordinator_agent': create_coordinator_agent(self.config),
-            'semantic_query_agent': create_semantic_query_agent(self.config),
-            'best_practice_agent': create_best_practice_agent(self.config),
-            'sde_writer_agent': create_sde_writer_agent(self.config),
-            'pm_writer_agent': create_pm_writer_agent(self.config),
-            'qa_agent': create_qa_agent(self.config)
+            agent_name: self._agents[agent_name]
+            for agent_name in (agents_to_run or AGENT_DEPENDENCIES)
         }
         
-        # Determine which agents to include in the graph
-        agents_to_run = []
-        for agent_name in ['coordinator_agent', 'semantic_query_agent', 'best_practice_agent', 
-                           'sde_writer_agent', 'pm_writer_agent', 'qa_agent']:
-            if agent_name not in completed_agents:
-                agents_to_run.append(agent_name)
-        
-        print(f"   📝 Completed agents: {completed_agents}")
-        print(f"   🎯 Agents to run: {agents_to_run}")
+        logger.debug("   📝 Completed agents: %s", completed_agents)
+        logger.debug("   🎯 Agents to run: %s", agents_to_run)
         
         # If all agents completed, return full graph (shouldn't happen but safety check)
         if not agents_to_run:
-            print("   ⚠️  All agents already completed, building full graph")
+            logger.warning("   ⚠️  All agents already completed, building full graph")
             # Build full graph from scratch
-            from autogen_agentchat.teams import DiGraphBuilder, GraphFlow
             full_builder = DiGraphBuilder()
             for agent in agents_map.values():
                 full_builder.add_node(agent)
             full_builder.set_entry_point(agents_map['coordinator_agent'])
             return GraphFlow(list(agents_map.values()), graph=full_builder.build())
         
-        print(f"   🔧 Building partial graph for: {', '.join(agents_to_run)}")
+        logger.info("   🔧 Building partial graph for: %s", ', '.join(agents_to_run))
         
-        # Build partial graph based on what needs to run
-        builder = DiGraphBuilder()
+        # Build the partial graph from the declared step dependencies. Edges only join agents
+        # that still have to run, so agents whose inputs are already complete have no incoming
+        # edge and GraphFlow starts them together (e.g. the SDE and PM writers in parallel)
+        if self.current_run:
+            dependencies = {step.agent_name: step.dependencies for step in self.current_run.steps}
+        else:
+            dependencies = AGENT_DEPENDENCIES
         
-        # Original flow: coordinator → semantic → best_practice → (sde + pm) → qa
-        # We need to maintain the dependencies
-        
-        if 'coordinator_agent' in agents_to_run:
-            builder.add_node(agents_map['coordinator_agent'])
-        if 'semantic_query_agent' in agents_to_run:
-            builder.add_node(agents_map['semantic_query_agent'])
-        if 'best_practice_agent' in agents_to_run:
-            builder.add_node(agents_map['best_practice_agent'])
-        if 'sde_writer_agent' in agents_to_run:
-            builder.add_node(agents_map['sde_writer_agent'])
-        if 'pm_writer_agent' in agents_to_run:
-            builder.add_node(agents_map['pm_writer_agent'])
-        if 'qa_agent' in agents_to_run:
-            builder.add_node(agents_map['qa_agent'])
-        
-        # Add edges based on what's running
-        if 'coordinator_agent' in agents_to_run and 'semantic_query_agent' in agents_to_run:
-            builder.add_edge(agents_map['coordinator_agent'], agents_map['semantic_query_agent'])
-            builder.set_entry_point(agents_map['coordinator_agent'])
-        elif 'semantic_query_agent' in agents_to_run:
-            builder.set_entry_point(agents_map['semantic_query_agent'])
-        
-        if 'semantic_query_agent' in agents_to_run and 'best_practice_agent' in agents_to_run:
-            builder.add_edge(agents_map['semantic_query_agent'], agents_map['best_practice_agent'])
-        elif 'best_practice_agent' in agents_to_run and 'semantic_query_agent' not in agents_to_run:
-            builder.set_entry_point(agents_map['best_practice_agent'])
-        
-        if 'best_practice_agent' in agents_to_run:
-            if 'sde_writer_agent' in agents_to_run:
-                builder.add_edge(agents_map['best_practice_agent'], agents_map['sde_writer_agent'])
-            if 'pm_writer_agent' in agents_to_run:
-                builder.add_edge(agents_map['best_practice_agent'], agents_map['pm_writer_agent'])
-        elif 'sde_writer_agent' in agents_to_run or 'pm_writer_agent' in agents_to_run:
-            # If best_practice is done but sde/pm need to run, set them as entry points
-            if 'sde_writer_agent' in agents_to_run:
-                builder.set_entry_point(agents_map['sde_writer_agent'])
-            if 'pm_writer_agent' in agents_to_run:
-                builder.set_entry_point(agents_map['pm_writer_agent'])
-        
-        if 'qa_agent' in agents_to_run:
-            if 'sde_writer_agent' in agents_to_run:
-                builder.add_edge(agents_map['sde_writer_agent'], agents_map['qa_agent'])
-            if 'pm_writer_agent' in agents_to_run:
-                builder.add_edge(agents_map['pm_writer_agent'], agents_map['qa_agent'])
-            # If both sde and pm are done, qa is the entry point
-            if 'sde_writer_agent' not in agents_to_run and 'pm_writer_agent' not in agents_to_run:
-                builder.set_entry_point(agents_map['qa_agent'])
+        builder = DiGraphBuilder()
+        for agent_name in agents_to_run:
+            builder.add_node(agents_map[agent_name])
+        for agent_name in agents_to_run:
+            for dependency in dependencies.get(agent_name, []):
+                if dependency in pending:
+                    builder.add_edge(agents_map[dependency], agents_map[agent_name])
         
         graph = builder.build()
         
@@ -367,13 +546,12 @@ class ResearchRunner:
         if not context_path.exists():
             return "Resume analysis from paused state."
         
-        with open(context_path, 'r') as f:
-            context = json.load(f)
+        context = load_project_context(context_path)
         
         # Build base task similar to _build_initial_task
         vector_store_path = str(self.project_dir / "vector_store")
         
-        task = f"""🔬 **Resuming Codebase Analysis**
+        parts = [f"""🔬 **Resuming Codebase Analysis**
 
 **Project ID**: {self.project_id}
 
@@ -385,37 +563,55 @@ class ResearchRunner:
 **Analysis Configuration**:
 - Depth: {self.config.depth}
 - Verbosity: {self.config.verbosity}
-"""
+"""]
         
         # Add results from completed agents
         if completed_agents and self.current_run:
-            task += f"\n\n**Previous Analysis Results** (already completed):\n"
+            parts.append("\n\n**Previous Analysis Results** (already completed):\n")
             for step in self.current_run.steps:
                 if step.status == "completed" and step.output:
-                    task += f"\n### {step.agent_name}:\n"
-                    # Add a summary of the output
-                    output_str = json.dumps(step.output, indent=2)
-                    # Truncate if too long
-                    if len(output_str) > 500:
-                        output_str = output_str[:500] + "...\n(truncated)"
-                    task += f"{output_str}\n"
+                    parts.append(f"\n### {step.agent_name}:\n")
+                    # Add a summary of the output (truncated if too long)
+                    parts.append(_dump_truncated(step.output, 500))
+                    parts.append("\n")
             
-            task += f"\n**Continue the analysis from where it was paused.**\n"
+            parts.append("\n**Continue the analysis from where it was paused.**\n")
         
-        return task
+        return "".join(parts)
     
     def _save_run(self, run: AnalysisRun):
         """Save run state to disk."""
-        run_file = self.runs_dir / f"{run.run_id}.json"
-        with open(run_file, 'w') as f:
-            json.dump(run.model_dump(), f, indent=2, default=str)
+        # Through the writer thread too, queued behind any pending background checkpoint
+        _checkpoint_writer.submit(self.run_store.write, RunStore.snapshot(run)).result()
+    
+    def _save_run_in_background(self, run: AnalysisRun):
+        """
+        Save run state without blocking the event loop.
+        
+        The snapshot is serialized here so it matches the run at this moment;
+        only the database write is handed to the single checkpoint writer
+        thread, which keeps successive checkpoints in order.
+        """
+        snapshot = RunStore.snapshot(run)
+        future = _checkpoint_writer.submit(self.run_store.write, snapshot)
+        future.add_done_callback(_report_checkpoint_error)
+        
+        # A failed write would otherwise drop its steps from every later checkpoint
+        loop = asyncio.get_running_loop()
+        dirty = [step_row[1] for step_row in snapshot[1]]
+        def requeue_steps(f: Future):
+            if f.exception() is not None:
+                loop.call_soon_threadsafe(run.mark_steps_dirty, dirty)
+        future.add_done_callback(requeue_steps)
     
     def _load_run(self, run_id: str) -> AnalysisRun:
         """Load run state from disk."""
-        run_file = self.runs_dir / f"{run_id}.json"
-        with open(run_file, 'r') as f:
-            data = json.load(f)
-        return AnalysisRun(**data)
+        run = self.run_store.load(run_id)
+        if run is None:
+            # Checkpoint written as a JSON file before runs.db existed
+            run_file = self.runs_dir / f"{run_id}.json"
+            run = AnalysisRun.from_dict(orjson.loads(run_file.read_bytes()))
+        return run
     
     async def pause(self):
         """
@@ -426,9 +622,9 @@ class ResearchRunner:
         if not self.current_run or self.current_run.status != RunStatus.RUNNING:
             raise ValueError("No active run to pause")
         
-        print("⏸️  Pause requested. Will pause after current agent completes...")
-        # Set global pause flag so the running task can see it
-        _pause_flags[self.current_run.run_id] = True
+        logger.info("⏸️  Pause requested. Will pause after current agent completes...")
+        # Set global pause event so the running task can see it
+        _pause_events.setdefault(self.current_run.run_id, asyncio.Event()).set()
     
     async def resume(self, run_id: Optional[str] = None):
         """
@@ -445,26 +641,19 @@ class ResearchRunner:
         if self.current_run.status != RunStatus.PAUSED:
             raise ValueError(f"Run is not paused (status: {self.current_run.status})")
         
-        print(f"▶️  Resuming analysis: {self.current_run.run_id}")
-        print(f"   Continuing from step {self.current_run.current_step + 1}/{len(self.current_run.steps)}")
+        logger.info("▶️  Resuming analysis: %s", self.current_run.run_id)
+        logger.info("   Continuing from step %d/%d", self.current_run.current_step + 1, len(self.current_run.steps))
         
         # Resume execution
         self.current_run.resume()
         self._save_run(self.current_run)
         
-        # Reset pause flag
+        # Fresh pause event for this cycle (the last cycle's cleanup leaves it alone)
         run_id = self.current_run.run_id
-        _pause_flags[run_id] = False
+        _pause_events[run_id] = asyncio.Event()
         
-        # Start execution in background - store task to prevent cancellation
-        task = asyncio.create_task(self._execute_pipeline())
-        _running_tasks[run_id] = task
-        
-        # Clean up task when done
-        def cleanup_task(t):
-            _running_tasks.pop(run_id, None)
-            _pause_flags.pop(run_id, None)
-        task.add_done_callback(cleanup_task)
+        # Start execution in background
+        self._start_pipeline_task(run_id)
     
     async def ask_question(self, question: str) -> str:
         """
@@ -479,16 +668,17 @@ class ResearchRunner:
         current_agent = self.current_run.get_current_agent()
         completed_steps = sum(1 for step in self.current_run.steps if step.status == "completed")
         
-        # Simple question routing
-        question_lower = question.lower()
+        # Simple question routing: one scan for every keyword, then the first
+        # route in priority order that matched
+        routes = {match.lastgroup for match in _QUESTION_ROUTER.finditer(question)}
         
-        if "analyzing" in question_lower or "working on" in question_lower:
+        if "current" in routes:
             if current_agent:
                 answer = f"Currently analyzing with: **{current_agent}**\n\nProgress: {completed_steps}/{len(self.current_run.steps)} agents completed ({self.current_run.progress_percent:.1f}%)"
             else:
                 answer = "Analysis is complete or not started."
         
-        elif "progress" in question_lower or "status" in question_lower:
+        elif "progress" in routes:
             answer = f"""**Analysis Progress**:
 - Status: {self.current_run.status.value}
 - Current Step: {current_agent or 'Complete'}
@@ -496,11 +686,11 @@ class ResearchRunner:
 - Started: {self.current_run.started_at.strftime('%Y-%m-%d %H:%M:%S')}
 """
         
-        elif "results" in question_lower or "found" in question_lower:
+        elif "results" in routes:
             # Show intermediate results
             answer = f"**Intermediate Outputs**:\n\n"
-            for agent_name, output in self.current_run.intermediate_outputs.items():
-                answer += f"**{agent_name}**:\n{json.dumps(output, indent=2)}\n\n"
+            for agent_name, rendered in self.current_run.rendered_outputs():
+                answer += f"**{agent_name}**:\n{rendered}\n\n"
         
         else:
             # RAG search for specific questions
@@ -544,7 +734,7 @@ class ResearchRunner:
         self.current_run.add_user_instruction(instruction)
         self._save_run(self.current_run)
         
-        print(f"💬 User instruction added: {instruction[:50]}...")
+        logger.info("💬 User instruction added: %s...", instruction[:50])
     
     def get_run_summary(self) -> Dict[str, Any]:
         """Get current run summary."""
@@ -555,10 +745,18 @@ class ResearchRunner:
     
     def get_latest_run_id(self) -> Optional[str]:
         """Get the latest run ID for this project."""
-        run_files = list(self.runs_dir.glob("*.json"))
-        if not run_files:
-            return None
-        
-        # Sort by modification time
-        latest = max(run_files, key=lambda p: p.stat().st_mtime)
-        return latest.stem
+        run_id = self.run_store.latest_run_id()
+        if run_id:
+            return run_id
+        
+        # No runs in runs.db yet: fall back to the newest checkpoint written as a JSON
+        # file (scandir entries carry their stat, so no second lookup per file)
+        latest, latest_mtime = None, -1.0
+        with os.scandir(self.runs_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json"):
+                    continue
+                mtime = entry.stat().st_mtime
+                if mtime > latest_mtime:
+                    latest, latest_mtime = entry.name, mtime
+        return latest[:-len(".json")] if latest else None
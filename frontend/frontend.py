@@ -1,31 +1,311 @@
 import streamlit as st
 import requests
+import base64
+import hashlib
+import hmac
+import os
+import threading
 import time
+import orjson
+from pathlib import Path
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
+from urllib3.util.retry import Retry
+
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")  # Same .env as the backend
 
 BACKEND_URL = "http://localhost:8000"
+BACKEND_TIMEOUT = (2, 30)  # (connect, read) seconds for calls that don't set their own
+STATUS_SYNC_INTERVAL = 2.0  # seconds a /full_status snapshot is reused across reruns
+
+# Login token cookie, so a hard refresh doesn't mean logging in again. Tokens are
+# checked against the backend's AUTH_SECRET_KEY; without it the login isn't persisted
+SESSION_COOKIE = "rrai_token"
+AUTH_SECRET_KEY = os.getenv("AUTH_SECRET_KEY")
+
+# Logged-in session state besides active_project: dicts keyed by project id
+# ('messages' is the per-project message display, UI only)
+PROJECT_STATE_KEYS = ('messages', 'preprocessing_status', 'analysis_status', 'analysis_config', 'show_results')
+
+class BackendSession(requests.Session):
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", BACKEND_TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+# One pooled keep-alive session per server process (the script itself reruns on
+# every interaction, so a plain module-level session would be rebuilt each time)
+@st.cache_resource
+def get_backend_session():
+    session = BackendSession()
+    session.mount("http://", HTTPAdapter(
+        pool_connections=10, pool_maxsize=20,
+        max_retries=Retry(total=2, backoff_factor=0.1),
+    ))
+    return session
+
+SESSION = get_backend_session()
+
+def verify_login_token(token):
+    """Return the claims of a backend login token if its signature and expiry check out, else None."""
+    if not token or not AUTH_SECRET_KEY:
+        return None
+    try:
+        payload, signature = token.split(".")
+        expected = base64.urlsafe_b64encode(
+            hmac.new(AUTH_SECRET_KEY.encode(), payload.encode(), hashlib.sha256).digest()
+        ).rstrip(b"=").decode()
+        if not hmac.compare_digest(signature, expected):
+            return None
+        claims = orjson.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except Exception:
+        return None
+    return claims if claims.get("exp", 0) > time.time() else None
+
+def write_session_cookie(token, max_age):
+    # st.html scripts run in the app page itself, so this sets the app's own cookie
+    st.html(
+        f"<script>document.cookie = {orjson.dumps(f'{SESSION_COOKIE}={token}').decode()}"
+        f" + '; path=/; max-age={int(max_age)}; SameSite=Strict';</script>",
+        unsafe_allow_javascript=True,
+    )
 
 st.set_page_config(page_title="GraphFlow Analysis", layout="wide")
 st.title("🔍 Repository Analysis with GraphFlow")
 
-# Enable auto-rerun every 5 seconds if analysis is running
-def check_auto_refresh():
-    if st.session_state.get('active_project'):
-        proj_id = st.session_state.active_project.get('id')
-        if proj_id:
-            preprocess = st.session_state.preprocessing_status.get(proj_id, "not_started")
-            analysis = st.session_state.analysis_status.get(proj_id, "not_started")
-            # Auto-refresh if something is running
-            if preprocess == "running" or analysis == "running":
-                time.sleep(5)
-                st.rerun()
+# Project lists change only when a project is added, so reruns within the TTL
+# reuse the last response instead of calling the backend again
+@st.cache_data(ttl=10, show_spinner=False)
+def fetch_projects(username):
+    resp = SESSION.get(f"{BACKEND_URL}/projects", params={"username": username})
+    return resp.json() if resp.status_code == 200 else None
+
+@st.cache_data(ttl=15, show_spinner=False)
+def fetch_admin_projects(token):
+    resp = SESSION.get(f"{BACKEND_URL}/admin/projects", headers={"Authorization": f"Bearer {token}"})
+    return resp.json() if resp.status_code == 200 else None
+
+# Parsed analysis result, keyed by the file's mtime so a new result is read once.
+# cache_resource hands back the same dict (no per-rerun copy); it is only displayed
+@st.cache_resource(show_spinner=False, max_entries=16)
+def load_analysis_result(result_path, mtime):
+    with open(result_path, 'rb') as f:
+        return orjson.loads(f.read())
+
+# Status snapshots shared by every session in this server process: project_id ->
+# {"lock", "fetched_at", "status"}, plus a lock guarding the dict itself
+@st.cache_resource
+def status_snapshots():
+    return {}, threading.Lock()
+
+# Backend status for a project, reused for STATUS_SYNC_INTERVAL so a burst of reruns
+# (clicks unrelated to status) doesn't poll each time; None on a non-200 response.
+# Single-flight: concurrent callers for a project wait on its lock for one request
+def fetch_full_status(project_id):
+    snapshots, snapshots_lock = status_snapshots()
+    with snapshots_lock:
+        entry = snapshots.setdefault(project_id, {"lock": threading.Lock(), "fetched_at": None, "status": None})
+    with entry["lock"]:
+        fetched_at = entry["fetched_at"]
+        if fetched_at is not None and time.monotonic() - fetched_at <= STATUS_SYNC_INTERVAL:
+            return entry["status"]
+        resp = SESSION.get(f"{BACKEND_URL}/projects/{project_id}/full_status", timeout=2)
+        if resp.status_code != 200:
+            return None
+        entry["status"] = resp.json()
+        entry["fetched_at"] = time.monotonic()
+        return entry["status"]
+
+# Drop the reused snapshot once the backend state is known to have changed
+def invalidate_full_status(project_id):
+    entry = status_snapshots()[0].get(project_id)
+    if entry is not None:
+        entry["fetched_at"] = None
+
+def render_preprocess_step(slot, status):
+    slot.caption(f"📦 {status.get('current_step') or 'Processing...'}")
+
+# Two single-element slots, each replaced in place, rather than rebuilding a container per tick
+def render_analysis_progress(slots, status):
+    progress_slot, activity_slot = slots
+    progress = status.get("progress") or 0
+    progress_slot.progress(progress / 100, text=f"🔄 **Analyzing...** {progress}%")
+    activity_slot.caption(f"_{status.get('current_activity') or 'Running...'}_")
+
+# Follow a running job over the backend's status event stream: progress is redrawn
+# in place, and the page only reruns when the preprocess/analysis status changes
+def follow_status_events(project_id, status_slots):
+    preprocess = st.session_state.preprocessing_status.get(project_id, "not_started")
+    analysis = st.session_state.analysis_status.get(project_id, "not_started")
+    if preprocess != "running" and analysis != "running":
+        return
+    
+    try:
+        with SESSION.get(f"{BACKEND_URL}/projects/{project_id}/events", stream=True, timeout=(2, 30)) as resp:
+            if resp.status_code != 200:
+                raise requests.exceptions.RequestException(f"HTTP {resp.status_code}")
+            event = None
+            for line in resp.iter_lines(decode_unicode=True):
+                if line.startswith("data: "):
+                    event = orjson.loads(line[len("data: "):])
+                    if ((preprocess == "running" and event["preprocess"]["status"] != preprocess)
+                            or (analysis == "running" and event["analysis"]["status"] != analysis)):
+                        invalidate_full_status(project_id)
+                        st.rerun()
+                elif event is None:
+                    continue
+                # Redraw on keepalives too: each element update lets a click interrupt this run
+                # Slots are looked up each time: a status bar rerun replaces its slot
+                if preprocess == "running" and "preprocess" in status_slots:
+                    render_preprocess_step(status_slots["preprocess"], event["preprocess"])
+                if analysis == "running" and "analysis" in status_slots:
+                    render_analysis_progress(status_slots["analysis"], event["analysis"])
+    except requests.exceptions.RequestException:
+        # No event stream (backend down or older): poll by rerunning
+        time.sleep(5)
+    st.rerun()
+
+# Defaults for a project's entries in the PROJECT_STATE_KEYS dicts, kept if already set
+def init_project_state(project_id):
+    st.session_state.messages.setdefault(project_id, [])
+    st.session_state.preprocessing_status.setdefault(project_id, "not_started")
+    st.session_state.analysis_status.setdefault(project_id, "not_started")
+    st.session_state.analysis_config.setdefault(project_id, None)
+    st.session_state.show_results.setdefault(project_id, False)
+
+# Sidebar project list and upload form: adding a project only reruns this fragment
+@st.fragment
+def render_sidebar_projects():
+    st.subheader("📁 Projects")
+    
+    # Upload new project
+    with st.expander("➕ New Project"):
+        tab1, tab2 = st.tabs(["📦 ZIP File", "🌐 GitHub URL"])
+        
+        with tab1:
+            uploaded_file = st.file_uploader("Upload ZIP", type=['zip'], label_visibility="collapsed")
+            if uploaded_file and st.button("Upload ZIP", use_container_width=True):
+                # Stream the multipart body from the upload instead of building a second copy in memory
+                body = MultipartEncoder(fields={
+                    "username": st.session_state.username,
+                    "file": (uploaded_file.name, uploaded_file, "application/zip"),
+                })
+                resp = SESSION.post(f"{BACKEND_URL}/projects/upload", data=body, headers={"Content-Type": body.content_type})
+                if resp.status_code == 200:
+                    st.success("✅ Uploaded!")
+                    fetch_projects.clear()
+                    st.rerun(scope="fragment")
+                else:
+                    st.error(f"❌ Failed: {resp.text}")
+        
+        with tab2:
+            github_url = st.text_input(
+                "GitHub Repository URL",
+                placeholder="https://github.com/username/repo",
+                label_visibility="collapsed"
+            )
+            project_name = st.text_input(
+                "Project Name (optional)",
+                placeholder="My Awesome Project",
+                label_visibility="collapsed"
+            )
+            if st.button("Add GitHub Repo", use_container_width=True, disabled=not github_url):
+                if github_url:
+                    data = {
+                        "username": st.session_state.username,
+                        "github_url": github_url,
+                        "name": project_name if project_name else github_url.split('/')[-1]
+                    }
+                    resp = SESSION.post(f"{BACKEND_URL}/projects/upload", data=data)
+                    if resp.status_code == 200:
+                        st.success("✅ GitHub repo added!")
+                        fetch_projects.clear()
+                        st.rerun(scope="fragment")
+                    else:
+                        st.error(f"❌ Failed: {resp.text}")
+    
+    # List projects
+    projects = fetch_projects(st.session_state.username)
+    if projects is not None:
+        if projects:
+            for proj in projects:
+                is_active = st.session_state.active_project and st.session_state.active_project['id'] == proj['id']
+                button_type = "primary" if is_active else "secondary"
+                # Add icon based on source
+                icon = "🌐" if proj.get('github_url') else "📦"
+                status_icon = '🟢' if is_active else '⚪'
+                button_label = f"{status_icon} {icon} {proj['name']}"
+                
+                # Selecting a project changes the main area, so rerun the whole page
+                if st.button(button_label, key=f"proj_{proj['id']}", use_container_width=True, type=button_type):
+                    st.session_state.active_project = proj
+                    init_project_state(proj['id'])
+                    st.rerun()
+        else:
+            st.info("No projects yet")
+
+# Top bar with analysis status; its Refresh button only reruns this fragment
+@st.fragment
+def render_status_bar(project_id, preprocess_status, analysis_status, status_slots):
+    col_status, col_btns = st.columns([3, 1])
+    with col_status:
+        if analysis_status == "running":
+            try:
+                resp = SESSION.get(f"{BACKEND_URL}/projects/{project_id}/status", timeout=2)
+                if resp.status_code == 200:
+                    status_slots["analysis"] = (st.empty(), st.empty())
+                    render_analysis_progress(status_slots["analysis"], resp.json())
+            except:
+                st.warning("⏳ Analysis running...")
+        elif analysis_status == "completed":
+            st.success("✅ **Analysis Complete!**")
+        elif preprocess_status == "completed":
+            st.info("💬 Chat is ready! Analysis optional.")
+    
+    with col_btns:
+        # Status refresh button - redraws just this bar
+        if analysis_status == "running":
+            if st.button("🔄 Refresh", key="refresh_status", use_container_width=True):
+                st.rerun(scope="fragment")
+
+# Message history, rendered as its own fragment
+@st.fragment
+def render_chat_history(project_id):
+    for msg in st.session_state.messages.get(project_id, []):
+        with st.chat_message(msg["role"]):
+            st.write(msg["content"])
+            if msg.get("clean_sources"):
+                with st.expander("📎 Sources", expanded=False):
+                    for clean_src in msg["clean_sources"]:
+                        st.caption(f"• {clean_src}")
+            if msg.get("using_partial"):
+                st.caption("⚡ _Using partial analysis (faster)_")
+            elif msg.get("has_analysis"):
+                st.caption("✨ _Enhanced with analysis insights_")
 
 # Session state
 if 'logged_in' not in st.session_state:
-    st.session_state.logged_in = False
+    # New browser session: pick the login back up from the cookie, no backend call.
+    # Only done once per session, since st.context.cookies still shows the cookie
+    # as it was when the page loaded, even after logging out
+    claims = verify_login_token(st.context.cookies.get(SESSION_COOKIE))
+    st.session_state.logged_in = claims is not None
+    if claims:
+        st.session_state.username = claims["sub"]
+        st.session_state.is_admin = claims.get("adm", False)
+        st.session_state.token = st.context.cookies[SESSION_COOKIE]
 if 'username' not in st.session_state:
     st.session_state.username = None
 if 'is_admin' not in st.session_state:
     st.session_state.is_admin = False
+if 'token' not in st.session_state:
+    st.session_state.token = None
+
+# Cookie changes requested by login/logout, written on the run after their st.rerun()
+if 'session_cookie' in st.session_state:
+    token = st.session_state.pop('session_cookie')
+    claims = verify_login_token(token)
+    write_session_cookie(token or "", claims["exp"] - time.time() if claims else 0)
 
 # Authentication
 if not st.session_state.logged_in:
@@ -35,12 +315,14 @@ if not st.session_state.logged_in:
         username = st.text_input("Username", key="login_user")
         password = st.text_input("Password", type="password", key="login_pass")
         if st.button("Login"):
-            resp = requests.post(f"{BACKEND_URL}/login", json={"username": username, "password": password})
+            resp = SESSION.post(f"{BACKEND_URL}/login", json={"username": username, "password": password})
             if resp.status_code == 200:
                 data = resp.json()
                 st.session_state.logged_in = True
                 st.session_state.username = data.get('username', username)
                 st.session_state.is_admin = data.get('is_admin', False)
+                st.session_state.token = data.get('token')
+                st.session_state.session_cookie = st.session_state.token
                 st.rerun()
             else:
                 st.error("Invalid credentials")
@@ -49,7 +331,7 @@ if not st.session_state.logged_in:
         username = st.text_input("Username", key="signup_user")
         password = st.text_input("Password", type="password", key="signup_pass")
         if st.button("Create Account"):
-            resp = requests.post(f"{BACKEND_URL}/signup", json={"username": username, "password": password})
+            resp = SESSION.post(f"{BACKEND_URL}/signup", json={"username": username, "password": password})
             if resp.status_code == 200:
                 st.success("Account created! Please login")
             else:
@@ -57,30 +339,22 @@ if not st.session_state.logged_in:
 
 else:
     # Initialize session state - simplified
-    defaults = {
-        'active_project': None,
-        'messages': {},  # Per-project message display (UI only)
-        'preprocessing_status': {},
-        'analysis_status': {},
-        'analysis_config': {},
-        'show_results': {}
-    }
-    for key, value in defaults.items():
+    if 'active_project' not in st.session_state:
+        st.session_state.active_project = None
+    for key in PROJECT_STATE_KEYS:
         if key not in st.session_state:
-            st.session_state[key] = value
+            st.session_state[key] = {}
     
     # Admin panel check
     if st.session_state.get('show_admin'):
         st.header("👑 Admin Dashboard")
-        resp = requests.get(f"{BACKEND_URL}/admin/projects", params={"admin_username": st.session_state.username})
-        if resp.status_code == 200:
-            projects = resp.json()
+        projects = fetch_admin_projects(st.session_state.token)
+        if projects is not None:
             for p in projects:
                 with st.expander(f"📁 {p['name']} (User: {p['username']})"):
                     if p['zip_filename']:
-                        if st.button("⬇️ Download ZIP", key=f"zip_{p['id']}"):
-                            zip_url = f"{BACKEND_URL}/admin/projects/{p['id']}/download?admin_username={st.session_state.username}"
-                            st.markdown(f"[Download ZIP]({zip_url})")
+                        zip_url = f"{BACKEND_URL}/admin/projects/{p['id']}/download?token={st.session_state.token}"
+                        st.link_button("⬇️ Download ZIP", zip_url, use_container_width=True)
                     else:
                         st.caption("No ZIP file available")
         if st.button("← Back"):
@@ -99,79 +373,18 @@ else:
             st.divider()
         
         if st.button("🚪 Logout", use_container_width=True):
+            fetch_projects.clear()
+            fetch_admin_projects.clear()
             st.session_state.logged_in = False
             st.session_state.username = None
             st.session_state.is_admin = False
+            st.session_state.token = None
+            st.session_state.session_cookie = None
             st.session_state.active_project = None
             st.rerun()
         
         st.divider()
-        st.subheader("📁 Projects")
-        
-        # Upload new project
-        with st.expander("➕ New Project"):
-            tab1, tab2 = st.tabs(["📦 ZIP File", "🌐 GitHub URL"])
-            
-            with tab1:
-                uploaded_file = st.file_uploader("Upload ZIP", type=['zip'], label_visibility="collapsed")
-                if uploaded_file and st.button("Upload ZIP", use_container_width=True):
-                    files = {"file": uploaded_file}
-                    data = {"username": st.session_state.username}
-                    resp = requests.post(f"{BACKEND_URL}/projects/upload", files=files, data=data)
-                    if resp.status_code == 200:
-                        st.success("✅ Uploaded!")
-                        st.rerun()
-                    else:
-                        st.error(f"❌ Failed: {resp.text}")
-            
-            with tab2:
-                github_url = st.text_input(
-                    "GitHub Repository URL",
-                    placeholder="https://github.com/username/repo",
-                    label_visibility="collapsed"
-                )
-                project_name = st.text_input(
-                    "Project Name (optional)",
-                    placeholder="My Awesome Project",
-                    label_visibility="collapsed"
-                )
-                if st.button("Add GitHub Repo", use_container_width=True, disabled=not github_url):
-                    if github_url:
-                        data = {
-                            "username": st.session_state.username,
-                            "github_url": github_url,
-                            "name": project_name if project_name else github_url.split('/')[-1]
-                        }
-                        resp = requests.post(f"{BACKEND_URL}/projects/upload", data=data)
-                        if resp.status_code == 200:
-                            st.success("✅ GitHub repo added!")
-                            st.rerun()
-                        else:
-                            st.error(f"❌ Failed: {resp.text}")
-        
-        # List projects
-        resp = requests.get(f"{BACKEND_URL}/projects", params={"username": st.session_state.username})
-        if resp.status_code == 200:
-            projects = resp.json()
-            if projects:
-                for proj in projects:
-                    is_active = st.session_state.active_project and st.session_state.active_project['id'] == proj['id']
-                    button_type = "primary" if is_active else "secondary"
-                    # Add icon based on source
-                    icon = "🌐" if proj.get('github_url') else "📦"
-                    status_icon = '🟢' if is_active else '⚪'
-                    button_label = f"{status_icon} {icon} {proj['name']}"
-                    
-                    if st.button(button_label, key=f"proj_{proj['id']}", use_container_width=True, type=button_type):
-                        st.session_state.active_project = proj
-                        # Initialize project state
-                        for state_dict in ['messages', 'preprocessing_status', 'analysis_status', 'analysis_config', 'show_results']:
-                            if proj['id'] not in st.session_state[state_dict]:
-                                default_val = [] if state_dict == 'messages' else ("not_started" if 'status' in state_dict else (None if state_dict == 'analysis_config' else False))
-                                st.session_state[state_dict][proj['id']] = default_val
-                        st.rerun()
-            else:
-                st.info("No projects yet")
+        render_sidebar_projects()
     
     # MAIN AREA: Chat Interface (Always visible)
     if not st.session_state.active_project:
@@ -181,37 +394,42 @@ else:
     project = st.session_state.active_project
     project_id = project['id']
     
+    # Filled in by the status displays below, then kept current by follow_status_events
+    status_slots = {}
+    
     # Check preprocessing status
     preprocess_status = st.session_state.preprocessing_status.get(project_id, "not_started")
     analysis_status = st.session_state.analysis_status.get(project_id, "not_started")
     
-    # Sync preprocessing status with backend if session state says running
-    if preprocess_status == "running":
+    # Both statuses in one request; the syncs and the preprocessing monitor below share it.
+    # Skipped while nothing it feeds can change: before preprocessing starts, and once the
+    # analysis has finished (completed/failed only move on through this page's own actions)
+    backend_status = None
+    backend_error = None
+    if preprocess_status == "running" or (
+        preprocess_status == "completed" and analysis_status not in ("completed", "failed")
+    ):
         try:
-            resp = requests.get(f"{BACKEND_URL}/projects/{project_id}/preprocess/status", timeout=2)
-            if resp.status_code == 200:
-                backend_status = resp.json()
-                # Update session state to match backend
-                if backend_status.get("status") != "running":
-                    st.session_state.preprocessing_status[project_id] = backend_status.get("status", "not_started")
-                    preprocess_status = backend_status.get("status", "not_started")
-        except:
+            backend_status = fetch_full_status(project_id)
+        except requests.exceptions.RequestException as e:
             # If backend check fails, keep current state
-            pass
+            backend_error = e
+    
+    # Sync preprocessing status with backend if session state says running
+    if preprocess_status == "running" and backend_status is not None:
+        backend_preprocess_status = backend_status["preprocess"].get("status", "not_started")
+        # Update session state to match backend
+        if backend_preprocess_status != "running":
+            st.session_state.preprocessing_status[project_id] = backend_preprocess_status
+            preprocess_status = backend_preprocess_status
     
     # Sync analysis status with backend - check if running to detect completion
-    if preprocess_status == "completed":
-        try:
-            resp = requests.get(f"{BACKEND_URL}/projects/{project_id}/status", timeout=2)
-            if resp.status_code == 200:
-                backend_status = resp.json()
-                backend_analysis_status = backend_status.get("status", "not_started")
-                # Always sync if backend says something different
-                if backend_analysis_status != analysis_status:
-                    analysis_status = backend_analysis_status
-                    st.session_state.analysis_status[project_id] = analysis_status
-        except:
-            pass
+    if preprocess_status == "completed" and backend_status is not None:
+        backend_analysis_status = backend_status["analysis"].get("status", "not_started")
+        # Always sync if backend says something different
+        if backend_analysis_status != analysis_status:
+            analysis_status = backend_analysis_status
+            st.session_state.analysis_status[project_id] = analysis_status
     
     # Configuration UI (if needed)
     show_config = preprocess_status == "not_started" and not st.session_state.analysis_config.get(project_id)
@@ -278,7 +496,8 @@ else:
                     
                     # Start preprocessing
                     st.session_state.preprocessing_status[project_id] = "running"
-                    resp = requests.post(f"{BACKEND_URL}/projects/{project_id}/preprocess")
+                    resp = SESSION.post(f"{BACKEND_URL}/projects/{project_id}/preprocess")
+                    invalidate_full_status(project_id)
                     if resp.status_code != 200:
                         st.error(f"❌ Failed to start preprocessing: {resp.text}")
                         st.session_state.preprocessing_status[project_id] = "not_started"
@@ -295,12 +514,13 @@ else:
             verbosity = config.get("verbosity", "low")
             
             try:
-                resp = requests.post(
+                resp = SESSION.post(
                     f"{BACKEND_URL}/projects/{project_id}/analyze/graphflow", 
                     data={"personas": personas, "depth": depth, "verbosity": verbosity},
                     timeout=5
                 )
                 if resp.status_code == 200:
+                    invalidate_full_status(project_id)
                     st.session_state.analysis_status[project_id] = "running"
                     st.success("🚀 Analysis started automatically!")
                     st.rerun()
@@ -314,39 +534,35 @@ else:
             st.info(f"🔄 Preprocessing...")
         with col2:
             if st.button("🔄 Refresh", key="refresh_preprocess"):
+                invalidate_full_status(project_id)
                 st.rerun()
         
-        try:
-            resp = requests.get(f"{BACKEND_URL}/projects/{project_id}/preprocess/status", timeout=2)
-            if resp.status_code == 200:
-                status = resp.json()
-                
-                # If backend says not_started but session says running, reset session
-                if status['status'] == 'not_started':
-                    st.session_state.preprocessing_status[project_id] = "not_started"
-                    st.warning("⚠️ Preprocessing status lost. Please start preprocessing again.")
-                    st.rerun()
-                
-                if status['status'] == 'running':
-                    st.caption(f"📦 {status.get('current_step', 'Processing...')}")
-                    st.info("⏱️ Click 'Refresh' button to update status")
-                elif status['status'] == 'completed':
-                    st.success("✅ Preprocessing complete!")
-                    st.session_state.preprocessing_status[project_id] = "completed"
-                    st.rerun()
-                elif status['status'] == 'failed':
-                    st.error(f"❌ Preprocessing failed: {status.get('error', 'Unknown error')}")
-                    st.session_state.preprocessing_status[project_id] = "not_started"
-                    if st.button("🔄 Retry"):
-                        st.rerun()
-        except requests.exceptions.RequestException as e:
-            st.error(f"⚠️ Cannot connect to backend: {str(e)}")
+        if backend_error is not None:
+            st.error(f"⚠️ Cannot connect to backend: {str(backend_error)}")
             st.session_state.preprocessing_status[project_id] = "not_started"
             if st.button("🔄 Retry Connection"):
                 st.rerun()
-        except Exception as e:
-            st.error(f"❌ Error checking status: {str(e)}")
-            st.session_state.preprocessing_status[project_id] = "not_started"
+        elif backend_status is not None:
+            status = backend_status["preprocess"]
+            
+            # If backend says not_started but session says running, reset session
+            if status.get('status') == 'not_started':
+                st.session_state.preprocessing_status[project_id] = "not_started"
+                st.warning("⚠️ Preprocessing status lost. Please start preprocessing again.")
+                st.rerun()
+            
+            if status.get('status') == 'running':
+                status_slots["preprocess"] = st.empty()
+                render_preprocess_step(status_slots["preprocess"], status)
+            elif status.get('status') == 'completed':
+                st.success("✅ Preprocessing complete!")
+                st.session_state.preprocessing_status[project_id] = "completed"
+                st.rerun()
+            elif status.get('status') == 'failed':
+                st.error(f"❌ Preprocessing failed: {status.get('error', 'Unknown error')}")
+                st.session_state.preprocessing_status[project_id] = "not_started"
+                if st.button("🔄 Retry"):
+                    st.rerun()
         
         st.divider()    # CHAT INTERFACE - ALWAYS SHOW (even during config/preprocessing)
     st.header(f"💬 Chat - {project['name']}")
@@ -368,48 +584,22 @@ else:
         with btn_col2:
             if preprocess_status == "completed":
                 if st.button("🗑️ CLEAR CHAT", use_container_width=True):
-                    requests.post(f"{BACKEND_URL}/projects/{project_id}/chat/clear")
+                    SESSION.post(f"{BACKEND_URL}/projects/{project_id}/chat/clear")
                     st.session_state.messages[project_id] = []
                     st.rerun()
         
         st.divider()
     
     # Top bar with analysis status
-    col_status, col_btns = st.columns([3, 1])
-    with col_status:
-        if analysis_status == "running":
-            try:
-                resp = requests.get(f"{BACKEND_URL}/projects/{project_id}/status", timeout=2)
-                if resp.status_code == 200:
-                    status = resp.json()
-                    progress = status.get("progress", 0)
-                    current_activity = status.get('current_activity', 'Running...')
-                    
-                    st.progress(progress / 100, text=f"🔄 **Analyzing...** {progress}%")
-                    st.caption(f"_{current_activity}_")
-            except:
-                st.warning("⏳ Analysis running...")
-        elif analysis_status == "completed":
-            st.success("✅ **Analysis Complete!**")
-        elif preprocess_status == "completed":
-            st.info("💬 Chat is ready! Analysis optional.")
-    
-    with col_btns:
-        # Status refresh button - manual refresh instead of auto-refresh
-        if analysis_status == "running":
-            if st.button("🔄 Refresh", key="refresh_status", use_container_width=True):
-                st.rerun()
+    render_status_bar(project_id, preprocess_status, analysis_status, status_slots)
     
     # Show analysis results if requested
     if st.session_state.show_results.get(project_id, False):
             with st.expander("📊 Analysis Results", expanded=True):
                 try:
-                    import os
                     result_path = f"data/projects/{project_id}/analysis_result.json"
                     if os.path.exists(result_path):
-                        import json
-                        with open(result_path, 'r', encoding='utf-8') as f:
-                            result = json.load(f)
+                        result = load_analysis_result(result_path, os.path.getmtime(result_path))
                         
                         # Display each agent's output
                         if 'agents' in result:
@@ -435,20 +625,7 @@ else:
     st.subheader("💬 Conversation")
     
     # Display message history (UI only)
-    for msg in st.session_state.messages.get(project_id, []):
-        with st.chat_message(msg["role"]):
-            st.write(msg["content"])
-            if msg.get("sources"):
-                sources = [s for s in msg.get("sources", []) if s and s != 'unknown']
-                if sources:
-                    with st.expander("📎 Sources", expanded=False):
-                        for src in sources:
-                            clean_src = src.replace('\\', '/').split('/')[-1] if '/' in src or '\\' in src else src
-                            st.caption(f"• {clean_src}")
-            if msg.get("using_partial"):
-                st.caption("⚡ _Using partial analysis (faster)_")
-            elif msg.get("has_analysis"):
-                st.caption("✨ _Enhanced with analysis insights_")
+    render_chat_history(project_id)
     
     # Chat input - enabled after preprocessing completes (analysis optional)
     chat_disabled = preprocess_status != "completed"
@@ -468,39 +645,49 @@ else:
             thinking_placeholder.markdown("🤔 _Thinking..._")
             
             try:
-                import time
-                
-                # Call backend
-                response = requests.post(
+                # Call backend, streaming the answer as server-sent events
+                response = SESSION.post(
                     f"{BACKEND_URL}/projects/{project_id}/ask",
+                    params={"stream": "true"},
                     data={"question": prompt},
+                    stream=True,
                     timeout=60
                 )
                 
-                # Clear the thinking indicator
-                thinking_placeholder.empty()
-                
                 if response.status_code == 200:
-                    data = response.json()
-                    answer = data["answer"]
+                    data = {}
+                    
+                    def answer_tokens():
+                        for line in response.iter_lines(decode_unicode=True):
+                            if not line.startswith("data: "):
+                                continue
+                            event = orjson.loads(line[len("data: "):])
+                            if "error" in event:
+                                raise RuntimeError(event["error"])
+                            if "token" in event:
+                                # Clear the thinking indicator once the answer starts
+                                thinking_placeholder.empty()
+                                yield event["token"]
+                            elif event.get("done"):
+                                data.update(event)
+                    
+                    # Display answer as it arrives
+                    answer = st.write_stream(answer_tokens()) or ""
+                    thinking_placeholder.empty()
                     sources = data.get("sources", [])
+                    # Strip source paths down to file names once, not on every rerun
+                    clean_sources = [s.rsplit('/', 1)[-1].rsplit('\\', 1)[-1] for s in sources if s and s != 'unknown']
                     response_time = data.get("time", 0)
                     has_analysis = data.get("has_analysis", False)
                     using_partial = data.get("using_partial", False)
                     
-                    # Display answer
-                    st.write(answer)
-                    
                     # Show metadata
                     col1, col2, col3 = st.columns([2, 2, 1])
                     with col1:
-                        if sources and sources != ['unknown']:
+                        if clean_sources:
                             with st.expander("📎 Sources", expanded=False):
-                                for src in sources:
-                                    # Clean up the source path
-                                    if src and src != 'unknown':
-                                        clean_src = src.replace('\\', '/').split('/')[-1] if '/' in src or '\\' in src else src
-                                        st.caption(f"• {clean_src}")
+                                for clean_src in clean_sources:
+                                    st.caption(f"• {clean_src}")
                     with col2:
                         if using_partial:
                             st.caption("⚡ _Using partial analysis (faster)_")
@@ -514,10 +701,12 @@ else:
                         "role": "assistant",
                         "content": answer,
                         "sources": sources,
+                        "clean_sources": clean_sources,
                         "has_analysis": has_analysis,
                         "using_partial": using_partial
                     })
                 else:
+                    thinking_placeholder.empty()
                     error_msg = f"Error: {response.text}"
                     st.error(error_msg)
                     st.session_state.messages[project_id].append({
@@ -532,8 +721,8 @@ else:
                     "role": "assistant",
                     "content": error_msg
                 })
-        
-        st.rerun()
+        # No rerun: both turns are already on screen and saved to the history,
+        # which render_chat_history picks up on the next rerun
 
-# Auto-refresh if analysis/preprocessing is running (non-blocking)
-check_auto_refresh()
\ No newline at end of file
+    # Live status while preprocessing/analysis is running
+    follow_status_events(project_id, status_slots)
\ No newline at end of file